@@ -0,0 +1,240 @@
+"""Minimal OpenAI-compatible server for load benchmarks.
+
+Answers ``/v1/chat/completions`` (plain and streamed) and
+``/v1/embeddings`` with schema-valid, made-up content after a fixed
+delay, so the backend can be driven end to end without an API key:
+
+* when the request offers a structured-output tool (the agents'
+  ``*Format`` tools), the reply calls it with arguments generated from
+  the tool's JSON schema;
+* otherwise, if the prompt contains a ``JsonOutputParser`` schema (title
+  and clarifying-question chains), the reply is a JSON instance of it;
+* anything else gets a short text answer.
+
+Every reply reports token usage, so cost accounting is exercised too.
+The server runs on its own thread and event loop (see
+:class:`FakeOpenAIServer`) so that its work does not show up as lag on
+the loop being measured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import re
+import socket
+import threading
+import time
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_SCHEMA_RE = re.compile(
+    r"Here is the output schema:\s*```(?:json)?\s*(\{.*?\})\s*```", re.S
+)
+_ids = itertools.count(1)
+
+
+def fake_instance(schema: dict[str, Any], defs: dict[str, Any] | None = None) -> Any:
+    """Return a small value that validates against JSON ``schema``."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [s for s in schema[combinator] if s.get("type") != "null"]
+            return fake_instance(options[0] if options else {}, defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if kind == "object":
+        return {
+            name: fake_instance(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_instance(schema.get("items", {}), defs)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return False
+    if schema.get("format") == "uri":
+        return "https://example.com/resource"
+    return "Lorem ipsum dolor sit amet"
+
+
+def _reply(body: dict[str, Any]) -> tuple[str | None, dict[str, Any] | None]:
+    """Return ``(content, tool_call)`` for a chat completion request."""
+    for tool in body.get("tools") or []:
+        function = tool.get("function", {})
+        if function.get("name", "").endswith("Format"):
+            arguments = fake_instance(function.get("parameters", {}))
+            return None, {
+                "id": f"call_{next(_ids)}",
+                "type": "function",
+                "function": {
+                    "name": function["name"],
+                    "arguments": json.dumps(arguments),
+                },
+            }
+
+    prompt = "\n".join(
+        message["content"]
+        for message in body.get("messages", [])
+        if isinstance(message.get("content"), str)
+    )
+    match = _SCHEMA_RE.search(prompt)
+    if match:
+        return json.dumps(fake_instance(json.loads(match.group(1)))), None
+    return "OK.", None
+
+
+def _usage(body: dict[str, Any], content: str | None, tool_call: dict | None) -> dict:
+    prompt_chars = len(json.dumps(body.get("messages", [])))
+    completion = content or tool_call["function"]["arguments"]
+    prompt_tokens, completion_tokens = prompt_chars // 4, len(completion) // 4 + 1
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def create_app(latency_ms: float, stream_chunks: int = 8) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        content, tool_call = _reply(body)
+        usage = _usage(body, content, tool_call)
+        completion_id = f"chatcmpl-{next(_ids)}"
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            message: dict[str, Any] = {"role": "assistant", "content": content}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": "tool_calls" if tool_call else "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta: dict, finish: str | None = None, **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": (
+                    [{"index": 0, "delta": delta, "finish_reason": finish}]
+                    if delta is not None
+                    else []
+                ),
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            text = content if tool_call is None else tool_call["function"]["arguments"]
+            size = max(1, len(text) // stream_chunks + 1)
+            pieces = [text[i : i + size] for i in range(0, len(text), size)]
+            if tool_call is None:
+                yield chunk({"role": "assistant", "content": ""})
+                for piece in pieces:
+                    yield chunk({"content": piece})
+            else:
+                head = {**tool_call, "function": {**tool_call["function"]}}
+                head["function"]["arguments"] = ""
+                yield chunk({"role": "assistant", "tool_calls": [{"index": 0, **head}]})
+                for piece in pieces:
+                    yield chunk(
+                        {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]}
+                    )
+            yield chunk({}, "tool_calls" if tool_call else "stop")
+            if include_usage:
+                yield chunk(None, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        data = [
+            {"object": "embedding", "index": i, "embedding": [0.01] * 1536}
+            for i in range(len(inputs))
+        ]
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "fake"),
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        )
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeOpenAIServer:
+    """Run the fake API with uvicorn on a background thread."""
+
+    def __init__(self, latency_ms: float, port: int | None = None) -> None:
+        self.port = port or free_port()
+        config = uvicorn.Config(
+            create_app(latency_ms),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            lifespan="off",
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, name="fake-openai", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> None:
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.02)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
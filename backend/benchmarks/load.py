@@ -0,0 +1,418 @@
+"""Concurrent-session load test for the API, run entirely in-process.
+
+The real FastAPI app is served by uvicorn on a local port, against
+
+* a fake OpenAI-compatible server (``fake_openai.py``) with a fixed
+  per-call latency,
+* fakeredis (or a real Redis with ``--redis-url``),
+* SQLite through aiosqlite (or Postgres with ``--database-url``),
+
+and ``--users`` simulated users each walk the full flow: ``POST /chats/``
+until the questionnaire completes, open ``/ws/roadmap/{id}``, ``POST
+/chats/{id}/generate-roadmap`` and wait for the final progress event.
+
+Reported (and written to ``--output`` as JSON):
+
+* throughput — completed sessions and HTTP requests per second
+* p50 / p95 / p99 / mean latency per endpoint, plus time to the first
+  WebSocket event and end-to-end roadmap time
+* event-loop lag — how late a 10 ms timer fires on the app's loop
+* thread pools — peak busy workers / queue depth of the engine executor
+  and peak borrowed tokens of the AnyIO pool used for sync endpoints
+* connections — peak Redis and database connections checked out
+
+``--compare previous.json`` fails the run (exit status 1) when throughput
+drops or any endpoint's p95 grows by more than ``--max-regression``, so
+two commits can be compared on the same machine.
+
+Usage (from ``backend/``, after ``uv sync --group dev``)::
+
+    python benchmarks/load.py --users 20 --output load.json
+    python benchmarks/load.py --users 20 --compare load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from fake_openai import FakeOpenAIServer, free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# The WebSocket closes itself on "completed"; "error" ends the run as well
+_FINAL_STATUSES = ("completed", "error")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _summary(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(values) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+class Recorder:
+    """Latencies and errors per endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, list[str]] = defaultdict(list)
+
+    async def timed(self, name: str, coro):
+        started = time.perf_counter()
+        try:
+            result = await coro
+        except Exception as exc:
+            self.errors[name].append(f"{type(exc).__name__}: {exc}")
+            raise
+        self.latencies[name].append(time.perf_counter() - started)
+        return result
+
+    def endpoints(self) -> dict:
+        names = sorted(set(self.latencies) | set(self.errors))
+        return {
+            name: {**_summary(self.latencies[name]), "errors": len(self.errors[name])}
+            for name in names
+        }
+
+
+class Monitor:
+    """Sample loop lag, thread pools and connection pools while running."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lag: list[float] = []
+        self.peaks: dict[str, float] = defaultdict(float)
+        self._task: asyncio.Task | None = None
+
+    def _peak(self, name: str, value: float | None) -> None:
+        if value is not None:
+            self.peaks[name] = max(self.peaks[name], value)
+
+    def _sample_pools(self) -> None:
+        from anyio import to_thread
+
+        from src.core import redis as redis_module
+        from src.core.database import engine
+        from src.engine.executor import get_engine_executor
+
+        stats = get_engine_executor().stats()
+        self._peak("engine_executor_active", stats["active_workers"])
+        self._peak("engine_executor_queued", stats["queue_depth"])
+        self.peaks["engine_executor_max_workers"] = stats["max_workers"]
+
+        limiter = to_thread.current_default_thread_limiter()
+        self._peak("anyio_threads_borrowed", limiter.borrowed_tokens)
+        self.peaks["anyio_threads_total"] = limiter.total_tokens
+
+        pool = redis_module._pool
+        if pool is not None:
+            self._peak("redis_connections_in_use", len(pool._in_use_connections))
+            self._peak(
+                "redis_connections_open",
+                len(pool._in_use_connections) + len(pool._available_connections),
+            )
+            self.peaks["redis_max_connections"] = pool.max_connections
+
+        checkedout = getattr(engine.pool, "checkedout", None)
+        if checkedout is not None:
+            self._peak("db_connections_checked_out", checkedout())
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag.append(max(0.0, time.perf_counter() - started - self.interval))
+            self._sample_pools()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def report(self) -> dict:
+        lag = _summary(self.lag)
+        lag.pop("count", None)
+        return {"event_loop_lag": lag, "pools": dict(self.peaks)}
+
+
+async def _create_user(client, index: int) -> str:
+    email = f"load-{uuid.uuid4().hex[:12]}-{index}@example.com"
+    password = "benchmark-password"
+    response = await client.post(
+        "/users/",
+        json={"full_name": f"Load User {index}", "email": email, "password": password},
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/users/login", json={"email": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def _session(client, ws_base: str, token: str, recorder: Recorder) -> None:
+    """One user: questionnaire, WebSocket, roadmap generation."""
+    import websockets
+
+    headers = {"Authorization": f"Bearer {token}"}
+    session_id = str(uuid.uuid4())
+
+    async def post_chat(message: str) -> dict:
+        response = await client.post(
+            "/chats/",
+            json={"session_id": session_id, "message": message},
+            headers=headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    reply = await recorder.timed(
+        "chat_create",
+        post_chat("I am joining the platform team as a backend dev"),
+    )
+    while not reply.get("completed"):
+        answer = (reply.get("options") or ["Python and some Kubernetes"])[0]
+        reply = await recorder.timed("chat_answer", post_chat(answer))
+
+    url = f"{ws_base}/ws/roadmap/{session_id}?token={token}"
+    async with websockets.connect(url, open_timeout=30) as ws:
+
+        async def trigger() -> None:
+            response = await client.post(
+                f"/chats/{session_id}/generate-roadmap", headers=headers
+            )
+            response.raise_for_status()
+
+        started = time.perf_counter()
+        await recorder.timed("generate_roadmap", trigger())
+
+        first_event = None
+        async for raw in ws:
+            if first_event is None:
+                first_event = time.perf_counter() - started
+                recorder.latencies["ws_first_event"].append(first_event)
+            event = json.loads(raw)
+            if event.get("status") in _FINAL_STATUSES:
+                if event["status"] == "error":
+                    raise RuntimeError(event.get("detail") or "roadmap error")
+                break
+        else:
+            raise RuntimeError("WebSocket closed before the roadmap finished")
+        recorder.latencies["roadmap_end_to_end"].append(time.perf_counter() - started)
+
+
+def _use_fakeredis() -> None:
+    import fakeredis
+    import redis.asyncio as aioredis
+    from fakeredis.aioredis import FakeConnection
+
+    from src.core import redis as redis_module
+
+    # Same pool limits as the app's own pool; Lua needs fakeredis[lua]
+    redis_module._pool = aioredis.ConnectionPool(
+        connection_class=FakeConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True,
+        max_connections=20,
+    )
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    import httpx
+    import uvicorn
+
+    from src.core.database import create_tables, engine
+    from src.main import app
+
+    if not args.redis_url:
+        _use_fakeredis()
+    await create_tables()
+
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", ws="websockets"
+        )
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.02)
+
+    recorder = Recorder()
+    monitor = Monitor()
+    failures: list[str] = []
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits
+    ) as client:
+        tokens = [await _create_user(client, i) for i in range(args.users)]
+
+        async def user(index: int, token: str) -> None:
+            await asyncio.sleep(args.ramp_seconds * index / max(1, args.users))
+            try:
+                await _session(client, f"ws://127.0.0.1:{port}", token, recorder)
+            except Exception as exc:
+                failures.append(f"{type(exc).__name__}: {exc}")
+
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(user(i, t) for i, t in enumerate(tokens)))
+        elapsed = time.perf_counter() - started
+        await monitor.stop()
+
+    server.should_exit = True
+    await serving
+    await engine.dispose()
+
+    completed = args.users - len(failures)
+    requests = sum(
+        len(recorder.latencies[name])
+        for name in ("chat_create", "chat_answer", "generate_roadmap")
+    )
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput": {
+            "sessions_completed": completed,
+            "sessions_failed": len(failures),
+            "sessions_per_second": round(completed / elapsed, 4),
+            "requests_per_second": round(requests / elapsed, 4),
+        },
+        "endpoints": recorder.endpoints(),
+        **monitor.report(),
+        "errors": failures[:20],
+    }
+
+
+def compare(result: dict, previous: dict, max_regression: float) -> list[str]:
+    """Return a message for every metric worse than ``previous``."""
+    failures = []
+    old = previous["throughput"]["sessions_per_second"]
+    new = result["throughput"]["sessions_per_second"]
+    if old and new < old * (1 - max_regression):
+        failures.append(f"sessions_per_second dropped: {new:.3f} < {old:.3f}")
+    for name, stats in result["endpoints"].items():
+        old_p95 = previous["endpoints"].get(name, {}).get("p95_ms")
+        if old_p95 and stats.get("p95_ms", 0) > old_p95 * (1 + max_regression):
+            failures.append(
+                f"{name} p95 regressed: {stats['p95_ms']:.1f} ms > {old_p95:.1f} ms"
+            )
+    return failures
+
+
+def _git_commit() -> str | None:
+    completed = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return completed.stdout.strip() or None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument(
+        "--ramp-seconds",
+        type=float,
+        default=0.0,
+        help="Spread user start times over this many seconds",
+    )
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--database-url", help="Default: a temporary SQLite file")
+    parser.add_argument("--redis-url", help="Default: in-process fakeredis")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    parser.add_argument("--compare", type=Path, help="Previous result to compare")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    fake_openai = FakeOpenAIServer(args.llm_latency_ms)
+    fake_openai.start()
+
+    workdir = Path(tempfile.mkdtemp(prefix="poe-load-"))
+    # Settings are read at import time, so configure them first
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.update(
+        OPENAI_API_KEY="fake",
+        OPENAI_BASE_URL=fake_openai.base_url,
+        OPENAI_API_BASE=fake_openai.base_url,
+        DATABASE_URL_OVERRIDE=args.database_url
+        or f"sqlite+aiosqlite:///{workdir / 'load.db'}",
+        ENVIRONMENT="benchmark",
+        MAX_CLARIFYING_QUESTIONS=str(args.questions),
+        ROADMAP_QUEUE_BACKEND="inprocess",
+        ROADMAP_CACHE_ENABLED="false",
+        LLM_CACHE_CALL_SITES="",
+        ARTIFACT_SINK="off",
+        TRACING_EXPORTER="off",
+        CASSETTE_MODE="off",
+        LOG_LEVEL="WARNING",
+    )
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+
+    try:
+        result = asyncio.run(_run(args))
+    finally:
+        fake_openai.stop()
+
+    result = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "config": {
+            "users": args.users,
+            "ramp_seconds": args.ramp_seconds,
+            "questions": args.questions,
+            "llm_latency_ms": args.llm_latency_ms,
+            "database": "custom" if args.database_url else "sqlite",
+            "redis": "custom" if args.redis_url else "fakeredis",
+        },
+        **result,
+    }
+
+    failures = []
+    if result["throughput"]["sessions_failed"]:
+        failures.append(f"{result['throughput']['sessions_failed']} sessions failed")
+    if args.compare and args.compare.exists():
+        previous = json.loads(args.compare.read_text())
+        result["compared_with"] = previous.get("commit")
+        failures += compare(result, previous, args.max_regression)
+    result["failures"] = failures
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        args.output.write_text(report + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
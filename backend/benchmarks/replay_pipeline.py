@@ -0,0 +1,93 @@
+"""Run ``curate_roadmap`` against a record / replay cassette.
+
+Record once against the real services, then replay as often as needed
+without OpenAI, DuckDuckGo or Chroma (Redis is still used, as it is part
+of what is being measured)::
+
+    python benchmarks/replay_pipeline.py chat.json --mode record
+    python benchmarks/replay_pipeline.py chat.json --runs 5 --latency none
+
+``chat.json`` holds the ``chat_data`` of a completed questionnaire
+(``title``, ``initial_message``, ``question_answers``).  Each run reports
+its wall time and outcome; the summary adds the mean duration of every
+pipeline stage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+async def _run(chat_data: dict, runs: int) -> dict:
+    from src.core.redis import close_redis
+    from src.core.utils.ai_core.cassette import close_cassette
+    from src.engine.entrypoint import curate_roadmap
+    from src.engine.latency import stage_latency_means
+
+    results = []
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            ok = await curate_roadmap(str(uuid.uuid4()), chat_data, use_cache=False)
+            results.append({"ok": ok, "seconds": time.perf_counter() - started})
+    finally:
+        close_cassette()
+        await close_redis()
+
+    durations = [r["seconds"] for r in results]
+    return {
+        "runs": results,
+        "median_seconds": statistics.median(durations),
+        "stage_mean_seconds": stage_latency_means(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("chat_data", type=Path, help="JSON file with chat_data")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument(
+        "--cassette", type=Path, default=BACKEND_DIR / "temp/cassettes/roadmap.jsonl"
+    )
+    parser.add_argument(
+        "--latency", choices=["none", "recorded", "synthetic"], default="recorded"
+    )
+    parser.add_argument("--synthetic-latency-ms", type=float, default=500)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them first
+    os.environ.update(
+        CASSETTE_MODE=args.mode,
+        CASSETTE_PATH=str(args.cassette.resolve()),
+        CASSETTE_LATENCY=args.latency,
+        CASSETTE_SYNTHETIC_LATENCY_MS=str(args.synthetic_latency_ms),
+        ROADMAP_CACHE_ENABLED="false",
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    chat_data = json.loads(args.chat_data.read_text())
+    runs = 1 if args.mode == "record" else args.runs
+    result = {"mode": args.mode, "latency": args.latency}
+    result.update(asyncio.run(_run(chat_data, runs)))
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        args.output.write_text(report + "\n")
+    return 0 if all(r["ok"] for r in result["runs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Offline recall@k and latency of policy retrieval: vector vs BM25 vs hybrid.
+
+Runs every query of a labelled set through
+
+* ``vector`` — embedding similarity, the current path.  Served from the
+  local snapshot of the collection (``LOCAL_VECTOR_INDEX_DIR``), i.e. an
+  exact search over the same vectors Chroma holds.
+* ``lexical`` — BM25 alone, from the index written by ``ingest``
+  (``LEXICAL_INDEX_DIR``).
+* ``hybrid`` — ``hybrid_search`` exactly as the tool runs it, with the
+  current ``HYBRID_*`` settings (or ``--vector-weight`` /
+  ``--lexical-weight``).
+
+For each method the report has recall@k, the median / p95 retrieval
+latency (without embedding) and how many queries needed an embedding
+call.  Query vectors are stored in ``--vectors`` on first use (the only
+step needing OpenAI), so later runs are fully offline.
+
+The query file is a JSON list::
+
+    [
+      {"query": "PTO carry-over",
+       "relevant": [{"source": "leaves_and_benefits.md", "section": "Carry"}]},
+      ...
+    ]
+
+A result matches a ``relevant`` entry when its source is equal and, if a
+``section`` is given, its section contains it.  recall@k is the share of
+a query's relevant entries matched in the top k, averaged over queries.
+
+Usage (from ``backend/``, after ``ingest`` and one worker start or search
+with ``LOCAL_VECTOR_INDEX_ENABLED=true``)::
+
+    python benchmarks/retrieval.py queries.json --k 1,3,5 --output retrieval.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def _matches(metadata: dict, relevant: dict) -> bool:
+    if metadata.get("source") != relevant["source"]:
+        return False
+    section = relevant.get("section")
+    return not section or section.lower() in str(metadata.get("section", "")).lower()
+
+
+def _recall(results: list, relevant: list[dict], k: int) -> float:
+    top = [document.metadata for document, _ in results[:k]]
+    found = sum(any(_matches(m, r) for m in top) for r in relevant)
+    return found / len(relevant) if relevant else 0.0
+
+
+def _query_vectors(queries: list[str], path: Path) -> dict[str, list[float]]:
+    """Load cached query vectors, embedding (and caching) the missing ones."""
+    vectors = json.loads(path.read_text()) if path.exists() else {}
+    missing = [q for q in queries if q not in vectors]
+    if missing:
+        from langchain_openai import OpenAIEmbeddings
+
+        from src.core.config import settings
+
+        embeddings = OpenAIEmbeddings(
+            model="text-embedding-3-small", api_key=settings.openai_api_key
+        )
+        vectors.update(zip(missing, embeddings.embed_documents(missing)))
+        path.write_text(json.dumps(vectors))
+    return vectors
+
+
+def _load_vector_index(collection: str):
+    from src.core.config import settings
+    from src.engine.tools.policy_index import PolicyIndex
+
+    directory = Path(settings.local_vector_index_dir)
+    snapshots = sorted(
+        directory.glob(f"{collection}-*.npy"), key=lambda p: p.stat().st_mtime
+    )
+    if not snapshots:
+        raise SystemExit(
+            f"No vector snapshot in {directory}; start a worker with "
+            "LOCAL_VECTOR_INDEX_ENABLED=true to create one"
+        )
+    version = snapshots[-1].stem[len(collection) + 1 :]
+    return PolicyIndex.load_snapshot(directory, collection, version)
+
+
+def run(cases: list[dict], ks: list[int], vectors_path: Path) -> dict:
+    from langchain_core.documents import Document
+
+    from src.core.config import settings
+    from src.core.utils.lexical_index import BM25Index, index_path
+    from src.engine.tools.hybrid_search import hybrid_search, is_lexical_only
+
+    collection = settings.chroma_collection_name
+    vector_index = _load_vector_index(collection)
+    lexical_index = BM25Index.load(index_path(settings.lexical_index_dir, collection))
+    vectors = _query_vectors([c["query"] for c in cases], vectors_path)
+    depth = max(ks)
+
+    def vector(query: str, k: int) -> list[tuple[Document, float]]:
+        return [
+            (Document(id=chunk_id, page_content=text, metadata=metadata), score)
+            for chunk_id, text, metadata, score in vector_index.search(
+                vectors[query], k
+            )
+        ]
+
+    def lexical(query: str, k: int) -> list[tuple[Document, float]]:
+        return [
+            (
+                Document(
+                    page_content=lexical_index.documents[n],
+                    metadata=lexical_index.metadatas[n],
+                ),
+                score,
+            )
+            for n, score in lexical_index.search(query, k)
+        ]
+
+    def hybrid(query: str, k: int) -> list[tuple[Document, float]]:
+        return hybrid_search(query, k, lexical_index, vector)
+
+    methods = {"vector": vector, "lexical": lexical, "hybrid": hybrid}
+    report = {}
+    for name, search in methods.items():
+        recalls = {k: [] for k in ks}
+        latencies = []
+        for case in cases:
+            started = time.perf_counter()
+            results = search(case["query"], depth)
+            latencies.append(time.perf_counter() - started)
+            for k in ks:
+                recalls[k].append(_recall(results, case["relevant"], k))
+
+        if name == "vector":
+            embedding_calls = len(cases)
+        elif name == "lexical":
+            embedding_calls = 0
+        else:
+            embedding_calls = sum(
+                not is_lexical_only(c["query"], lexical_index) for c in cases
+            )
+        report[name] = {
+            **{f"recall@{k}": round(statistics.fmean(recalls[k]), 4) for k in ks},
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+            "embedding_calls": embedding_calls,
+        }
+
+    return {
+        "queries": len(cases),
+        "chunks": len(vector_index),
+        "hybrid": {
+            "vector_weight": settings.hybrid_vector_weight,
+            "lexical_weight": settings.hybrid_lexical_weight,
+            "rrf_k": settings.hybrid_rrf_k,
+            "candidates": settings.hybrid_candidates,
+        },
+        "methods": report,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", type=Path, help="Labelled queries (JSON)")
+    parser.add_argument("--k", default="1,3,5", help="Comma-separated cut-offs")
+    parser.add_argument(
+        "--vectors",
+        type=Path,
+        help="Query vector cache (default: <queries>.vectors.json)",
+    )
+    parser.add_argument("--vector-weight", type=float)
+    parser.add_argument("--lexical-weight", type=float)
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure them first
+    if args.vector_weight is not None:
+        os.environ["HYBRID_VECTOR_WEIGHT"] = str(args.vector_weight)
+    if args.lexical_weight is not None:
+        os.environ["HYBRID_LEXICAL_WEIGHT"] = str(args.lexical_weight)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    cases = json.loads(args.queries.read_text())
+    ks = sorted({int(k) for k in args.k.split(",")})
+    vectors_path = args.vectors or args.queries.with_suffix(".vectors.json")
+    result = run(cases, ks, vectors_path)
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        args.output.write_text(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Cold-start benchmark for the API: import time and memory of ``src.main:app``.
+
+Every run imports the app in a fresh interpreter and records:
+
+* ``import_seconds`` — wall time of ``import src.main``
+* ``max_rss_mb`` — peak resident memory of that interpreter
+* ``heavy_modules`` — agent-stack packages that got imported anyway
+
+The medians are compared with a stored baseline.  The script exits with
+status 1 when a metric regresses by more than ``--max-regression`` or when
+any heavy module (deepagents, LangGraph, Chroma, DuckDuckGo, …) is loaded
+at import time, which means something builds agents eagerly again.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/startup.py                    # compare with baseline
+    python benchmarks/startup.py --update-baseline  # record a new baseline
+    python benchmarks/startup.py --output result.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "startup_baseline.json"
+
+# Only roadmap generation needs these; the API must not import them at startup
+HEAVY_MODULES = (
+    "deepagents",
+    "langgraph",
+    "chromadb",
+    "langchain_chroma",
+    "langchain_community",
+    "ddgs",
+    "duckduckgo_search",
+)
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import src.main  # noqa: F401
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": elapsed,
+    # ru_maxrss is in KiB on Linux
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(
+        name for name in %r if name in sys.modules
+    ),
+}))
+"""
+
+
+def _probe_once() -> dict:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE % (HEAVY_MODULES,)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing src.main failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> dict:
+    """Import the app ``runs`` times (after one warm-up) and summarise."""
+    _probe_once()  # populate the bytecode / OS file caches
+    samples = [_probe_once() for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_seconds": statistics.median(s["import_seconds"] for s in samples),
+        "max_rss_mb": statistics.median(s["max_rss_mb"] for s in samples),
+        "heavy_modules": sorted({m for s in samples for m in s["heavy_modules"]}),
+        "python": sys.version.split()[0],
+    }
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return a message for every metric worse than baseline by > tolerance."""
+    failures = []
+    for metric in ("import_seconds", "max_rss_mb"):
+        limit = baseline[metric] * (1 + max_regression)
+        if result[metric] > limit:
+            failures.append(
+                f"{metric} regressed: {result[metric]:.3f} > {limit:.3f} "
+                f"(baseline {baseline[metric]:.3f} + {max_regression:.0%})"
+            )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown / growth before failing (default 0.2)",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    failures = []
+    if result["heavy_modules"]:
+        heavy = ", ".join(result["heavy_modules"])
+        failures.append(f"heavy modules imported at startup: {heavy}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        result["baseline"] = baseline
+        failures += compare(result, baseline, args.max_regression)
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline")
+
+    result["failures"] = failures
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        args.output.write_text(report + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
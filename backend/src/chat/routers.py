@@ -1,16 +1,23 @@
 import asyncio
+from functools import partial
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth.dependencies import get_current_user
 from ..core.config import settings
 from ..core.database import get_db
+from ..core.tracing import SESSION_ATTRIBUTE, current_span
+from ..core.utils.ai_core.models import model_config
+from ..core.utils.ai_core.usage import UsageTracker, track_usage
 from .models import ChatStatus
 from .schema import (
     ChatHistoryResponse,
     ChatInteractionResponse,
+    ChatUsageResponse,
     GenerateRoadmapResponse,
     QuestionnaireQuestionSchema,
     UserQuerySchema,
@@ -18,6 +25,8 @@ from .schema import (
 from .services import AIService, ChatService
 from .services.ai import ChatHistoryItemSchema
 
+logger = structlog.get_logger()
+
 router = APIRouter(
     prefix="/chats",
     tags=["chats"],
@@ -40,8 +49,52 @@ async def chat_interaction(
       answer to the last AI question, the next clarifying question is
       generated and returned. If the AI signals completion, no new
       question is returned and the chat is marked as completed.
+
+    Tokens used by the title / clarifying-question chains are added to
+    the chat's ``token_consumed`` in one write once the request is done.
     """
+    request_span = current_span()
+    if request_span is not None and user_query.session_id is not None:
+        request_span.set_attribute(SESSION_ATTRIBUTE, str(user_query.session_id))
+
+    with track_usage(str(user_query.session_id)) as usage:
+        try:
+            return await _chat_interaction(user_query, db_session, current_user)
+        finally:
+            if usage.stages and user_query.session_id is not None:
+                await _record_token_usage(db_session, user_query.session_id, usage)
+
+
+async def _record_token_usage(
+    db_session: AsyncSession, session_id: UUID, usage: UsageTracker
+) -> None:
+    # Tokens are spent even when the request fails afterwards, so this
+    # also runs on error paths and must not mask the original exception.
+    try:
+        await ChatService.add_token_usage(
+            db_session, session_id, usage.total_tokens, usage.as_dict()
+        )
+    except SQLAlchemyError as exc:
+        await db_session.rollback()
+        logger.warning(
+            "token_usage_write_failed", session_id=str(session_id), error=str(exc)
+        )
+
+
+def _chat_data(chat) -> dict:
+    """Return the parts of ``chat`` the roadmap engine works from."""
+    return {
+        "title": chat.title,
+        "initial_message": chat.initial_message,
+        "question_answers": chat.question_answers or [],
+    }
+
 
+async def _chat_interaction(
+    user_query: UserQuerySchema,
+    db_session: AsyncSession,
+    current_user,
+) -> ChatInteractionResponse:
     if user_query.message is None or not user_query.message.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,7 +125,7 @@ async def chat_interaction(
             title=title,
             initial_message=user_query.message,
             user_id=current_user.id,
-            model_used=settings.openai_model_name,
+            model_used=model_config("clarifying_question").model,
             chat_id=user_query.session_id,
         )
         chat_history: list[ChatHistoryItemSchema] = []
@@ -114,6 +167,18 @@ async def chat_interaction(
                 )
             )
 
+        if (
+            settings.speculative_planning_enabled
+            and len(chat_history) < settings.max_clarifying_questions
+        ):
+            # Start planning early; generate-roadmap reuses the result
+            # if the remaining answers do not change the picture
+            from ..engine.entrypoint import schedule_speculation
+
+            schedule_speculation(
+                str(chat.id), _chat_data(chat), user_id=str(current_user.id)
+            )
+
     if len(chat_history) >= settings.max_clarifying_questions:
         await ChatService.update_chat_status(
             db_session,
@@ -238,17 +303,63 @@ async def get_chat_history(
     )
 
 
+@router.get("/{session_id}/usage", response_model=ChatUsageResponse)
+async def get_chat_usage(
+    session_id: UUID,
+    db_session: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Return the tokens (and estimated cost) a chat has consumed, per stage."""
+
+    chat = await ChatService.get_chat_by_id(db_session, session_id)
+    if chat is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found",
+        )
+
+    if chat.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this chat",
+        )
+
+    return ChatUsageResponse(
+        session_id=chat.id,
+        token_consumed=chat.token_consumed or 0,
+        stages=(chat.chat_metadata or {}).get("token_usage", {}),
+    )
+
+
 @router.post("/{session_id}/generate-roadmap", response_model=GenerateRoadmapResponse)
 async def generate_roadmap(
     session_id: UUID,
+    resume: bool = Query(
+        False,
+        description="Skip stages already completed by a previous, interrupted run",
+    ),
+    bypass_cache: bool = Query(
+        False,
+        description="Always generate a fresh roadmap instead of serving a cached one",
+    ),
     db_session: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """Trigger roadmap curation for a completed chat session.
 
-    The actual work runs as an ``asyncio`` background task that publishes
-    progress via Redis pub/sub.  The client should open a WebSocket to
-    ``/ws/roadmap/{session_id}`` to receive live updates.
+    The actual work runs as an ``asyncio`` background task, or on a
+    standalone worker when ``ROADMAP_QUEUE_BACKEND=redis``, and publishes
+    progress via Redis pub/sub.  With ``?resume=true`` stages whose
+    checkpoint matches the current inputs are not re-run, and with
+    ``?bypass_cache=true`` a cached roadmap for an equivalent
+    questionnaire is ignored.
+
+    Triggering is idempotent: while a generation holds the session's
+    lease, further calls start nothing and attach to the running one
+    (``status="in_progress"``).
+
+    The client should open a WebSocket to ``/ws/roadmap/{session_id}``
+    to receive live updates.
     """
     chat = await ChatService.get_chat_by_id(db_session, session_id)
     if chat is None:
@@ -269,21 +380,113 @@ async def generate_roadmap(
             detail="Chat is not completed yet. Cannot generate roadmap.",
         )
 
-    chat_data = {
-        "title": chat.title,
-        "initial_message": chat.initial_message,
-        "question_answers": chat.question_answers or [],
-    }
+    chat_data = _chat_data(chat)
+
+    from ..engine.lease import SessionLease, queued_lease_ttl_seconds
+
+    queued = settings.roadmap_queue_backend == "redis"
+    # Nobody renews the lease while the job waits in the queue
+    lease = SessionLease(
+        str(session_id), ttl_seconds=queued_lease_ttl_seconds() if queued else None
+    )
+    if not await lease.acquire():
+        return GenerateRoadmapResponse(
+            session_id=chat.id,
+            status="in_progress",
+            message="Roadmap generation is already running. Connect to the WebSocket for live progress.",
+        )
 
-    # Fire background task with proper tracking
-    from ..engine.entrypoint import _running_tasks, curate_roadmap
+    from ..engine.entrypoint import clear_streamed_sections
 
-    task = asyncio.create_task(curate_roadmap(str(session_id), chat_data))
-    _running_tasks.add(task)
-    task.add_done_callback(_running_tasks.discard)
+    # A reconnecting client must not be sent the previous run's sections
+    await clear_streamed_sections(str(session_id))
+
+    if queued:
+        # Durable path: a standalone worker picks the job up
+        from ..engine.job_queue import RoadmapJobQueue
+
+        try:
+            await RoadmapJobQueue().enqueue(
+                str(session_id),
+                chat_data,
+                resume=resume,
+                use_cache=not bypass_cache,
+                lease_token=lease.token,
+                user_id=str(current_user.id),
+            )
+        except Exception:
+            await lease.release()
+            raise
+    else:
+        # Fire background task with proper tracking
+        from ..engine.entrypoint import (
+            _running_tasks,
+            curate_roadmap,
+            publish_cancelled,
+        )
+        from ..engine.lease import run_with_lease
+
+        task = asyncio.create_task(
+            run_with_lease(
+                lease,
+                partial(
+                    curate_roadmap,
+                    str(session_id),
+                    chat_data,
+                    resume=resume,
+                    use_cache=not bypass_cache,
+                    user_id=str(current_user.id),
+                ),
+                on_cancelled=partial(publish_cancelled, str(session_id)),
+            )
+        )
+        _running_tasks.add(task)
+        task.add_done_callback(_running_tasks.discard)
 
     return GenerateRoadmapResponse(
         session_id=chat.id,
         status="pending",
         message="Roadmap generation started. Connect to the WebSocket for live progress.",
     )
+
+
+@router.delete("/{session_id}/generate-roadmap", response_model=GenerateRoadmapResponse)
+async def cancel_roadmap_generation(
+    session_id: UUID,
+    db_session: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Cancel the roadmap generation running for a chat session.
+
+    Works wherever the generation runs (this process, another API
+    process or a queue worker): the runner notices within
+    ``ROADMAP_CANCEL_POLL_SECONDS``, stops, frees its slot and publishes
+    a "cancelled" progress event.  A job still waiting in the queue is
+    cancelled as soon as a worker picks it up.
+    """
+    chat = await ChatService.get_chat_by_id(db_session, session_id)
+    if chat is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found",
+        )
+
+    if chat.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this chat",
+        )
+
+    from ..engine.lease import request_cancel
+
+    if not await request_cancel(str(session_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No roadmap generation is running for this chat",
+        )
+
+    return GenerateRoadmapResponse(
+        session_id=chat.id,
+        status="cancelling",
+        message="Cancellation requested. A cancelled event follows on the WebSocket.",
+    )
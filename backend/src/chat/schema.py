@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -50,7 +50,7 @@ class ChatSchema(BaseModel):
     title: str = Field(..., description="The title of the chat")
     user_id: UUID = Field(..., description="The ID of the user who owns the chat")
     model_used: str = Field(..., description="The model used for the chat")
-    chat_metadata: Optional[Dict[str, str]] = Field(
+    chat_metadata: Optional[Dict[str, Any]] = Field(
         None, description="Additional metadata for the chat"
     )
     token_consumed: Optional[int] = Field(
@@ -176,3 +176,25 @@ class GenerateRoadmapResponse(BaseModel):
     message: str = Field(
         ..., description="Human-readable message about the generation status"
     )
+
+
+class StageUsageSchema(BaseModel):
+    calls: int = Field(0, description="Number of LLM calls made by the stage")
+    prompt_tokens: int = Field(0, description="Prompt (input) tokens")
+    completion_tokens: int = Field(0, description="Completion (output) tokens")
+    cached_tokens: int = Field(
+        0, description="Prompt tokens served from the provider's prompt cache"
+    )
+    total_tokens: int = Field(0, description="Prompt plus completion tokens")
+    cost_usd: float = Field(0.0, description="Estimated cost in USD")
+
+
+class ChatUsageResponse(BaseModel):
+    """Accumulated LLM token usage of a chat session, per stage."""
+
+    session_id: UUID = Field(..., description="Chat session identifier")
+    token_consumed: int = Field(..., description="Total tokens consumed by the chat")
+    stages: Dict[str, StageUsageSchema] = Field(
+        default_factory=dict,
+        description="Usage per stage / call site (chat_title, planner, ...)",
+    )
@@ -39,9 +39,7 @@ class AIService:
             pydantic_model=ChatTitleSchema,
             prompt_template=prompt_template,
             input_variables=[{"name": "initial_message", "type": "str"}],
-            model_name=settings.openai_model_name,
-            api_key=settings.openai_api_key,
-            temperature=0.5,
+            call_site="chat_title",
         )
 
         result = await chain.arun({"initial_message": initial_message})
@@ -74,9 +72,7 @@ class AIService:
                 {"name": "user_message", "type": "str"},
                 {"name": "session_id", "type": "str"},
             ],
-            model_name=settings.openai_model_name,
-            api_key=settings.openai_api_key,
-            temperature=0.7,
+            call_site="clarifying_question",
         )
 
         result = await chain.arun(
@@ -1,14 +1,17 @@
 import uuid
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.attributes import flag_modified
 
+from ...core.tracing import traced
 from ..models import Chat, ChatStatus
 
 
 class ChatService:
     @staticmethod
+    @traced("db.ChatService.create_chat")
     async def create_chat(
         db_session: AsyncSession,
         title: str,
@@ -30,6 +33,7 @@ class ChatService:
         return new_chat
 
     @staticmethod
+    @traced("db.ChatService.get_chat_by_id")
     async def get_chat_by_id(
         db_session: AsyncSession, chat_id: uuid.UUID
     ) -> Chat | None:
@@ -37,6 +41,7 @@ class ChatService:
         return result
 
     @staticmethod
+    @traced("db.ChatService.update_chat_token_consumed")
     async def update_chat_token_consumed(
         db_session: AsyncSession, chat: Chat, tokens: int
     ) -> Chat:
@@ -47,6 +52,66 @@ class ChatService:
         return chat
 
     @staticmethod
+    @traced("db.ChatService.add_token_usage")
+    async def add_token_usage(
+        db_session: AsyncSession,
+        chat_id: uuid.UUID,
+        tokens: int,
+        breakdown: dict[str, dict[str, Any]],
+    ) -> Chat | None:
+        """Add a request's token usage to a chat in a single transaction.
+
+        ``tokens`` is added to ``token_consumed`` and the per-stage
+        ``breakdown`` (calls, token and cost counters) is summed into
+        ``chat_metadata["token_usage"]``.  Safe against concurrent writers
+        for the same chat (the chat request, the pipeline run and a
+        speculative run).
+        """
+        # Increment in SQL: the UPDATE also locks the row until commit, so
+        # the read below sees every earlier writer's breakdown
+        result = await db_session.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(token_consumed=func.coalesce(Chat.token_consumed, 0) + tokens)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await db_session.rollback()
+            return None
+        # The identity map may hold a stale copy (expire_on_commit=False)
+        chat = await db_session.get(Chat, chat_id, populate_existing=True)
+        metadata = dict(chat.chat_metadata or {})
+        totals = dict(metadata.get("token_usage") or {})
+        for stage, counters in breakdown.items():
+            current = dict(totals.get(stage) or {})
+            for name, value in counters.items():
+                current[name] = current.get(name, 0) + value
+            totals[stage] = current
+        metadata["token_usage"] = totals
+        chat.chat_metadata = metadata
+        flag_modified(chat, "chat_metadata")
+        db_session.add(chat)
+        await db_session.commit()
+        return chat
+
+    @staticmethod
+    @traced("db.ChatService.get_token_usage_by_user")
+    async def get_token_usage_by_user(
+        db_session: AsyncSession, limit: int = 20
+    ) -> list[tuple[uuid.UUID, int]]:
+        """Return ``(user_id, tokens)`` for the heaviest users, descending."""
+        total = func.coalesce(func.sum(Chat.token_consumed), 0).label("tokens")
+        result = await db_session.execute(
+            select(Chat.user_id, total)
+            .where(Chat.user_id.is_not(None))
+            .group_by(Chat.user_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        return [(row.user_id, int(row.tokens)) for row in result]
+
+    @staticmethod
+    @traced("db.ChatService.update_chat_status")
     async def update_chat_status(
         db_session: AsyncSession, chat: Chat, status: ChatStatus
     ) -> Chat:
@@ -57,6 +122,7 @@ class ChatService:
         return chat
 
     @staticmethod
+    @traced("db.ChatService.add_question_answer")
     async def add_question_answer(
         db_session: AsyncSession,
         chat: Chat,
@@ -84,6 +150,7 @@ class ChatService:
         return chat
 
     @staticmethod
+    @traced("db.ChatService.get_chats_by_user_id")
     async def get_chats_by_user_id(
         db_session: AsyncSession, user_id: uuid.UUID
     ) -> list[Chat]:
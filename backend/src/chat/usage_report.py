@@ -0,0 +1,57 @@
+"""CLI report of the users whose chats consumed the most LLM tokens.
+
+Usage (from the backend directory):
+    python -m src.chat.usage_report              # top 20 users
+    python -m src.chat.usage_report --limit 50
+
+Reads ``Chat.token_consumed`` (see ``ChatService.add_token_usage``), so it
+covers every process that served those chats.  It is an operator tool and
+is deliberately not exposed over the API, which has no admin role.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from ..core.database import AsyncSessionLocal, engine
+from ..users.models import User
+from .services.chat import ChatService
+
+
+async def _report(limit: int) -> None:
+    async with AsyncSessionLocal() as db_session:
+        usage = await ChatService.get_token_usage_by_user(db_session, limit=limit)
+        user_ids = [user_id for user_id, _ in usage]
+        result = await db_session.execute(
+            select(User.id, User.email).where(User.id.in_(user_ids))
+        )
+        emails = dict(result.all())
+    await engine.dispose()
+
+    if not usage:
+        print("No token usage recorded.")
+        return
+    width = max(len(emails.get(user_id) or str(user_id)) for user_id, _ in usage)
+    for user_id, tokens in usage:
+        print(f"{emails.get(user_id) or str(user_id):<{width}}  {tokens:>12,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List the users whose chats consumed the most LLM tokens",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Number of users to list (default: 20)",
+    )
+    args = parser.parse_args()
+    asyncio.run(_report(args.limit))
+
+
+if __name__ == "__main__":
+    main()
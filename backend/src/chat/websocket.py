@@ -13,7 +13,12 @@ import structlog
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
 from ..auth.jwt import verify_access_token
-from ..core.redis import get_redis, roadmap_channel, roadmap_state_key
+from ..core.redis import (
+    get_redis,
+    roadmap_channel,
+    roadmap_sections_key,
+    roadmap_state_key,
+)
 
 logger = structlog.get_logger()
 
@@ -42,7 +47,8 @@ async def roadmap_progress_ws(
     Flow
     ----
     1. Authenticate via the ``token`` query param.
-    2. Send any cached progress so a refresh picks up where we left off.
+    2. Send any cached progress (and already-streamed ``section_ready``
+       events) so a refresh picks up where we left off.
     3. Subscribe to the Redis pub/sub channel and forward every message.
     """
 
@@ -67,6 +73,13 @@ async def roadmap_progress_ws(
             )
             await websocket.send_json(cached)
 
+            # Replay sections streamed before this connection
+            if cached.get("status") != "completed":
+                for raw_section in await redis.lrange(
+                    roadmap_sections_key(session_id), 0, -1
+                ):
+                    await websocket.send_json(json.loads(raw_section))
+
         # Subscribe to real-time channel
         pubsub = redis.pubsub()
         await pubsub.subscribe(pubsub_key)
@@ -10,9 +10,14 @@ class Settings(BaseSettings):
     database_name: str = "onboarding_db"
     database_user: str = "onboarding_user"
     database_password: str = "securepassword"
+    # Full SQLAlchemy URL replacing the settings above (e.g. SQLite for
+    # local benchmarks)
+    database_url_override: str = ""
 
     @property
     def database_url(self) -> str:
+        if self.database_url_override:
+            return self.database_url_override
         return (
             f"postgresql+asyncpg://{self.database_user}:"
             f"{self.database_password}@{self.database_host}:"
@@ -52,6 +57,34 @@ class Settings(BaseSettings):
     youtube_api_key: str = "YOUR_YOUTUBE_API_KEY"
     openai_api_key: str = "YOUR_OPENAI_API_KEY"
 
+    # Model routing per LLM call site (see core/utils/ai_core/models.py).
+    # An empty model falls back to OPENAI_MODEL_NAME; empty max tokens /
+    # timeout use the OpenAI client defaults.
+    chat_title_model: str | None = None
+    chat_title_temperature: float = 0.5
+    chat_title_max_tokens: int | None = None
+    chat_title_timeout_seconds: float | None = None
+    clarifying_question_model: str | None = None
+    clarifying_question_temperature: float = 0.7
+    clarifying_question_max_tokens: int | None = None
+    clarifying_question_timeout_seconds: float | None = None
+    planner_model: str | None = None
+    planner_temperature: float = 0
+    planner_max_tokens: int | None = None
+    planner_timeout_seconds: float | None = None
+    policy_researcher_model: str | None = None
+    policy_researcher_temperature: float = 0
+    policy_researcher_max_tokens: int | None = None
+    policy_researcher_timeout_seconds: float | None = None
+    researcher_model: str | None = None
+    researcher_temperature: float = 0
+    researcher_max_tokens: int | None = None
+    researcher_timeout_seconds: float | None = None
+    roadmap_creator_model: str | None = None
+    roadmap_creator_temperature: float = 0
+    roadmap_creator_max_tokens: int | None = None
+    roadmap_creator_timeout_seconds: float | None = None
+
     # Redis settings
     redis_host: str = "localhost"
     redis_port: int = 6379
@@ -62,11 +95,131 @@ class Settings(BaseSettings):
     chroma_host: str = "localhost"
     chroma_port: int = 8100
     chroma_collection_name: str = "company_policies"
+    # Query / upsert Chroma with the async HTTP client (no executor thread)
+    chroma_async_enabled: bool = False
+
+    # Shared outbound HTTP pool (see core/http.py)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_seconds: float = 30.0
 
     # RAG settings
     rag_data_dir: str = "rag_data"
     rag_chunk_size: int = 1000
     rag_chunk_overlap: int = 200
+    # In-process copy of the Chroma collection (see engine/tools/policy_index.py)
+    local_vector_index_enabled: bool = False
+    local_vector_index_dir: str = "temp/vector_index"
+    local_vector_index_refresh_seconds: float = 30
+    # Hybrid BM25 + vector retrieval (see engine/tools/hybrid_search.py)
+    hybrid_search_enabled: bool = False
+    hybrid_vector_weight: float = 1.0
+    hybrid_lexical_weight: float = 1.0
+    hybrid_rrf_k: int = 60
+    hybrid_candidates: int = 20
+    hybrid_lexical_max_terms: int = 3
+    lexical_index_dir: str = "temp/lexical_index"
+    # Post-retrieval: over-fetch, MMR, adjacent-chunk merging, token budget
+    # (see engine/tools/post_retrieval.py)
+    rag_post_retrieval_enabled: bool = True
+    rag_overfetch_factor: int = 4
+    rag_mmr_lambda: float = 0.7
+    rag_duplicate_threshold: float = 0.95
+    rag_tool_output_max_tokens: int = 1500
+
+    # Roadmap engine settings
+    research_fanout_enabled: bool = False
+    research_fanout_concurrency: int = 3
+    engine_executor_max_workers: int = 16
+    checkpoint_ttl_seconds: int = 86400
+    roadmap_streaming_enabled: bool = True
+    stage_handoff_mode: str = "compact"  # Options: compact, full
+    handoff_snippet_chars: int = 0
+
+    # Roadmap deadline settings (seconds; each stage also gets at most
+    # whatever is left of the overall deadline)
+    roadmap_deadline_seconds: float = 600
+    planner_budget_seconds: float = 90
+    policy_research_budget_seconds: float = 120
+    internet_research_budget_seconds: float = 240
+    roadmap_creator_budget_seconds: float = 240
+    tool_call_timeout_seconds: float = 20
+
+    # Speculative planning (runs while the questionnaire is in progress)
+    speculative_planning_enabled: bool = False
+    speculative_min_answers: int = 3
+    speculative_include_research: bool = False
+    speculative_match_threshold: float = 0.6
+    speculative_ttl_seconds: int = 3600
+
+    # LLM response cache settings
+    llm_cache_backend: str = "memory"  # Options: memory, redis
+    llm_cache_call_sites: list[str] | str = "chat_title,clarifying_question"
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_max_entries: int = 2048
+    llm_cache_semantic_enabled: bool = False
+    llm_cache_similarity_threshold: float = 0.95
+
+    @property
+    def llm_cache_call_sites_list(self) -> list[str]:
+        if isinstance(self.llm_cache_call_sites, list):
+            return self.llm_cache_call_sites
+        sites = self.llm_cache_call_sites.split(",")
+        return [site.strip() for site in sites if site.strip()]
+
+    # Query-embedding cache (policy search): per-process LRU + Redis
+    embedding_cache_enabled: bool = True
+    embedding_cache_redis: bool = True
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_ttl_seconds: int = 7 * 86400
+
+    # Roadmap cache settings
+    roadmap_cache_enabled: bool = True
+    roadmap_cache_ttl_seconds: int = 7 * 86400
+    roadmap_cache_max_entries: int = 1000
+    roadmap_cache_eviction: str = "lru"  # Options: lru, fifo
+
+    # Debug artifact sink settings
+    artifact_sink: str = "off"  # Options: off, local, redis
+    artifact_dir: str = "temp/artifacts"
+    artifact_sample_rate: float = 1.0
+    artifact_max_bytes: int = 1_000_000
+    artifact_ttl_seconds: int = 86400
+
+    # Roadmap job queue settings
+    roadmap_queue_backend: str = "inprocess"  # Options: inprocess, redis
+    worker_concurrency: int = 4
+    job_visibility_timeout_seconds: int = 300
+    job_max_attempts: int = 3
+    roadmap_lease_ttl_seconds: float = 60
+    # Longest expected wait in the Redis queue; a queued job's lease lasts
+    # this plus JOB_VISIBILITY_TIMEOUT_SECONDS
+    roadmap_queue_wait_seconds: float = 900
+    roadmap_cancel_poll_seconds: float = 1.0
+
+    # Admission control settings
+    admission_backend: str = "local"  # Options: local, redis
+    admission_max_concurrent: int = 8
+    admission_max_per_user: int = 2
+    admission_poll_seconds: float = 1.0
+    admission_slot_ttl_seconds: float = 60
+
+    # Record / replay of LLM and tool calls (offline benchmarking)
+    cassette_mode: str = "off"  # Options: off, record, replay
+    cassette_path: str = "temp/cassettes/roadmap.jsonl"
+    cassette_latency: str = "recorded"  # Options: none, recorded, synthetic
+    cassette_synthetic_latency_ms: float = 500
+
+    # Runtime stats logged every N seconds by the API and workers
+    # (see engine/metrics.py; 0 disables)
+    stats_log_interval_seconds: float = 60
+
+    # Tracing settings
+    tracing_exporter: str = "off"  # Options: off, file, otlp
+    tracing_file_path: str = "temp/traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_service_name: str = "poe-backend"
+    tracing_export_interval_seconds: float = 2.0
 
     @property
     def redis_url(self) -> str:
@@ -0,0 +1,82 @@
+"""Shared outbound HTTP connection pools.
+
+Embedding calls to OpenAI go through one ``httpx`` client per process
+(async, plus a sync twin for thread-bound callers) instead of each
+client opening its own pool, so connections stay alive and are reused
+across searches.  The async Chroma client keeps a pool of its own but is
+configured with the same limits (see :func:`chroma_client_settings`):
+
+* ``HTTP_MAX_CONNECTIONS`` — connections open at once
+* ``HTTP_MAX_KEEPALIVE_CONNECTIONS`` — idle connections kept for reuse
+* ``HTTP_KEEPALIVE_SECONDS`` — how long an idle connection is kept
+"""
+
+from __future__ import annotations
+
+import threading
+
+import httpx
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+_lock = threading.Lock()
+_client: httpx.Client | None = None
+_async_client: httpx.AsyncClient | None = None
+
+
+def http_limits() -> httpx.Limits:
+    """Connection limits shared by every outbound pool."""
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_seconds,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide sync HTTP client."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(limits=http_limits(), timeout=httpx.Timeout(60.0))
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(
+                limits=http_limits(), timeout=httpx.Timeout(60.0)
+            )
+    return _async_client
+
+
+def chroma_client_settings():
+    """``chromadb`` client settings using the shared limits."""
+    from chromadb.config import Settings as ChromaSettings
+
+    return ChromaSettings(
+        anonymized_telemetry=False,
+        chroma_http_keepalive_secs=settings.http_keepalive_seconds,
+        chroma_http_max_connections=settings.http_max_connections,
+        chroma_http_max_keepalive_connections=settings.http_max_keepalive_connections,
+    )
+
+
+async def close_http_clients() -> None:
+    """Close the shared clients (call on app / worker shutdown)."""
+    global _client, _async_client
+    with _lock:
+        client, async_client = _client, _async_client
+        _client = _async_client = None
+    if async_client is not None:
+        await async_client.aclose()
+    if client is not None:
+        client.close()
+    if client is not None or async_client is not None:
+        logger.info("http_clients_closed")
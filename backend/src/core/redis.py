@@ -58,3 +58,93 @@ ROADMAP_STATE_PREFIX = "roadmap:state:"
 def roadmap_state_key(session_id: str) -> str:
     """Return the Redis key that stores the latest progress state."""
     return f"{ROADMAP_STATE_PREFIX}{session_id}"
+
+
+ROADMAP_SECTIONS_PREFIX = "roadmap:sections:"
+
+
+def roadmap_sections_key(session_id: str) -> str:
+    """Return the Redis key listing sections streamed so far (catch-up)."""
+    return f"{ROADMAP_SECTIONS_PREFIX}{session_id}"
+
+
+# ---------------------------------------------------------------------------
+# Stage checkpoint helpers (for resuming interrupted generations)
+# ---------------------------------------------------------------------------
+ROADMAP_CHECKPOINT_PREFIX = "roadmap:checkpoint:"
+
+
+def roadmap_checkpoint_key(session_id: str, stage: str, fingerprint: str) -> str:
+    """Return the Redis key holding a stage's outputs for given inputs."""
+    return f"{ROADMAP_CHECKPOINT_PREFIX}{session_id}:{stage}:{fingerprint}"
+
+
+# ---------------------------------------------------------------------------
+# Roadmap cache helpers (content-addressed by chat_data fingerprint)
+# ---------------------------------------------------------------------------
+ROADMAP_CACHE_PREFIX = "roadmap:cache:"
+ROADMAP_CACHE_INDEX_KEY = "roadmap:cache-index"
+ROADMAP_CACHE_WRITTEN_KEY = "roadmap:cache-written"
+ROADMAP_CACHE_STATS_KEY = "roadmap:cache-stats"
+
+
+def roadmap_cache_key(fingerprint: str) -> str:
+    """Return the Redis key holding the cached roadmap for a fingerprint."""
+    return f"{ROADMAP_CACHE_PREFIX}{fingerprint}"
+
+
+# ---------------------------------------------------------------------------
+# Speculative stage results (computed while the questionnaire is running)
+# ---------------------------------------------------------------------------
+ROADMAP_SPECULATION_PREFIX = "roadmap:speculation:"
+
+
+def roadmap_speculation_key(session_id: str) -> str:
+    """Return the Redis key holding a session's speculative stage outputs."""
+    return f"{ROADMAP_SPECULATION_PREFIX}{session_id}"
+
+
+# ---------------------------------------------------------------------------
+# RAG collection version (bumped by ingest, watched by local vector indexes)
+# ---------------------------------------------------------------------------
+RAG_INGEST_VERSION_PREFIX = "rag:ingest-version:"
+
+
+def rag_ingest_version_key(collection: str) -> str:
+    """Return the Redis key holding the version of a Chroma collection."""
+    return f"{RAG_INGEST_VERSION_PREFIX}{collection}"
+
+
+# ---------------------------------------------------------------------------
+# Roadmap job queue (Redis Streams)
+# ---------------------------------------------------------------------------
+ROADMAP_JOBS_STREAM = "roadmap:jobs"
+ROADMAP_JOBS_DEAD_LETTER_STREAM = "roadmap:jobs:dead"
+ROADMAP_JOBS_GROUP = "roadmap-workers"
+
+
+# ---------------------------------------------------------------------------
+# Per-session generation lease and cancellation flag
+# ---------------------------------------------------------------------------
+ROADMAP_LEASE_PREFIX = "roadmap:lease:"
+ROADMAP_CANCEL_PREFIX = "roadmap:cancel:"
+
+
+def roadmap_lease_key(session_id: str) -> str:
+    """Return the Redis key held by the run currently generating a roadmap."""
+    return f"{ROADMAP_LEASE_PREFIX}{session_id}"
+
+
+def roadmap_cancel_key(session_id: str) -> str:
+    """Return the Redis key that asks the running generation to stop."""
+    return f"{ROADMAP_CANCEL_PREFIX}{session_id}"
+
+
+# ---------------------------------------------------------------------------
+# Cluster-wide admission control
+# ---------------------------------------------------------------------------
+ROADMAP_ADMISSION_QUEUE_KEY = "roadmap:admission:queue"
+ROADMAP_ADMISSION_WAITERS_KEY = "roadmap:admission:waiters"
+ROADMAP_ADMISSION_ACTIVE_KEY = "roadmap:admission:active"
+ROADMAP_ADMISSION_USERS_KEY = "roadmap:admission:users"
+ROADMAP_ADMISSION_SEQ_KEY = "roadmap:admission:seq"
@@ -0,0 +1,390 @@
+"""Lightweight hierarchical tracing.
+
+Spans nest through a ``ContextVar`` so a route, the roadmap stages it
+starts, their LLM turns and tool calls, Redis publishes and database
+calls form one tree.  Every span inherits ``session.id`` from its parent,
+so a whole chat / roadmap session can be pulled out of the collector.
+
+Finished spans are buffered and exported from a background thread, so
+ending a span never blocks the event loop:
+
+* ``TRACING_EXPORTER=file`` — JSON lines in ``TRACING_FILE_PATH``
+* ``TRACING_EXPORTER=otlp`` — OTLP/HTTP JSON to ``TRACING_OTLP_ENDPOINT``
+  (Jaeger, Tempo, the OpenTelemetry Collector, ...)
+* ``TRACING_EXPORTER=off`` (default) — spans are not recorded
+
+Usage::
+
+    with span("stage.planner", **{"session.id": session_id}):
+        ...
+
+    @traced("db.ChatService.get_chat_by_id")
+    async def get_chat_by_id(...): ...
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol, TypeVar
+
+import httpx
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+SESSION_ATTRIBUTE = "session.id"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def end(self, end_ns: int | None = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        processor = _get_processor()
+        if processor is not None:
+            processor.on_end(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return settings.tracing_exporter != "off"
+
+
+def current_span() -> Span | None:
+    """Return the innermost active span, if any."""
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Span | None = None, **attributes: Any) -> Span:
+    """Create a span under ``parent`` (default: the current span).
+
+    The caller must call :meth:`Span.end`.  Use :func:`span` instead
+    unless start and end happen in different callbacks.
+    """
+    parent = parent if parent is not None else _current_span.get()
+    inherited = {}
+    if parent is not None and SESSION_ATTRIBUTE in parent.attributes:
+        inherited[SESSION_ATTRIBUTE] = parent.attributes[SESSION_ATTRIBUTE]
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        attributes={**inherited, **attributes},
+    )
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Trace the enclosed block as a child of the current span.
+
+    Yields ``None`` when tracing is off so call sites can guard
+    attribute updates with ``if s:``.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate an async function so each call is traced as ``name``."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class FileSpanExporter:
+    """Append finished spans to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as fh:
+            for item in spans:
+                fh.write(json.dumps(item.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpSpanExporter:
+    """Send spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=5.0)
+
+    def _encode(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "poe"},
+                            "spans": [self._encode_span(item) for item in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _encode_span(item: Span) -> dict[str, Any]:
+        encoded = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in item.attributes.items()
+            ],
+            # 1 = OK, 2 = ERROR
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+        if item.parent_id:
+            encoded["parentSpanId"] = item.parent_id
+        return encoded
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.endpoint, json=self._encode(spans))
+        response.raise_for_status()
+
+
+# ---------------------------------------------------------------------------
+# Processor
+# ---------------------------------------------------------------------------
+
+
+class BatchSpanProcessor:
+    """Buffer finished spans and export them from a daemon thread."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        interval_seconds: float,
+        max_queue: int = 8192,
+        max_batch: int = 512,
+    ) -> None:
+        self.exporter = exporter
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self._queue: deque[Span] = deque(maxlen=max_queue)
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def on_end(self, item: Span) -> None:
+        # deque.append is thread-safe; the oldest spans drop when full
+        self._queue.append(item)
+        if len(self._queue) >= self.max_batch:
+            self._wake.set()
+
+    def _flush(self) -> None:
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.max_batch:
+                batch.append(self._queue.popleft())
+            try:
+                self.exporter.export(batch)
+            except Exception as exc:
+                logger.warning("span_export_failed", spans=len(batch), error=str(exc))
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            self._flush()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout)
+        self._flush()
+
+
+_processor: BatchSpanProcessor | None = None
+_processor_lock = threading.Lock()
+
+
+def _get_processor() -> BatchSpanProcessor | None:
+    global _processor
+    if not tracing_enabled():
+        return None
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                if settings.tracing_exporter == "file":
+                    exporter: SpanExporter = FileSpanExporter(
+                        settings.tracing_file_path
+                    )
+                elif settings.tracing_exporter == "otlp":
+                    exporter = OTLPHttpSpanExporter(
+                        settings.tracing_otlp_endpoint,
+                        settings.tracing_service_name,
+                    )
+                else:
+                    raise ValueError(
+                        f"Unknown tracing exporter: {settings.tracing_exporter}"
+                    )
+                _processor = BatchSpanProcessor(
+                    exporter,
+                    interval_seconds=settings.tracing_export_interval_seconds,
+                )
+    return _processor
+
+
+def shutdown_tracing() -> None:
+    """Export buffered spans and stop the exporter thread."""
+    global _processor
+    if _processor is not None:
+        _processor.shutdown()
+        _processor = None
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+
+
+class TracingMiddleware:
+    """Open a root span per HTTP request (WebSockets are not traced).
+
+    Parameters
+    ----------
+    app:
+        The wrapped ASGI application.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        response: dict[str, int] = {"status": 500, "bytes": 0}
+
+        async def _send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        with span(
+            f"{method} {scope['path']}",
+            **{"http.method": method, "http.target": scope["path"]},
+        ) as request_span:
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    request_span.name = f"{method} {route.path}"
+                    request_span.set_attribute("http.route", route.path)
+                session_id = scope.get("path_params", {}).get("session_id")
+                if session_id is not None:
+                    request_span.set_attribute(SESSION_ATTRIBUTE, str(session_id))
+                request_span.set_attribute("http.status_code", response["status"])
+                request_span.set_attribute("http.response_bytes", response["bytes"])
@@ -0,0 +1,530 @@
+"""LLM response cache shared by the chat chains and the engine agents.
+
+The cache plugs into LangChain's ``BaseCache`` hook; ``create_chat_model``
+in ``models.py`` is the one place that wires it to a model, so every
+call site's model consults it before calling OpenAI.  Caching is opt-in
+per call site through
+``LLM_CACHE_CALL_SITES``; :func:`get_llm_cache` returns ``None`` for any
+call site that is not listed, which leaves the model uncached.
+
+Lookups are exact first (prompt + model parameters).  With
+``LLM_CACHE_SEMANTIC_ENABLED`` a miss falls back to an embedding
+similarity search among prompts sent to the *same* model configuration,
+served when the cosine similarity reaches
+``LLM_CACHE_SIMILARITY_THRESHOLD``.
+
+Backends:
+
+* ``memory`` — per-process LRU bounded by ``LLM_CACHE_MAX_ENTRIES``
+* ``redis``  — shared across processes, entries expire by TTL
+
+Prompt vectors for the semantic lookup live next to the responses, one
+bucket per model configuration.  In Redis a bucket is a hash of vectors
+plus a sorted-set index scored by when each response expires; adding a
+vector drops entries whose response has expired and caps the bucket at
+``LLM_CACHE_MAX_ENTRIES``.  Lookups read only the live entries and
+decode each vector once per process.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping, Sequence
+from typing import Any, Protocol
+
+import numpy as np
+import redis
+import structlog
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_openai import OpenAIEmbeddings
+
+from ...config import settings
+from ...redis import get_redis
+
+logger = structlog.get_logger()
+
+LLM_CACHE_PREFIX = "llmcache:"
+
+# Decoded vectors kept per process, in multiples of the per-bucket cap
+_DECODED_BUCKETS = 4
+
+# Add a vector to a bucket (KEYS[1] hash, KEYS[2] expiry index), dropping
+# entries whose response expired and the oldest ones beyond the cap; the
+# bucket itself expires with its longest-lived entry.
+_ADD_VECTOR_SCRIPT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+local dropped = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[4])
+local excess = redis.call('ZCARD', KEYS[2]) - #dropped - tonumber(ARGV[5])
+if excess > 0 then
+    local oldest = redis.call(
+        'ZRANGEBYSCORE', KEYS[2], '(' .. ARGV[4], '+inf', 'LIMIT', 0, excess
+    )
+    for _, field in ipairs(oldest) do
+        table.insert(dropped, field)
+    end
+end
+if #dropped > 0 then
+    redis.call('HDEL', KEYS[1], unpack(dropped))
+    redis.call('ZREM', KEYS[2], unpack(dropped))
+end
+local last = redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')
+if #last > 0 then
+    redis.call('PEXPIREAT', KEYS[1], last[2])
+    redis.call('PEXPIREAT', KEYS[2], last[2])
+end
+return #dropped
+"""
+
+
+# ---------------------------------------------------------------------------
+# Storage backends
+# ---------------------------------------------------------------------------
+
+
+class CacheBackend(Protocol):
+    """Key/value storage plus per-bucket prompt vectors."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+    def vectors(self, bucket: str) -> Mapping[str, Sequence[float]]: ...
+
+    def add_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None: ...
+
+    async def aget(self, key: str) -> str | None: ...
+
+    async def aset(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+    async def avectors(self, bucket: str) -> Mapping[str, Sequence[float]]: ...
+
+    async def aadd_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None: ...
+
+    def clear(self, prefix: str) -> None: ...
+
+
+class InMemoryLRUBackend:
+    """Thread-safe, process-local LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._vectors: dict[str, OrderedDict[str, list[float]]] = defaultdict(
+            OrderedDict
+        )
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def vectors(self, bucket: str) -> dict[str, list[float]]:
+        with self._lock:
+            bucket_vectors = self._vectors.get(bucket, {})
+            # Skip vectors whose cached response has been evicted
+            return {k: v for k, v in bucket_vectors.items() if k in self._entries}
+
+    def add_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None:
+        with self._lock:
+            bucket_vectors = self._vectors[bucket]
+            bucket_vectors[key] = vector
+            while len(bucket_vectors) > self.max_entries:
+                bucket_vectors.popitem(last=False)
+
+    async def aget(self, key: str) -> str | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str, ttl_seconds: int) -> None:
+        self.set(key, value, ttl_seconds)
+
+    async def avectors(self, bucket: str) -> dict[str, list[float]]:
+        return self.vectors(bucket)
+
+    async def aadd_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None:
+        self.add_vector(bucket, key, vector, ttl_seconds)
+
+    def clear(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+            for bucket in [b for b in self._vectors if b.startswith(prefix)]:
+                del self._vectors[bucket]
+
+
+class RedisBackend:
+    """Redis-backed storage shared by every API process and worker.
+
+    LangChain calls the synchronous hooks from ``invoke`` and the async
+    ones from ``ainvoke``, so both a sync and an async client are kept.
+
+    Parameters
+    ----------
+    max_vectors:
+        Cap on the prompt vectors kept per bucket (default
+        ``LLM_CACHE_MAX_ENTRIES``).
+    """
+
+    def __init__(self, max_vectors: int | None = None) -> None:
+        self._sync: redis.Redis | None = None
+        self.max_vectors = max_vectors or settings.llm_cache_max_entries
+        # Vectors never change once written, so each is decoded only once
+        self._decoded_lock = threading.Lock()
+        self._decoded: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    @property
+    def sync_client(self) -> redis.Redis:
+        if self._sync is None:
+            self._sync = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        return self._sync
+
+    @staticmethod
+    def _index(bucket: str) -> str:
+        return f"{bucket}:index"
+
+    def _decode(
+        self, live: list[str], fetch: list[str], raw: list[str | None]
+    ) -> dict[str, np.ndarray]:
+        with self._decoded_lock:
+            for key, vector in zip(fetch, raw):
+                if vector is not None:
+                    self._decoded[key] = np.asarray(json.loads(vector), np.float32)
+            found = {}
+            for key in live:
+                if key in self._decoded:
+                    self._decoded.move_to_end(key)
+                    found[key] = self._decoded[key]
+            while len(self._decoded) > self.max_vectors * _DECODED_BUCKETS:
+                self._decoded.popitem(last=False)
+        return found
+
+    def _undecoded(self, live: list[str]) -> list[str]:
+        with self._decoded_lock:
+            return [key for key in live if key not in self._decoded]
+
+    def _add_vector_args(
+        self, key: str, vector: list[float], ttl_seconds: int
+    ) -> tuple[Any, ...]:
+        now_ms = int(time.time() * 1000)
+        return (
+            key,
+            json.dumps(vector),
+            now_ms + ttl_seconds * 1000,
+            now_ms,
+            self.max_vectors,
+        )
+
+    def get(self, key: str) -> str | None:
+        return self.sync_client.get(key)
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self.sync_client.set(key, value, ex=ttl_seconds)
+
+    def vectors(self, bucket: str) -> dict[str, np.ndarray]:
+        now_ms = int(time.time() * 1000)
+        live = self.sync_client.zrangebyscore(self._index(bucket), f"({now_ms}", "+inf")
+        fetch = self._undecoded(live)
+        raw = self.sync_client.hmget(bucket, fetch) if fetch else []
+        return self._decode(live, fetch, raw)
+
+    def add_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None:
+        self.sync_client.eval(
+            _ADD_VECTOR_SCRIPT,
+            2,
+            bucket,
+            self._index(bucket),
+            *self._add_vector_args(key, vector, ttl_seconds),
+        )
+
+    async def aget(self, key: str) -> str | None:
+        return await get_redis().get(key)
+
+    async def aset(self, key: str, value: str, ttl_seconds: int) -> None:
+        await get_redis().set(key, value, ex=ttl_seconds)
+
+    async def avectors(self, bucket: str) -> dict[str, np.ndarray]:
+        client = get_redis()
+        now_ms = int(time.time() * 1000)
+        live = await client.zrangebyscore(self._index(bucket), f"({now_ms}", "+inf")
+        fetch = self._undecoded(live)
+        raw = await client.hmget(bucket, fetch) if fetch else []
+        return self._decode(live, fetch, raw)
+
+    async def aadd_vector(
+        self, bucket: str, key: str, vector: list[float], ttl_seconds: int
+    ) -> None:
+        await get_redis().eval(
+            _ADD_VECTOR_SCRIPT,
+            2,
+            bucket,
+            self._index(bucket),
+            *self._add_vector_args(key, vector, ttl_seconds),
+        )
+
+    def clear(self, prefix: str) -> None:
+        keys = list(self.sync_client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self.sync_client.delete(*keys)
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _prompt_text(prompt: str) -> str:
+    """Extract the message contents from a serialised chat prompt.
+
+    Chat models pass ``dumps(messages)``; embedding the contents rather
+    than the serialisation envelope keeps similarity meaningful.
+    """
+    try:
+        messages = json.loads(prompt)
+    except (json.JSONDecodeError, TypeError):
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    contents = []
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        content = message.get("kwargs", {}).get("content")
+        if isinstance(content, str):
+            contents.append(content)
+    return "\n".join(contents) or prompt
+
+
+def _matches(
+    query: list[float], candidates: Mapping[str, Sequence[float]], threshold: float
+) -> list[tuple[str, float]]:
+    """Candidates at or above ``threshold`` similarity, best first."""
+    if not candidates:
+        return []
+    keys = list(candidates)
+    matrix = np.asarray([candidates[k] for k in keys], dtype=np.float32)
+    vector = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    scores = matrix @ vector / np.where(norms == 0, 1.0, norms)
+    order = np.argsort(-scores)
+    return [(keys[i], float(scores[i])) for i in order if scores[i] >= threshold]
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache for one call site (exact + optional semantic)."""
+
+    def __init__(
+        self,
+        call_site: str,
+        backend: CacheBackend,
+        *,
+        ttl_seconds: int,
+        semantic: bool = False,
+        similarity_threshold: float = 0.95,
+        embeddings: OpenAIEmbeddings | None = None,
+    ) -> None:
+        self.call_site = call_site
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self._embeddings = embeddings
+        self.prefix = f"{LLM_CACHE_PREFIX}{call_site}:"
+        self.stats: dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                api_key=settings.openai_api_key,
+            )
+        return self._embeddings
+
+    # -- Keys / (de)serialisation -----------------------------------------
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return f"{self.prefix}{_hash(llm_string)}:{_hash(prompt)}"
+
+    def _bucket(self, llm_string: str) -> str:
+        return f"{self.prefix}vectors:{_hash(llm_string)}"
+
+    @staticmethod
+    def _dumps(return_val: RETURN_VAL_TYPE) -> str:
+        return json.dumps([dumps(generation) for generation in return_val])
+
+    @staticmethod
+    def _loads(raw: str) -> RETURN_VAL_TYPE:
+        generations = [loads(generation) for generation in json.loads(raw)]
+        for generation in generations:
+            # A cache hit consumes no tokens; keep usage accounting honest
+            message = getattr(generation, "message", None)
+            if message is not None and getattr(message, "usage_metadata", None):
+                message.usage_metadata = None
+        return generations
+
+    def _record(self, outcome: str, score: float | None = None) -> None:
+        self.stats[outcome] += 1
+        lookups = sum(self.stats.values())
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        logger.debug(
+            "llm_cache_lookup",
+            call_site=self.call_site,
+            outcome=outcome,
+            similarity=score,
+            hit_rate=round(hits / lookups, 3),
+        )
+
+    # -- Sync API -----------------------------------------------------------
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        raw = self.backend.get(self._key(prompt, llm_string))
+        if raw is not None:
+            self._record("exact_hits")
+            return self._loads(raw)
+
+        if self.semantic:
+            vector = self.embeddings.embed_query(_prompt_text(prompt))
+            candidates = self.backend.vectors(self._bucket(llm_string))
+            for key, score in _matches(vector, candidates, self.similarity_threshold):
+                # The response may have gone before its vector; try the next
+                raw = self.backend.get(key)
+                if raw is not None:
+                    self._record("semantic_hits", score)
+                    return self._loads(raw)
+
+        self._record("misses")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        self.backend.set(key, self._dumps(return_val), self.ttl_seconds)
+        if self.semantic:
+            vector = self.embeddings.embed_query(_prompt_text(prompt))
+            self.backend.add_vector(
+                self._bucket(llm_string), key, vector, self.ttl_seconds
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear(self.prefix)
+
+    # -- Async API ----------------------------------------------------------
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        raw = await self.backend.aget(self._key(prompt, llm_string))
+        if raw is not None:
+            self._record("exact_hits")
+            return self._loads(raw)
+
+        if self.semantic:
+            vector = await self.embeddings.aembed_query(_prompt_text(prompt))
+            candidates = await self.backend.avectors(self._bucket(llm_string))
+            for key, score in _matches(vector, candidates, self.similarity_threshold):
+                raw = await self.backend.aget(key)
+                if raw is not None:
+                    self._record("semantic_hits", score)
+                    return self._loads(raw)
+
+        self._record("misses")
+        return None
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        key = self._key(prompt, llm_string)
+        await self.backend.aset(key, self._dumps(return_val), self.ttl_seconds)
+        if self.semantic:
+            vector = await self.embeddings.aembed_query(_prompt_text(prompt))
+            await self.backend.aadd_vector(
+                self._bucket(llm_string), key, vector, self.ttl_seconds
+            )
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+_backend: CacheBackend | None = None
+_caches: dict[str, LLMResponseCache] = {}
+_lock = threading.Lock()
+
+
+def _get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        if settings.llm_cache_backend == "redis":
+            _backend = RedisBackend()
+        elif settings.llm_cache_backend == "memory":
+            _backend = InMemoryLRUBackend(settings.llm_cache_max_entries)
+        else:
+            raise ValueError(f"Unknown LLM cache backend: {settings.llm_cache_backend}")
+    return _backend
+
+
+def get_llm_cache(call_site: str) -> LLMResponseCache | None:
+    """Return the cache for ``call_site``, or ``None`` if it hasn't opted in."""
+    if call_site not in settings.llm_cache_call_sites_list:
+        return None
+    with _lock:
+        cache = _caches.get(call_site)
+        if cache is None:
+            cache = LLMResponseCache(
+                call_site,
+                _get_backend(),
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                semantic=settings.llm_cache_semantic_enabled,
+                similarity_threshold=settings.llm_cache_similarity_threshold,
+            )
+            _caches[call_site] = cache
+    return cache
+
+
+def llm_cache_stats() -> dict[str, dict[str, Any]]:
+    """Return per-call-site hit / miss counters and hit rates."""
+    report: dict[str, dict[str, Any]] = {}
+    with _lock:
+        caches = list(_caches.items())
+    for call_site, cache in caches:
+        lookups = sum(cache.stats.values())
+        hits = cache.stats["exact_hits"] + cache.stats["semantic_hits"]
+        report[call_site] = {
+            **cache.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+    return report
@@ -0,0 +1,375 @@
+"""Record / replay of LLM and tool calls for offline benchmarking.
+
+With ``CASSETTE_MODE=record`` every LLM completion and every tool result
+(``search``, ``search_company_policies``) is written to the cassette file
+at ``CASSETTE_PATH`` together with how long it took.  With
+``CASSETTE_MODE=replay`` the same calls are served from the file instead
+of OpenAI / DuckDuckGo / Chroma, so ``curate_roadmap`` can be profiled —
+orchestration, serialisation, Redis — on a machine with no network.
+
+Replay latency (``CASSETTE_LATENCY``):
+
+* ``none``      — respond immediately
+* ``recorded``  — sleep for the recorded duration of each call
+* ``synthetic`` — sleep ``CASSETTE_SYNTHETIC_LATENCY_MS`` for every call
+
+LLM calls are matched on the prompt (message IDs and response metadata
+ignored) and the model parameters; if the parameters changed since
+recording, a response recorded for the same prompt is used and a
+warning logged.  Identical calls are served in recording order.  A call
+that was never recorded raises :class:`CassetteMissError`.
+
+The LLM side plugs into LangChain's cache hook, so a replayed completion
+arrives in one piece: the roadmap creator's sections are not streamed
+section by section during replay.
+
+A cassette is a JSON lines file: a header carrying the format
+``version``, then one line per recorded call, appended as the call
+completes.  Recording therefore costs the same per call however long the
+session, and a crashed recording keeps what it got.  Files of another
+version are rejected and have to be recorded again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TextIO
+
+import structlog
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from ...config import settings
+
+logger = structlog.get_logger()
+
+CASSETTE_VERSION = 2
+
+# Serialised message fields that differ between otherwise identical runs
+_VOLATILE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a call the cassette has no recording of."""
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+
+def _prompt_key(prompt: str) -> str:
+    """Hash a serialised chat prompt, ignoring per-run message fields."""
+    try:
+        messages = json.loads(prompt)
+    except (json.JSONDecodeError, TypeError):
+        return _hash(prompt)
+    if isinstance(messages, list):
+        for message in messages:
+            kwargs = message.get("kwargs") if isinstance(message, dict) else None
+            if isinstance(kwargs, dict):
+                for field in _VOLATILE_FIELDS:
+                    kwargs.pop(field, None)
+    return _hash(json.dumps(messages, sort_keys=True))
+
+
+class Cassette:
+    """One cassette file, in ``record`` or ``replay`` mode.
+
+    Parameters
+    ----------
+    path:
+        Location of the cassette file.
+    mode:
+        ``record`` starts an empty cassette (overwriting ``path``) and
+        keeps it open until :meth:`close`; ``replay`` loads ``path``.
+    latency:
+        Replay latency mode: ``none``, ``recorded`` or ``synthetic``.
+    synthetic_latency_ms:
+        Per-call delay used with ``latency="synthetic"``.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str,
+        *,
+        latency: str = "none",
+        synthetic_latency_ms: float = 0.0,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if latency not in ("none", "recorded", "synthetic"):
+            raise ValueError(f"Unknown cassette latency mode: {latency}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.synthetic_latency_ms = synthetic_latency_ms
+        self._lock = threading.Lock()
+        self._served: Counter[str] = Counter()
+        self._started: dict[str, deque[float]] = defaultdict(deque)
+        self._file: TextIO | None = None
+        self.data: dict[str, dict[str, list[dict[str, Any]]]] = {
+            "llm": {},
+            "tools": {},
+        }
+
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", encoding="utf-8")
+            self._write(
+                {
+                    "version": CASSETTE_VERSION,
+                    "recorded_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+
+    # -- Storage ------------------------------------------------------------
+
+    def _next(self, section: str, key: str) -> dict[str, Any] | None:
+        entries = self.data[section].get(key)
+        if not entries:
+            return None
+        with self._lock:
+            index = self._served[f"{section}:{key}"]
+            self._served[f"{section}:{key}"] += 1
+        # Past the recorded calls, keep serving the last one
+        return entries[min(index, len(entries) - 1)]
+
+    def _load(self) -> None:
+        with self.path.open(encoding="utf-8") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(
+                    f"Cassette {self.path} has version {header.get('version')}, "
+                    f"expected {CASSETTE_VERSION}; record it again"
+                )
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    entries = self.data[record["section"]]
+                    entries.setdefault(record["key"], []).append(record["entry"])
+
+    def _write(self, record: dict[str, Any]) -> None:
+        # One short append per call; flushed so a crash keeps what it got
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _append(self, section: str, key: str, entry: dict[str, Any]) -> None:
+        record = {"section": section, "key": key, "entry": entry}
+        with self._lock:
+            if self._file is not None:
+                self._write(record)
+
+    def close(self) -> None:
+        """Close the file of a recording cassette."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def delay(self, entry: dict[str, Any]) -> float:
+        """Seconds to wait before serving ``entry`` in replay mode."""
+        if self.latency == "recorded":
+            return entry.get("latency_ms", 0) / 1000
+        if self.latency == "synthetic":
+            return self.synthetic_latency_ms / 1000
+        return 0.0
+
+    # -- LLM ----------------------------------------------------------------
+
+    def replay_llm(self, prompt: str, llm_string: str) -> dict[str, Any]:
+        key = _prompt_key(prompt)
+        entry = self._next("llm", f"{_hash(llm_string)}:{key}")
+        if entry is None:
+            # Same prompt recorded with other model parameters?
+            matches = [k for k in self.data["llm"] if k.endswith(f":{key}")]
+            if not matches:
+                raise CassetteMissError(
+                    f"No recorded LLM response for prompt {key} in {self.path}"
+                )
+            logger.warning("cassette_llm_params_differ", prompt=key)
+            entry = self._next("llm", matches[0])
+        return entry
+
+    def start_llm(self, prompt: str, llm_string: str) -> None:
+        key = f"{_hash(llm_string)}:{_prompt_key(prompt)}"
+        with self._lock:
+            self._started[key].append(time.monotonic())
+
+    def record_llm(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        key = f"{_hash(llm_string)}:{_prompt_key(prompt)}"
+        with self._lock:
+            started = self._started[key].popleft() if self._started[key] else None
+        latency_ms = (time.monotonic() - started) * 1000 if started else 0.0
+        self._append(
+            "llm",
+            key,
+            {
+                "generations": [dumps(generation) for generation in return_val],
+                "latency_ms": round(latency_ms, 1),
+            },
+        )
+
+    # -- Tools --------------------------------------------------------------
+
+    def _replay_tool(self, name: str, query: str) -> dict[str, Any]:
+        entry = self._next("tools", f"{name}:{_hash(query)}")
+        if entry is None:
+            raise CassetteMissError(
+                f"No recorded {name} result for query {query!r} in {self.path}"
+            )
+        return entry
+
+    def _record_tool(self, name: str, query: str, result: str, started: float) -> None:
+        self._append(
+            "tools",
+            f"{name}:{_hash(query)}",
+            {
+                "query": query,
+                "result": result,
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            },
+        )
+
+    def call_tool(self, name: str, query: str, run: Callable[[str], str]) -> str:
+        """Serve (replay) or run and store (record) one tool call."""
+        if self.mode == "replay":
+            entry = self._replay_tool(name, query)
+            time.sleep(self.delay(entry))
+            return entry["result"]
+
+        started = time.monotonic()
+        result = run(query)
+        self._record_tool(name, query, result, started)
+        return result
+
+    async def acall_tool(
+        self, name: str, query: str, run: Callable[[str], Awaitable[str]]
+    ) -> str:
+        """Async :meth:`call_tool`."""
+        if self.mode == "replay":
+            entry = self._replay_tool(name, query)
+            await asyncio.sleep(self.delay(entry))
+            return entry["result"]
+
+        started = time.monotonic()
+        result = await run(query)
+        self._record_tool(name, query, result, started)
+        return result
+
+
+class CassetteLLMCache(BaseCache):
+    """LangChain cache that records to / replays from a :class:`Cassette`."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    def _replay(self, prompt: str, llm_string: str) -> tuple[RETURN_VAL_TYPE, float]:
+        entry = self.cassette.replay_llm(prompt, llm_string)
+        generations = [loads(generation) for generation in entry["generations"]]
+        return generations, self.cassette.delay(entry)
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        if self.cassette.mode == "record":
+            self.cassette.start_llm(prompt, llm_string)
+            return None
+        generations, delay = self._replay(prompt, llm_string)
+        time.sleep(delay)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.cassette.mode == "record":
+            self.cassette.record_llm(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        pass
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        if self.cassette.mode == "record":
+            self.cassette.start_llm(prompt, llm_string)
+            return None
+        generations, delay = self._replay(prompt, llm_string)
+        await asyncio.sleep(delay)
+        return generations
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Process-wide cassette
+# ---------------------------------------------------------------------------
+
+_cassette: Cassette | None = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette | None:
+    """Return the cassette configured by ``CASSETTE_*``, or ``None`` if off."""
+    global _cassette
+    if settings.cassette_mode == "off":
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(
+                settings.cassette_path,
+                settings.cassette_mode,
+                latency=settings.cassette_latency,
+                synthetic_latency_ms=settings.cassette_synthetic_latency_ms,
+            )
+            logger.info(
+                "cassette_opened",
+                mode=settings.cassette_mode,
+                path=settings.cassette_path,
+                latency=settings.cassette_latency,
+            )
+    return _cassette
+
+
+def close_cassette() -> None:
+    """Close the process-wide cassette (call on shutdown)."""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+            _cassette = None
+
+
+def get_cassette_llm_cache() -> CassetteLLMCache | None:
+    cassette = get_cassette()
+    return CassetteLLMCache(cassette) if cassette is not None else None
+
+
+def call_tool(name: str, query: str, run: Callable[[str], str]) -> str:
+    """Run tool ``name`` through the cassette when one is active."""
+    cassette = get_cassette()
+    if cassette is None:
+        return run(query)
+    return cassette.call_tool(name, query, run)
+
+
+async def acall_tool(
+    name: str, query: str, run: Callable[[str], Awaitable[str]]
+) -> str:
+    """Async :func:`call_tool`."""
+    cassette = get_cassette()
+    if cassette is None:
+        return await run(query)
+    return await cassette.acall_tool(name, query, run)
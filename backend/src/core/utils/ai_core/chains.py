@@ -2,7 +2,8 @@ from typing import Any, Dict, List, Optional, Type
 
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+
+from .models import create_chat_model
 
 
 class PydancticLLMChain:
@@ -11,11 +12,14 @@ class PydancticLLMChain:
         pydantic_model: Type,
         prompt_template: str,
         input_variables: List[Dict[str, Any]],
-        model_name: str = "gpt-4o-mini",
-        temperature: float = 0.7,
-        api_key: Optional[str] = None,
+        call_site: str,
         partial_variables: Optional[Dict[str, Any]] = None,
     ) -> None:
+        """Build ``prompt | model | parser``.
+
+        The model, including its LLM cache, comes from ``call_site``'s
+        configuration (see ``models.py``).
+        """
         self.parser = JsonOutputParser(
             pydantic_object=pydantic_model,
         )
@@ -25,12 +29,7 @@ class PydancticLLMChain:
             partial_variables=partial_variables
             or {"format_instructions": self.parser.get_format_instructions()},
         )
-        self.model = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            api_key=api_key,
-            max_retries=3,
-        )
+        self.model = create_chat_model(call_site, max_retries=3)
         self.chain = self.prompt | self.model | self.parser
 
     def run(self, variables: Dict[str, Any]) -> Any:
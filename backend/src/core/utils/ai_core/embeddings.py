@@ -0,0 +1,225 @@
+"""Query-embedding cache in front of ``OpenAIEmbeddings``.
+
+Policy searches embed short natural-language queries, and the policy
+researcher tends to ask the same or near-identical questions across
+runs.  :class:`CachedEmbeddings` keeps the vectors in two tiers:
+
+* a per-process LRU (``EMBEDDING_CACHE_MAX_ENTRIES``), checked first
+* Redis, shared by every API process and worker, entries expiring after
+  ``EMBEDDING_CACHE_TTL_SECONDS`` (``EMBEDDING_CACHE_REDIS=false`` turns
+  this tier off)
+
+Keys are the embedding model plus the normalised query (Unicode NFKC,
+case-folded, whitespace collapsed), so the cache never mixes vectors of
+different models.  A Redis error downgrades to the LRU tier rather than
+failing the search.
+
+Document embeddings (ingest) are not cached; they pass straight through.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+
+import redis
+import structlog
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from ...config import settings
+from ...http import get_async_http_client, get_http_client
+from ...redis import get_redis
+from .cache import InMemoryLRUBackend, RedisBackend
+
+logger = structlog.get_logger()
+
+EMBEDDING_CACHE_PREFIX = "embcache:"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Return the form of ``query`` used as the cache key."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap ``embeddings`` with a memory + Redis cache for query vectors.
+
+    Parameters
+    ----------
+    embeddings:
+        The embedding model doing the actual work.
+    model:
+        Model name used in cache keys.
+    memory:
+        First-tier, per-process cache.
+    shared:
+        Optional second-tier cache shared across processes.
+    ttl_seconds:
+        Expiry of cached vectors in both tiers.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        *,
+        memory: InMemoryLRUBackend,
+        shared: RedisBackend | None = None,
+        ttl_seconds: int,
+    ) -> None:
+        self.embeddings = embeddings
+        self.model = model
+        self.memory = memory
+        self.shared = shared
+        self.ttl_seconds = ttl_seconds
+        self.stats: dict[str, int] = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _key(self, query: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{EMBEDDING_CACHE_PREFIX}{self.model}:{digest}"
+
+    # -- Two-tier lookup ------------------------------------------------------
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        for key in keys:
+            raw = self.memory.get(key)
+            if raw is not None:
+                found[key] = json.loads(raw)
+                self.stats["memory_hits"] += 1
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            try:
+                values = self.shared.sync_client.mget(missing)
+            except redis.RedisError as exc:
+                logger.warning("embedding_cache_redis_failed", error=str(exc))
+                values = [None] * len(missing)
+            for key, raw in zip(missing, values):
+                if raw is not None:
+                    self.memory.set(key, raw, self.ttl_seconds)
+                    found[key] = json.loads(raw)
+                    self.stats["redis_hits"] += 1
+        return found
+
+    async def _alookup(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        for key in keys:
+            raw = self.memory.get(key)
+            if raw is not None:
+                found[key] = json.loads(raw)
+                self.stats["memory_hits"] += 1
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            try:
+                values = await get_redis().mget(missing)
+            except redis.RedisError as exc:
+                logger.warning("embedding_cache_redis_failed", error=str(exc))
+                values = [None] * len(missing)
+            for key, raw in zip(missing, values):
+                if raw is not None:
+                    self.memory.set(key, raw, self.ttl_seconds)
+                    found[key] = json.loads(raw)
+                    self.stats["redis_hits"] += 1
+        return found
+
+    def _store(self, vectors: dict[str, list[float]]) -> dict[str, str]:
+        serialised = {key: json.dumps(vector) for key, vector in vectors.items()}
+        for key, raw in serialised.items():
+            self.memory.set(key, raw, self.ttl_seconds)
+        return serialised
+
+    # -- Embeddings API ---------------------------------------------------------
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed ``queries``, sending every cache miss in one request."""
+        keys = [self._key(query) for query in queries]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        misses = {key: query for key, query in zip(keys, queries) if key not in found}
+        logger.debug(
+            "embedding_cache_lookup",
+            model=self.model,
+            queries=len(keys),
+            misses=len(misses),
+        )
+        if misses:
+            self.stats["misses"] += len(misses)
+            vectors = self.embeddings.embed_documents(list(misses.values()))
+            computed = dict(zip(misses, vectors))
+            serialised = self._store(computed)
+            if self.shared is not None:
+                try:
+                    pipe = self.shared.sync_client.pipeline(transaction=False)
+                    for key, raw in serialised.items():
+                        pipe.set(key, raw, ex=self.ttl_seconds)
+                    pipe.execute()
+                except redis.RedisError as exc:
+                    logger.warning("embedding_cache_redis_failed", error=str(exc))
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    async def aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Async :meth:`embed_queries`."""
+        keys = [self._key(query) for query in queries]
+        found = await self._alookup(list(dict.fromkeys(keys)))
+        misses = {key: query for key, query in zip(keys, queries) if key not in found}
+        logger.debug(
+            "embedding_cache_lookup",
+            model=self.model,
+            queries=len(keys),
+            misses=len(misses),
+        )
+        if misses:
+            self.stats["misses"] += len(misses)
+            vectors = await self.embeddings.aembed_documents(list(misses.values()))
+            computed = dict(zip(misses, vectors))
+            serialised = self._store(computed)
+            if self.shared is not None:
+                try:
+                    async with get_redis().pipeline(transaction=False) as pipe:
+                        for key, raw in serialised.items():
+                            pipe.set(key, raw, ex=self.ttl_seconds)
+                        await pipe.execute()
+                except redis.RedisError as exc:
+                    logger.warning("embedding_cache_redis_failed", error=str(exc))
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_queries([text]))[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+
+def create_query_embeddings(model: str = "text-embedding-3-small") -> Embeddings:
+    """Return OpenAI embeddings for ``model``, cached unless disabled.
+
+    Requests go through the shared HTTP pool (``core/http.py``).
+    """
+    embeddings = OpenAIEmbeddings(
+        model=model,
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+    if not settings.embedding_cache_enabled:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        model,
+        memory=InMemoryLRUBackend(settings.embedding_cache_max_entries),
+        shared=RedisBackend() if settings.embedding_cache_redis else None,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+    )
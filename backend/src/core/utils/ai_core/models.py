@@ -0,0 +1,105 @@
+"""Per-call-site model configuration.
+
+Every place that talks to an LLM is a named call site.  Each one reads
+its own model, temperature, max tokens and timeout from settings
+(``<SITE>_MODEL``, ``<SITE>_TEMPERATURE``, ``<SITE>_MAX_TOKENS``,
+``<SITE>_TIMEOUT_SECONDS``), so a cheap, fast model can serve the light
+steps (titles, planning) while the roadmap creator keeps a stronger one.
+Switching a call site is a configuration change only.
+
+Token usage, cost and latency of every call are aggregated per call site
+(see :func:`~.usage.call_site_stats`) for comparing configurations, and
+logged on shutdown.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+from langchain_openai import ChatOpenAI
+
+from ...config import settings
+from .cache import get_llm_cache
+from .cassette import get_cassette_llm_cache
+from .tracing import LLMTracingCallbackHandler
+from .usage import UsageCallbackHandler, call_site_stats, usage_totals
+
+logger = structlog.get_logger()
+
+CALL_SITES = (
+    "chat_title",
+    "clarifying_question",
+    "planner",
+    "policy_researcher",
+    "researcher",
+    "roadmap_creator",
+)
+
+# Engine agents share the legacy "engine" label in LLM_CACHE_CALL_SITES
+ENGINE_CALL_SITES = ("planner", "policy_researcher", "researcher", "roadmap_creator")
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    model: str
+    temperature: float
+    max_tokens: int | None = None
+    timeout_seconds: float | None = None
+
+
+def model_config(call_site: str) -> ModelConfig:
+    """Return the configured model parameters for ``call_site``.
+
+    Raises
+    ------
+    ValueError
+        If ``call_site`` is not one of :data:`CALL_SITES`.
+    """
+    if call_site not in CALL_SITES:
+        raise ValueError(f"Unknown LLM call site: {call_site}")
+    return ModelConfig(
+        model=getattr(settings, f"{call_site}_model") or settings.openai_model_name,
+        temperature=getattr(settings, f"{call_site}_temperature"),
+        max_tokens=getattr(settings, f"{call_site}_max_tokens"),
+        timeout_seconds=getattr(settings, f"{call_site}_timeout_seconds"),
+    )
+
+
+def create_chat_model(call_site: str, **kwargs: Any) -> ChatOpenAI:
+    """Build the chat model for ``call_site`` from its configuration.
+
+    The model is wired to the response cache (when the call site opted
+    in) or the record / replay cassette, and to the usage and tracing
+    callbacks.  ``kwargs`` are passed to
+    ``ChatOpenAI`` (e.g. ``max_retries``).
+    """
+    config = model_config(call_site)
+    # A record / replay cassette takes the place of the response cache
+    cache = get_cassette_llm_cache() or get_llm_cache(call_site)
+    if cache is None and call_site in ENGINE_CALL_SITES:
+        cache = get_llm_cache("engine")
+    return ChatOpenAI(
+        model=config.model,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        timeout=config.timeout_seconds,
+        api_key=settings.openai_api_key,
+        cache=cache,
+        callbacks=[
+            UsageCallbackHandler(call_site),
+            LLMTracingCallbackHandler(call_site),
+        ],
+        **kwargs,
+    )
+
+
+def log_call_site_stats() -> None:
+    """Log usage, cost and latency per call site and stage (call on shutdown)."""
+    stats = call_site_stats()
+    if stats:
+        logger.info("llm_call_site_stats", call_sites=stats)
+    stages = usage_totals()
+    if stages:
+        logger.info("llm_stage_usage", stages=stages)
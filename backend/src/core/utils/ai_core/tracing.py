@@ -0,0 +1,98 @@
+"""Trace spans for LLM calls.
+
+:class:`LLMTracingCallbackHandler` opens a span when a chat model starts
+and closes it when the completion (or error) arrives, recording the
+model, token counts, estimated cost and payload sizes.  The span is a
+child of whatever span is current when the call starts — usually a
+pipeline stage or an HTTP request.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from ...tracing import Span, start_span, tracing_enabled
+from .usage import current_stage, usage_from_result
+
+
+class LLMTracingCallbackHandler(BaseCallbackHandler):
+    """Record one span per LLM call.
+
+    Parameters
+    ----------
+    call_site:
+        Label used in the span name when no pipeline stage is active.
+    """
+
+    # Run in the caller's context so the parent span is the current one
+    run_inline = True
+
+    def __init__(self, call_site: str) -> None:
+        self.call_site = call_site
+        self._spans: dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, prompt_chars: int, messages: int) -> None:
+        if not tracing_enabled():
+            return
+        label = current_stage() or self.call_site
+        self._spans[run_id] = start_span(
+            f"llm.{label}",
+            **{
+                "llm.call_site": self.call_site,
+                "llm.prompt_chars": prompt_chars,
+                "llm.messages": messages,
+            },
+        )
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        batch = [message for prompt in messages for message in prompt]
+        prompt_chars = sum(len(str(message.content)) for message in batch)
+        self._start(run_id, prompt_chars, len(batch))
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, sum(len(prompt) for prompt in prompts), len(prompts))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        model, usage = usage_from_result(response)
+        completion_chars = sum(
+            len(generation.text)
+            for generations in response.generations
+            for generation in generations
+        )
+        span.set_attribute("llm.model", model or None)
+        span.set_attribute("llm.prompt_tokens", usage.prompt_tokens)
+        span.set_attribute("llm.completion_tokens", usage.completion_tokens)
+        span.set_attribute("llm.cached_tokens", usage.cached_tokens)
+        span.set_attribute("llm.cost_usd", round(usage.cost_usd, 6))
+        span.set_attribute("llm.completion_chars", completion_chars)
+        span.end()
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.error = f"{type(error).__name__}: {error}"
+            span.end()
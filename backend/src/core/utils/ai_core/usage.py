@@ -0,0 +1,288 @@
+"""Per-stage LLM token and cost accounting.
+
+A :class:`UsageCallbackHandler` is attached to every chat model (the
+engine ``llm`` and each ``PydancticLLMChain``).  On each completion it
+records prompt, completion and cached-prompt tokens into the
+:class:`UsageTracker` bound to the current context by
+:func:`track_usage`, grouped by the current stage (set with
+:func:`usage_stage`, or the handler's own call-site label).
+
+Nothing is written to the database per call: the owner of the tracker
+(a chat request or a pipeline run) flushes it once at the end through
+``ChatService.add_token_usage``.  Process-wide aggregates are available
+from :func:`usage_totals` (per stage) and :func:`call_site_stats` (per
+call site and model, including latency), both logged on shutdown; per-user
+totals come from ``python -m src.chat.usage_report``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICING_PER_MTOK: dict[str, tuple[float, float, float]] = {
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4": (30.00, 30.00, 60.00),
+}
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> float:
+    """Return the USD cost of a call, or 0.0 for models without pricing."""
+    # Longest prefix wins so "gpt-4o-mini-2024-07-18" maps to gpt-4o-mini
+    for name in sorted(MODEL_PRICING_PER_MTOK, key=len, reverse=True):
+        if model.startswith(name):
+            input_price, cached_price, output_price = MODEL_PRICING_PER_MTOK[name]
+            uncached = max(prompt_tokens - cached_tokens, 0)
+            return (
+                uncached * input_price
+                + cached_tokens * cached_price
+                + completion_tokens * output_price
+            ) / 1_000_000
+    return 0.0
+
+
+@dataclass
+class StageUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: StageUsage) -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cost_usd += other.cost_usd
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+@dataclass
+class UsageTracker:
+    """Token usage collected for one session during one request / run."""
+
+    session_id: str
+    stages: dict[str, StageUsage] = field(
+        default_factory=lambda: defaultdict(StageUsage)
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, stage: str, usage: StageUsage) -> None:
+        with self._lock:
+            self.stages[stage].add(usage)
+        _record_global(stage, usage)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(usage.total_tokens for usage in self.stages.values())
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(usage.cost_usd for usage in self.stages.values())
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {stage: usage.as_dict() for stage, usage in self.stages.items()}
+
+
+_current_tracker: ContextVar[UsageTracker | None] = ContextVar(
+    "usage_tracker", default=None
+)
+_current_stage: ContextVar[str | None] = ContextVar("usage_stage", default=None)
+
+
+@contextmanager
+def track_usage(session_id: str) -> Iterator[UsageTracker]:
+    """Collect LLM usage of everything run inside the block for a session."""
+    tracker = UsageTracker(session_id)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+@contextmanager
+def usage_stage(name: str) -> Iterator[None]:
+    """Attribute LLM usage inside the block to stage ``name``."""
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def current_stage() -> str | None:
+    """Return the stage label bound to the current context, if any."""
+    return _current_stage.get()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide aggregates
+# ---------------------------------------------------------------------------
+
+_totals: dict[str, StageUsage] = defaultdict(StageUsage)
+_totals_lock = threading.Lock()
+
+
+def _record_global(stage: str, usage: StageUsage) -> None:
+    with _totals_lock:
+        _totals[stage].add(usage)
+
+
+def usage_totals() -> dict[str, dict[str, Any]]:
+    """Return usage per stage accumulated since process start."""
+    with _totals_lock:
+        return {stage: usage.as_dict() for stage, usage in _totals.items()}
+
+
+@dataclass
+class CallSiteStats:
+    usage: StageUsage = field(default_factory=StageUsage)
+    latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        calls = self.usage.calls
+        return {
+            **self.usage.as_dict(),
+            "mean_latency_ms": (
+                round(1000 * self.latency_seconds / calls) if calls else 0
+            ),
+            "max_latency_ms": round(1000 * self.max_latency_seconds),
+            "cost_per_call_usd": (
+                round(self.usage.cost_usd / calls, 6) if calls else 0.0
+            ),
+        }
+
+
+_call_sites: dict[tuple[str, str], CallSiteStats] = defaultdict(CallSiteStats)
+
+
+def _record_call(call_site: str, model: str, usage: StageUsage, latency: float) -> None:
+    with _totals_lock:
+        stats = _call_sites[(call_site, model)]
+        stats.usage.add(usage)
+        stats.latency_seconds += latency
+        stats.max_latency_seconds = max(stats.max_latency_seconds, latency)
+
+
+def call_site_stats() -> dict[str, dict[str, Any]]:
+    """Return usage, cost and latency per ``call_site/model`` since start."""
+    with _totals_lock:
+        return {
+            f"{call_site}/{model or 'unknown'}": stats.as_dict()
+            for (call_site, model), stats in sorted(_call_sites.items())
+        }
+
+
+# ---------------------------------------------------------------------------
+# Callback
+# ---------------------------------------------------------------------------
+
+
+def usage_from_result(response: LLMResult) -> tuple[str, StageUsage]:
+    """Return ``(model_name, usage)`` reported by a single LLM call."""
+    usage = StageUsage(calls=1)
+    model = (response.llm_output or {}).get("model_name", "")
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None)
+            if not metadata:
+                continue
+            usage.prompt_tokens += metadata.get("input_tokens", 0)
+            usage.completion_tokens += metadata.get("output_tokens", 0)
+            details = metadata.get("input_token_details") or {}
+            usage.cached_tokens += details.get("cache_read", 0) or 0
+            model = model or message.response_metadata.get("model_name", "")
+
+    if not usage.total_tokens:
+        # Older integrations only report aggregate usage in llm_output
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        usage.prompt_tokens = token_usage.get("prompt_tokens", 0)
+        usage.completion_tokens = token_usage.get("completion_tokens", 0)
+
+    usage.cost_usd = estimate_cost(
+        model, usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens
+    )
+    return model, usage
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Record each completion's token usage into the current tracker.
+
+    Parameters
+    ----------
+    call_site:
+        Stage label used when no :func:`usage_stage` is active (e.g.
+        ``"chat_title"`` for the title chain).
+    """
+
+    # Run in the caller's context so the tracker / stage ContextVars apply
+    run_inline = True
+
+    def __init__(self, call_site: str) -> None:
+        self.call_site = call_site
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_start(
+        self, serialized: dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_end(
+        self, response: LLMResult, *, run_id: UUID | None = None, **kwargs: Any
+    ) -> None:
+        tracker = _current_tracker.get()
+        model, usage = usage_from_result(response)
+        stage = _current_stage.get() or self.call_site
+        if tracker is not None:
+            tracker.record(stage, usage)
+        else:
+            _record_global(stage, usage)
+
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            _record_call(self.call_site, model, usage, time.monotonic() - started)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID | None = None, **kwargs: Any
+    ) -> None:
+        self._started.pop(run_id, None)
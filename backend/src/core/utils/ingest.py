@@ -3,19 +3,32 @@
 Usage (from the backend directory):
     python -m src.core.utils.ingest              # defaults
     python -m src.core.utils.ingest --data-dir rag_data --reset
+    python -m src.core.utils.ingest --async --concurrency 8
 
 The script:
   1. Reads every *.md file in the data directory.
   2. Splits each file into overlapping chunks using section-aware markdown splitting.
-  3. Embeds the chunks with OpenAI embeddings.
-  4. Upserts them into the configured ChromaDB collection.
+  3. Connects to the configured ChromaDB collection.
+  4. Embeds the chunks with OpenAI embeddings.
+  5. Upserts them into the collection.
+  6. Builds the BM25 inverted index of the collection (hybrid search).
+  7. Bumps the collection's ingest version in Redis, so local vector
+     indexes (LOCAL_VECTOR_INDEX_ENABLED) reload it.
+
+With ``--async`` (default: ``CHROMA_ASYNC_ENABLED``) steps 3-5 use
+Chroma's async HTTP client and async embedding calls: chunks are embedded
+and upserted in batches of ``--batch-size``, up to ``--concurrency``
+batches in flight, so embedding one batch overlaps upserting another.
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
 import os
 import sys
+import time
+import uuid
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -23,6 +36,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import chromadb
+import redis
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import (
@@ -30,6 +44,11 @@ from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
 )
 
+from ..config import settings
+from ..http import chroma_client_settings, close_http_clients, get_async_http_client
+from ..redis import rag_ingest_version_key
+from .lexical_index import BM25Index, build_from_collection, index_path
+
 # ---------------------------------------------------------------------------
 # Defaults (overridable via CLI flags or env vars)
 # ---------------------------------------------------------------------------
@@ -39,6 +58,8 @@ DEFAULT_CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8100"))
 DEFAULT_COLLECTION = os.getenv("CHROMA_COLLECTION_NAME", "company_policies")
 DEFAULT_CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "1000"))
 DEFAULT_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "200"))
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 4
 
 
 def _resolve_data_dir(data_dir: str) -> Path:
@@ -127,20 +148,15 @@ def _split_documents(
     return all_docs
 
 
-def ingest(
-    data_dir: str = DEFAULT_DATA_DIR,
-    chroma_host: str = DEFAULT_CHROMA_HOST,
-    chroma_port: int = DEFAULT_CHROMA_PORT,
-    collection_name: str = DEFAULT_COLLECTION,
-    chunk_size: int = DEFAULT_CHUNK_SIZE,
-    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
-    reset: bool = False,
-) -> int:
-    """Run the full ingestion pipeline.
-
-    Returns the number of chunks ingested.
-    """
-
+def _prepare_documents(
+    data_dir: str,
+    chroma_host: str,
+    chroma_port: int,
+    collection_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> list:
+    """Steps 1-2: load and split the markdown files."""
     data_path = _resolve_data_dir(data_dir)
     print(f"[INFO] Data directory : {data_path}")
     print(f"[INFO] ChromaDB       : {chroma_host}:{chroma_port}")
@@ -158,10 +174,41 @@ def ingest(
 
     if not documents:
         print("[WARN] Nothing to ingest — exiting.")
+    return documents
+
+
+def _save_lexical_index(lexical: BM25Index, collection_name: str) -> None:
+    lexical_path = index_path(settings.lexical_index_dir, collection_name)
+    lexical.save(lexical_path)
+    print(
+        f"[OK] Lexical index: {len(lexical)} chunks, "
+        f"{len(lexical.terms)} terms -> {lexical_path}"
+    )
+
+
+def ingest(
+    data_dir: str = DEFAULT_DATA_DIR,
+    chroma_host: str = DEFAULT_CHROMA_HOST,
+    chroma_port: int = DEFAULT_CHROMA_PORT,
+    collection_name: str = DEFAULT_COLLECTION,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    reset: bool = False,
+) -> int:
+    """Run the full ingestion pipeline.
+
+    Returns the number of chunks ingested.
+    """
+    documents = _prepare_documents(
+        data_dir, chroma_host, chroma_port, collection_name, chunk_size, chunk_overlap
+    )
+    if not documents:
         return 0
 
     # 3. Connect to ChromaDB
-    chroma_client = chromadb.HttpClient(host=chroma_host, port=chroma_port)
+    chroma_client = chromadb.HttpClient(
+        host=chroma_host, port=chroma_port, settings=chroma_client_settings()
+    )
 
     # Optionally reset the collection
     if reset:
@@ -187,9 +234,120 @@ def ingest(
 
     count = vectorstore._collection.count()
     print(f"[OK] Ingested {count} chunks into collection '{collection_name}'")
+
+    # 6. Lexical index over the whole collection, for hybrid search
+    _save_lexical_index(build_from_collection(vectorstore._collection), collection_name)
+
+    # 7. Tell local vector indexes to reload
+    _bump_ingest_version(collection_name)
     return count
 
 
+async def aingest(
+    data_dir: str = DEFAULT_DATA_DIR,
+    chroma_host: str = DEFAULT_CHROMA_HOST,
+    chroma_port: int = DEFAULT_CHROMA_PORT,
+    collection_name: str = DEFAULT_COLLECTION,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    reset: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> int:
+    """Async :func:`ingest` over Chroma's async HTTP client.
+
+    Up to ``concurrency`` batches of ``batch_size`` chunks are embedded
+    and upserted at once.  Returns the number of chunks ingested.
+    """
+    documents = _prepare_documents(
+        data_dir, chroma_host, chroma_port, collection_name, chunk_size, chunk_overlap
+    )
+    if not documents:
+        return 0
+
+    # 3. Connect to ChromaDB
+    chroma_client = await chromadb.AsyncHttpClient(
+        host=chroma_host, port=chroma_port, settings=chroma_client_settings()
+    )
+    if reset:
+        try:
+            await chroma_client.delete_collection(collection_name)
+            print(f"[INFO] Deleted existing collection '{collection_name}'")
+        except Exception:
+            pass  # collection didn't exist
+    # Chunks are embedded here, not by the server
+    collection = await chroma_client.get_or_create_collection(
+        collection_name, embedding_function=None
+    )
+
+    # 4. Build embeddings over the shared HTTP pool
+    embeddings = OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_async_client=get_async_http_client(),
+    )
+
+    # 5. Embed and upsert batches concurrently
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def upsert(batch: list) -> None:
+        async with semaphore:
+            texts = [doc.page_content for doc in batch]
+            vectors = await embeddings.aembed_documents(texts)
+            await collection.upsert(
+                ids=[str(uuid.uuid4()) for _ in batch],
+                embeddings=vectors,
+                documents=texts,
+                metadatas=[doc.metadata for doc in batch],
+            )
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                upsert(documents[i : i + batch_size])
+                for i in range(0, len(documents), batch_size)
+            )
+        )
+        count = await collection.count()
+        print(
+            f"[OK] Ingested {count} chunks into collection '{collection_name}' "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        # 6. Lexical index over the whole collection, for hybrid search
+        ids: list[str] = []
+        texts: list[str] = []
+        metadatas: list[dict] = []
+        while True:
+            page = await collection.get(
+                include=["documents", "metadatas"], limit=1000, offset=len(ids)
+            )
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            texts.extend(page["documents"])
+            metadatas.extend(m or {} for m in page["metadatas"])
+    finally:
+        await close_http_clients()
+    _save_lexical_index(BM25Index.build(ids, texts, metadatas), collection_name)
+
+    # 7. Tell local vector indexes to reload
+    _bump_ingest_version(collection_name)
+    return count
+
+
+def _bump_ingest_version(collection_name: str) -> None:
+    version = str(time.time_ns())
+    try:
+        client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        client.set(rag_ingest_version_key(collection_name), version)
+    except redis.RedisError as exc:
+        print(f"[WARN] Could not bump the ingest version in Redis: {exc}")
+        return
+    print(f"[INFO] Ingest version : {version}")
+
+
 # ---------------------------------------------------------------------------
 # CLI entry-point
 # ---------------------------------------------------------------------------
@@ -238,9 +396,31 @@ def main():
         help="Delete the collection before ingesting (fresh start)",
     )
 
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action=argparse.BooleanOptionalAction,
+        default=settings.chroma_async_enabled,
+        help="Use the async Chroma client (default: CHROMA_ASYNC_ENABLED)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Chunks per embed + upsert batch with --async "
+        f"(default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Batches in flight at once with --async "
+        f"(default: {DEFAULT_CONCURRENCY})",
+    )
+
     args = parser.parse_args()
 
-    ingest(
+    options = dict(
         data_dir=args.data_dir,
         chroma_host=args.chroma_host,
         chroma_port=args.chroma_port,
@@ -249,6 +429,12 @@ def main():
         chunk_overlap=args.chunk_overlap,
         reset=args.reset,
     )
+    if args.use_async:
+        asyncio.run(
+            aingest(**options, batch_size=args.batch_size, concurrency=args.concurrency)
+        )
+    else:
+        ingest(**options)
 
 
 if __name__ == "__main__":
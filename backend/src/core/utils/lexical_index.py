@@ -0,0 +1,234 @@
+"""BM25 inverted index over the company-policies chunks.
+
+Embedding similarity is weak on exact-term queries ("PTO carry-over",
+"SOC2"), so after upserting ``ingest`` also builds a lexical index of
+the collection and writes it to ``LEXICAL_INDEX_DIR/<collection>.bm25.npz``.
+The file is compact: postings are stored CSR-style as flat NumPy arrays
+(document numbers and term frequencies, sliced per term through an
+offsets array), next to the chunk ids, texts and metadata.
+
+Searching a term touches only that term's postings, and the BM25 update
+is vectorised over them.  :func:`reciprocal_rank_fusion` combines a BM25
+ranking with a vector ranking.
+
+Tokenisation is deliberately simple (lower-cased alphanumeric runs minus
+a few stop words, no stemming), so codes such as ``soc2`` or ``iso27001``
+stay single terms.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from collections.abc import Hashable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my "
+    "of on or our the their this to we what when where which who why will "
+    "with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split ``text`` into index terms."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def index_path(directory: str | Path, collection: str) -> Path:
+    return Path(directory) / f"{collection}.bm25.npz"
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks.
+
+    Parameters
+    ----------
+    ids, documents, metadatas:
+        The chunks, in parallel lists (as stored in Chroma).
+    terms:
+        Vocabulary; term ``i`` owns ``postings[offsets[i]:offsets[i + 1]]``.
+    offsets, postings, frequencies:
+        CSR postings: chunk numbers and in-chunk term counts per term.
+    lengths:
+        Number of terms in each chunk.
+    k1, b:
+        BM25 term-frequency saturation and length normalisation.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        terms: list[str],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        lengths: np.ndarray,
+        *,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        count = len(ids)
+        self._avg_length = float(lengths.mean()) if count else 0.0
+        df = np.diff(offsets).astype(np.float64)
+        self._idf = np.log(1.0 + (count - df + 0.5) / (df + 0.5))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> BM25Index:
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths = np.zeros(len(documents), dtype=np.int32)
+        for number, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            lengths[number] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((number, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[t]) for t in terms])
+        flat = [entry for term in terms for entry in postings[term]]
+        docs = np.fromiter((d for d, _ in flat), dtype=np.int32, count=len(flat))
+        tfs = np.fromiter(
+            (min(tf, 65535) for _, tf in flat), dtype=np.uint16, count=len(flat)
+        )
+        return cls(ids, documents, metadatas, terms, offsets, docs, tfs, lengths)
+
+    # -- Persistence ------------------------------------------------------------
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        chunks = json.dumps(
+            {"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}
+        )
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            terms=np.array(sorted(self.terms, key=self.terms.get), dtype=np.str_),
+            offsets=self.offsets,
+            postings=self.postings,
+            frequencies=self.frequencies,
+            lengths=self.lengths,
+            chunks=np.frombuffer(chunks.encode("utf-8"), dtype=np.uint8),
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> BM25Index:
+        with np.load(path, allow_pickle=False) as data:
+            chunks = json.loads(data["chunks"].tobytes().decode("utf-8"))
+            return cls(
+                chunks["ids"],
+                chunks["documents"],
+                chunks["metadatas"],
+                data["terms"].tolist(),
+                data["offsets"],
+                data["postings"],
+                data["frequencies"],
+                data["lengths"],
+            )
+
+    # -- Search -----------------------------------------------------------------
+
+    def known_terms(self, query: str) -> tuple[list[str], list[str]]:
+        """Split the query's terms into ``(known, unknown)`` to the index."""
+        known, unknown = [], []
+        for term in dict.fromkeys(tokenize(query)):
+            (known if term in self.terms else unknown).append(term)
+        return known, unknown
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for ``query``."""
+        scores = np.zeros(len(self), dtype=np.float64)
+        known, _ = self.known_terms(query)
+        for term in known:
+            i = self.terms[term]
+            start, end = self.offsets[i], self.offsets[i + 1]
+            docs = self.postings[start:end]
+            tf = self.frequencies[start:end].astype(np.float64)
+            norm = self.k1 * (
+                1 - self.b + self.b * self.lengths[docs] / self._avg_length
+            )
+            scores[docs] += self._idf[i] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return ``(chunk number, score)`` of the ``k`` best matching chunks."""
+        scores = self.scores(query)
+        matching = np.flatnonzero(scores)
+        if not len(matching):
+            return []
+        k = min(k, len(matching))
+        top = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def build_from_collection(collection: Any, page_size: int = 1000) -> BM25Index:
+    """Index every chunk currently stored in a Chroma collection."""
+    ids: list[str] = []
+    documents: list[str] = []
+    metadatas: list[dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = collection.get(
+            include=["documents", "metadatas"], limit=page_size, offset=offset
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(m or {} for m in page["metadatas"])
+        offset += len(page["ids"])
+    return BM25Index.build(ids, documents, metadatas)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    weights: Sequence[float],
+    k: int = 60,
+) -> list[tuple[Hashable, float]]:
+    """Fuse best-first rankings: ``score(d) = sum(w / (k + rank(d)))``.
+
+    Scores are divided by the best attainable score (first in every
+    ranking), so they fall in ``(0, 1]``.
+    """
+    fused: dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    best = sum(weights) / (k + 1) or 1.0
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [(key, score / best) for key, score in ordered]
+
+
+def bm25_relevance(scores: Sequence[float]) -> list[float]:
+    """Scale BM25 scores to ``(0, 1]`` relative to the best one."""
+    best = max(scores, default=0.0)
+    return [s / best if best else 0.0 for s in scores]
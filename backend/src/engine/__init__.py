@@ -1,8 +1,7 @@
 import json
 from typing import List, TypedDict
 
-from .agents.planner import planner_agent
-from .agents.researcher import researcher_agent
+from .agents import get_agent
 from .utils.output_parser import get_structured_output_parser
 
 
@@ -19,7 +18,7 @@ class OnboardingProfile(TypedDict):
 
 
 def create_onboarding_agent():
-    result = planner_agent.invoke(
+    result = get_agent("planner").invoke(
         {"messages": [{"role": "user", "content": "What is langgraph?"}]}
     )
     data = get_structured_output_parser(result)
@@ -30,7 +29,7 @@ def create_onboarding_agent():
             print("  [Warning] Unknown agent specified!")
         else:
             query = json.dumps(todo_list_json, indent=2)
-            research_result = researcher_agent.invoke(
+            research_result = get_agent("researcher").invoke(
                 {"messages": [{"role": "user", "content": query}]}
             )
 
@@ -0,0 +1,374 @@
+"""Admission control for roadmap generations.
+
+At most ``ADMISSION_MAX_CONCURRENT`` generations run at once, and at most
+``ADMISSION_MAX_PER_USER`` of them for the same user.  Everything else
+waits in a FIFO queue.  When a slot frees up, the oldest waiter that fits
+the limits is admitted, so a user who is already at their own limit does
+not hold up anyone queued behind them.  Waiters are told their queue
+position whenever it changes.
+
+Optional work (speculative pre-execution) uses ``try_admit`` instead: it
+takes a slot only when one is free with nobody waiting, and never queues.
+
+Backends (``ADMISSION_BACKEND``):
+
+* ``local`` — limits apply per process (API process or worker)
+* ``redis`` — limits apply across the cluster.  Waiters poll a shared
+  queue every ``ADMISSION_POLL_SECONDS``.  Both waiting and running
+  entries carry a heartbeat, so a crashed process frees its place after
+  ``ADMISSION_SLOT_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Protocol
+
+import redis.asyncio as aioredis
+import structlog
+
+from ..core.config import settings
+from ..core.redis import (
+    ROADMAP_ADMISSION_ACTIVE_KEY,
+    ROADMAP_ADMISSION_QUEUE_KEY,
+    ROADMAP_ADMISSION_SEQ_KEY,
+    ROADMAP_ADMISSION_USERS_KEY,
+    ROADMAP_ADMISSION_WAITERS_KEY,
+    get_redis,
+)
+
+logger = structlog.get_logger()
+
+QueuedCallback = Callable[[int], Awaitable[None]]
+
+
+class AdmissionController(Protocol):
+    def admit(
+        self, session_id: str, user_id: str, on_queued: QueuedCallback
+    ) -> contextlib.AbstractAsyncContextManager[None]: ...
+
+    def try_admit(
+        self, session_id: str, user_id: str
+    ) -> contextlib.AbstractAsyncContextManager[bool]: ...
+
+    async def stats(self) -> dict[str, int]: ...
+
+
+# ---------------------------------------------------------------------------
+# Per-process
+# ---------------------------------------------------------------------------
+
+
+@dataclass(eq=False)
+class _Waiter:
+    session_id: str
+    user_id: str
+    admitted: bool = False
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class LocalAdmissionController:
+    """In-process limiter with a FIFO waiting list."""
+
+    def __init__(self, max_concurrent: int, max_per_user: int) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self._running = 0
+        self._per_user: Counter[str] = Counter()
+        self._waiters: list[_Waiter] = []
+
+    def _fits(self, user_id: str) -> bool:
+        return (
+            self._running < self.max_concurrent
+            and self._per_user[user_id] < self.max_per_user
+        )
+
+    def _take(self, user_id: str) -> None:
+        self._running += 1
+        self._per_user[user_id] += 1
+
+    def _release(self, user_id: str) -> None:
+        self._running -= 1
+        self._per_user[user_id] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters in FIFO order while they fit, then wake the rest."""
+        for waiter in list(self._waiters):
+            if self._fits(waiter.user_id):
+                self._take(waiter.user_id)
+                waiter.admitted = True
+                waiter.wake.set()
+                self._waiters.remove(waiter)
+        # Positions may have changed for everyone still waiting
+        for waiter in self._waiters:
+            waiter.wake.set()
+
+    @asynccontextmanager
+    async def admit(
+        self, session_id: str, user_id: str, on_queued: QueuedCallback
+    ) -> AsyncIterator[None]:
+        waiter = _Waiter(session_id, user_id)
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await self._wait_turn(waiter, on_queued)
+        except BaseException:
+            if waiter.admitted:
+                self._release(user_id)
+            else:
+                self._waiters.remove(waiter)
+                self._dispatch()
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+    @asynccontextmanager
+    async def try_admit(self, session_id: str, user_id: str) -> AsyncIterator[bool]:
+        """Hold a slot if one is free right now; yield whether it was taken."""
+        if self._waiters or not self._fits(user_id):
+            yield False
+            return
+        self._take(user_id)
+        try:
+            yield True
+        finally:
+            self._release(user_id)
+
+    async def _wait_turn(self, waiter: _Waiter, on_queued: QueuedCallback) -> None:
+        last_position = None
+        while not waiter.admitted:
+            position = self._waiters.index(waiter) + 1
+            if position != last_position:
+                await on_queued(position)
+                last_position = position
+            waiter.wake.clear()
+            if not waiter.admitted:
+                await waiter.wake.wait()
+
+    async def stats(self) -> dict[str, int]:
+        return {"running": self._running, "queued": len(self._waiters)}
+
+
+# ---------------------------------------------------------------------------
+# Cluster-wide (Redis)
+# ---------------------------------------------------------------------------
+
+# KEYS: queue, waiters, active, users
+# ARGV: session, now_ms, ttl_ms, max_concurrent, max_per_user
+# Returns 0 when admitted, otherwise the 1-based queue position.
+_TRY_ADMIT_SCRIPT = """
+local now = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+
+for _, s in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[1], s)
+    redis.call('ZREM', KEYS[2], s)
+    redis.call('HDEL', KEYS[4], s)
+end
+for _, s in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+    redis.call('ZREM', KEYS[3], s)
+    redis.call('HDEL', KEYS[4], s)
+end
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return -1
+end
+redis.call('ZADD', KEYS[2], now + ttl, ARGV[1])
+
+local active = redis.call('ZRANGE', KEYS[3], 0, -1)
+local free = tonumber(ARGV[4]) - #active
+local per_user = {}
+for _, s in ipairs(active) do
+    local u = redis.call('HGET', KEYS[4], s) or ''
+    per_user[u] = (per_user[u] or 0) + 1
+end
+
+if free > 0 then
+    for _, s in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+        local u = redis.call('HGET', KEYS[4], s) or ''
+        if (per_user[u] or 0) < tonumber(ARGV[5]) then
+            if s == ARGV[1] then
+                redis.call('ZREM', KEYS[1], s)
+                redis.call('ZREM', KEYS[2], s)
+                redis.call('ZADD', KEYS[3], now + ttl, s)
+                return 0
+            end
+            -- An older eligible waiter gets this slot first
+            per_user[u] = (per_user[u] or 0) + 1
+            free = free - 1
+            if free <= 0 then
+                break
+            end
+        end
+    end
+end
+return redis.call('ZRANK', KEYS[1], ARGV[1]) + 1
+"""
+
+
+class RedisAdmissionController:
+    """Cluster-wide limiter: a shared FIFO queue and active set in Redis."""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        *,
+        redis: aioredis.Redis | None = None,
+        poll_seconds: float | None = None,
+        slot_ttl_seconds: float | None = None,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.redis = redis or get_redis()
+        self.poll_seconds = poll_seconds or settings.admission_poll_seconds
+        self.ttl_ms = int(
+            (slot_ttl_seconds or settings.admission_slot_ttl_seconds) * 1000
+        )
+        self._keys = (
+            ROADMAP_ADMISSION_QUEUE_KEY,
+            ROADMAP_ADMISSION_WAITERS_KEY,
+            ROADMAP_ADMISSION_ACTIVE_KEY,
+            ROADMAP_ADMISSION_USERS_KEY,
+        )
+
+    async def _try_admit(self, session_id: str) -> int:
+        return int(
+            await self.redis.eval(
+                _TRY_ADMIT_SCRIPT,
+                len(self._keys),
+                *self._keys,
+                session_id,
+                int(time.time() * 1000),
+                self.ttl_ms,
+                self.max_concurrent,
+                self.max_per_user,
+            )
+        )
+
+    async def _enqueue(self, session_id: str, user_id: str) -> None:
+        seq = await self.redis.incr(ROADMAP_ADMISSION_SEQ_KEY)
+        expires = int(time.time() * 1000) + self.ttl_ms
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(ROADMAP_ADMISSION_USERS_KEY, session_id, user_id)
+            pipe.zadd(ROADMAP_ADMISSION_QUEUE_KEY, {session_id: seq}, nx=True)
+            pipe.zadd(ROADMAP_ADMISSION_WAITERS_KEY, {session_id: expires})
+            await pipe.execute()
+
+    async def _leave(self, session_id: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(ROADMAP_ADMISSION_QUEUE_KEY, session_id)
+            pipe.zrem(ROADMAP_ADMISSION_WAITERS_KEY, session_id)
+            pipe.zrem(ROADMAP_ADMISSION_ACTIVE_KEY, session_id)
+            pipe.hdel(ROADMAP_ADMISSION_USERS_KEY, session_id)
+            await pipe.execute()
+
+    async def _keep_slot(self, session_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_ms / 1000 / 3)
+            expires = int(time.time() * 1000) + self.ttl_ms
+            try:
+                await self.redis.zadd(
+                    ROADMAP_ADMISSION_ACTIVE_KEY, {session_id: expires}, xx=True
+                )
+            except Exception as exc:
+                # Keep trying: a lapsed slot would admit beyond the limits
+                logger.warning(
+                    "admission_slot_refresh_failed",
+                    session_id=session_id,
+                    error=str(exc),
+                )
+
+    async def stats(self) -> dict[str, int]:
+        # Entries of crashed processes count until the next admission sweeps them
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(ROADMAP_ADMISSION_ACTIVE_KEY)
+            pipe.zcard(ROADMAP_ADMISSION_QUEUE_KEY)
+            running, queued = await pipe.execute()
+        return {"running": running, "queued": queued}
+
+    @asynccontextmanager
+    async def _hold(self, session_id: str) -> AsyncIterator[None]:
+        """Keep an admitted slot alive until the block exits, then free it."""
+        keeper = asyncio.create_task(self._keep_slot(session_id))
+        try:
+            yield
+        finally:
+            keeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await keeper
+            await self._leave(session_id)
+
+    @asynccontextmanager
+    async def admit(
+        self, session_id: str, user_id: str, on_queued: QueuedCallback
+    ) -> AsyncIterator[None]:
+        await self._enqueue(session_id, user_id)
+        try:
+            last_position = None
+            while (position := await self._try_admit(session_id)) != 0:
+                if position < 0:
+                    # Our entry expired (e.g. Redis failover); queue again
+                    await self._enqueue(session_id, user_id)
+                elif position != last_position:
+                    await on_queued(position)
+                    last_position = position
+                await asyncio.sleep(self.poll_seconds)
+        except BaseException:
+            await self._leave(session_id)
+            raise
+
+        async with self._hold(session_id):
+            yield
+
+    @asynccontextmanager
+    async def try_admit(self, session_id: str, user_id: str) -> AsyncIterator[bool]:
+        """Hold a slot if one is free right now; yield whether it was taken."""
+        await self._enqueue(session_id, user_id)
+        try:
+            admitted = await self._try_admit(session_id) == 0
+        except BaseException:
+            await self._leave(session_id)
+            raise
+        if not admitted:
+            await self._leave(session_id)
+            yield False
+            return
+
+        async with self._hold(session_id):
+            yield True
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide controller configured by ``ADMISSION_*``."""
+    global _controller
+    if _controller is None:
+        if settings.admission_backend == "local":
+            _controller = LocalAdmissionController(
+                settings.admission_max_concurrent, settings.admission_max_per_user
+            )
+        elif settings.admission_backend == "redis":
+            _controller = RedisAdmissionController(
+                settings.admission_max_concurrent, settings.admission_max_per_user
+            )
+        else:
+            raise ValueError(f"Unknown admission backend: {settings.admission_backend}")
+        logger.info(
+            "admission_controller_configured",
+            backend=settings.admission_backend,
+            max_concurrent=settings.admission_max_concurrent,
+            max_per_user=settings.admission_max_per_user,
+        )
+    return _controller
@@ -1,12 +1,33 @@
-from .planner import planner_agent
-from .policy_researcher import policy_researcher_agent
-from .researcher import researcher_agent
-from .roadmap_creater import post_process_roadmap, roadmap_creator_agent
+from typing import Any
+
+from .registry import AGENT_BUILDERS, get_agent, warm_agents
+from .roadmap_creater import (
+    CourseRoadmapFormat,
+    post_process_roadmap,
+    post_process_section,
+    strip_roadmap_ids,
+)
 
 __all__ = [
-    "planner_agent",
-    "policy_researcher_agent",
-    "researcher_agent",
-    "roadmap_creator_agent",
+    "AGENT_BUILDERS",
+    "get_agent",
+    "warm_agents",
     "post_process_roadmap",
+    "post_process_section",
+    "strip_roadmap_ids",
+    "CourseRoadmapFormat",
 ]
+
+# Former module-level agent objects, now built on first access
+_LEGACY_AGENTS = {
+    "planner_agent": "planner",
+    "policy_researcher_agent": "policy_researcher",
+    "researcher_agent": "researcher",
+    "roadmap_creator_agent": "roadmap_creator",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LEGACY_AGENTS:
+        return get_agent(_LEGACY_AGENTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
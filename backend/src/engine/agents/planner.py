@@ -1,12 +1,15 @@
+from __future__ import annotations
+
 from enum import Enum
+from typing import TYPE_CHECKING
 
-from deepagents import create_deep_agent
-from langchain.agents.structured_output import ToolStrategy
 from pydantic import BaseModel
 
-from ..models.llm import llm
 from ..prompts.planner_prompt import get_planner_prompt
 
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
 
 class AgentType(str, Enum):
     internet_search_agent = "internet_search_agent"
@@ -21,11 +24,16 @@ class ToDoListResponseFormat(BaseModel):
     agent: AgentType
 
 
-PLANNER_PROMPT = get_planner_prompt()
-agent = create_deep_agent(
-    name="proactive-onboarding-engine",
-    model=llm,
-    system_prompt=PLANNER_PROMPT,
-    response_format=ToolStrategy(ToDoListResponseFormat),
-)
-planner_agent = agent
+def build_planner_agent() -> CompiledStateGraph:
+    """Create the planner agent (imports the agent stack on first call)."""
+    from deepagents import create_deep_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from ..models.llm import get_llm
+
+    return create_deep_agent(
+        name="proactive-onboarding-engine",
+        model=get_llm("planner"),
+        system_prompt=get_planner_prompt(),
+        response_format=ToolStrategy(ToDoListResponseFormat),
+    )
@@ -1,19 +1,20 @@
 """Policy researcher agent — answers company policy questions via RAG.
 
-This agent uses the ``search_company_policies`` tool to query the
-ChromaDB vector store and synthesise answers grounded in internal
+This agent uses the ``search_company_policies`` tools (single and
+batched) to query the ChromaDB vector store and synthesise answers grounded in internal
 policy documents.  Every answer includes source citations.
 """
 
 from __future__ import annotations
 
-from deepagents import create_deep_agent
-from langchain.agents.structured_output import ToolStrategy
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel
 
-from ..models.llm import llm
 from ..prompts.policy_prompt import get_policy_research_prompt
-from ..tools.rag_search import search_company_policies
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
 # ---------------------------------------------------------------------------
 # Structured output models
@@ -40,12 +41,22 @@ class PolicyResearchFormat(BaseModel):
 # Agent
 # ---------------------------------------------------------------------------
 
-POLICY_PROMPT = get_policy_research_prompt()
 
-policy_researcher_agent = create_deep_agent(
-    name="policy-researcher-agent",
-    model=llm,
-    tools=[search_company_policies],
-    system_prompt=POLICY_PROMPT,
-    response_format=ToolStrategy(PolicyResearchFormat),
-)
+def build_policy_researcher_agent() -> CompiledStateGraph:
+    """Create the policy researcher agent with the RAG search tools."""
+    from deepagents import create_deep_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from ..models.llm import get_llm
+    from ..tools.rag_search import (
+        search_company_policies,
+        search_company_policies_batch,
+    )
+
+    return create_deep_agent(
+        name="policy-researcher-agent",
+        model=get_llm("policy_researcher"),
+        tools=[search_company_policies, search_company_policies_batch],
+        system_prompt=get_policy_research_prompt(),
+        response_format=ToolStrategy(PolicyResearchFormat),
+    )
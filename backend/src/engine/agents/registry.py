@@ -0,0 +1,71 @@
+"""Lazily built agents.
+
+Building an agent imports deepagents / LangGraph and its tools (Chroma,
+DuckDuckGo) and compiles the agent graph, which is slow and memory-heavy.
+Importing the engine no longer does that: each agent is built the first
+time :func:`get_agent` asks for it and reused afterwards.  The worker
+builds them all at startup with :func:`warm_agents` so the first job
+does not pay for it; API processes only build them when they run a
+generation in-process.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import structlog
+
+from .planner import build_planner_agent
+from .policy_researcher import build_policy_researcher_agent
+from .researcher import build_researcher_agent
+from .roadmap_creater import build_roadmap_creator_agent
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+logger = structlog.get_logger()
+
+AGENT_BUILDERS: dict[str, Callable[[], CompiledStateGraph]] = {
+    "planner": build_planner_agent,
+    "policy_researcher": build_policy_researcher_agent,
+    "researcher": build_researcher_agent,
+    "roadmap_creator": build_roadmap_creator_agent,
+}
+
+_agents: dict[str, CompiledStateGraph] = {}
+_lock = threading.Lock()
+
+
+def get_agent(name: str) -> CompiledStateGraph:
+    """Return agent ``name``, building it on first use.
+
+    Raises
+    ------
+    KeyError
+        If ``name`` is not one of :data:`AGENT_BUILDERS`.
+    """
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    builder = AGENT_BUILDERS[name]
+    with _lock:
+        agent = _agents.get(name)
+        if agent is None:
+            started = time.perf_counter()
+            agent = builder()
+            _agents[name] = agent
+            logger.info(
+                "agent_built",
+                agent=name,
+                duration_ms=round((time.perf_counter() - started) * 1000),
+            )
+    return agent
+
+
+def warm_agents() -> None:
+    """Build every agent now (e.g. at worker startup)."""
+    for name in AGENT_BUILDERS:
+        get_agent(name)
@@ -1,12 +1,14 @@
+from __future__ import annotations
+
 from enum import Enum
+from typing import TYPE_CHECKING
 
-from deepagents import create_deep_agent
-from langchain.agents.structured_output import ToolStrategy
 from pydantic import BaseModel
 
-from ..models.llm import llm
 from ..prompts.research_prompt import get_research_prompt
-from ..tools.ddgs import search
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
 
 class ResourceType(str, Enum):
@@ -31,13 +33,18 @@ class ResearchReportFormat(BaseModel):
     resources: list[Resource]
 
 
-RESEARCH_PROMPT = get_research_prompt()
+def build_researcher_agent() -> CompiledStateGraph:
+    """Create the internet researcher agent with the web search tool."""
+    from deepagents import create_deep_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from ..models.llm import get_llm
+    from ..tools.ddgs import search
 
-agent = create_deep_agent(
-    name="researcher-agent",
-    model=llm,
-    tools=[search],
-    system_prompt=RESEARCH_PROMPT,
-    response_format=ToolStrategy(ResearchReportFormat),
-)
-researcher_agent = agent
+    return create_deep_agent(
+        name="researcher-agent",
+        model=get_llm("researcher"),
+        tools=[search],
+        system_prompt=get_research_prompt(),
+        response_format=ToolStrategy(ResearchReportFormat),
+    )
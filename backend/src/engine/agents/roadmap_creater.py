@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-from typing import List, Literal
+from typing import TYPE_CHECKING, List, Literal
 from uuid import uuid4
 
-from deepagents import create_deep_agent
-from langchain.agents.structured_output import ToolStrategy
 from pydantic import BaseModel
 
-from ..models.llm import llm
 from ..prompts.roadmap_prompt import get_roadmap_prompt
 
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
 # ---------------------------------------------------------------------------
 # Pydantic response models (no `id` or `status` — added in post-processing)
 # ---------------------------------------------------------------------------
@@ -47,14 +47,20 @@ class CourseRoadmapFormat(BaseModel):
 # Agent
 # ---------------------------------------------------------------------------
 
-ROADMAP_PROMPT = get_roadmap_prompt()
 
-roadmap_creator_agent = create_deep_agent(
-    name="roadmap-creator",
-    model=llm,
-    system_prompt=ROADMAP_PROMPT,
-    response_format=ToolStrategy(CourseRoadmapFormat),
-)
+def build_roadmap_creator_agent() -> CompiledStateGraph:
+    """Create the roadmap creator agent."""
+    from deepagents import create_deep_agent
+    from langchain.agents.structured_output import ToolStrategy
+
+    from ..models.llm import get_llm
+
+    return create_deep_agent(
+        name="roadmap-creator",
+        model=get_llm("roadmap_creator"),
+        system_prompt=get_roadmap_prompt(),
+        response_format=ToolStrategy(CourseRoadmapFormat),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -62,6 +68,20 @@ roadmap_creator_agent = create_deep_agent(
 # ---------------------------------------------------------------------------
 
 
+def post_process_section(section: dict) -> dict:
+    """Assign UUIDs and default statuses to a single roadmap section.
+
+    IDs that are already present are kept, so a section streamed to the
+    client ahead of the full roadmap keeps the same IDs in the final
+    payload.
+    """
+    section.setdefault("id", str(uuid4()))
+    for topic in section.get("topics", []):
+        topic.setdefault("id", str(uuid4()))
+        topic.setdefault("status", "not_started")
+    return section
+
+
 def post_process_roadmap(data: dict) -> dict:
     """Assign UUIDs and default statuses to a raw roadmap dict.
 
@@ -83,9 +103,22 @@ def post_process_roadmap(data: dict) -> dict:
     data["id"] = str(uuid4())
 
     for section in data.get("sections", []):
-        section["id"] = str(uuid4())
-        for topic in section.get("topics", []):
-            topic["id"] = str(uuid4())
-            topic.setdefault("status", "not_started")
+        post_process_section(section)
 
     return data
+
+
+def strip_roadmap_ids(data: dict) -> dict:
+    """Return a copy of ``data`` without the IDs added by post-processing."""
+    stripped = {key: value for key, value in data.items() if key != "id"}
+    stripped["sections"] = [
+        {
+            **{key: value for key, value in section.items() if key != "id"},
+            "topics": [
+                {key: value for key, value in topic.items() if key != "id"}
+                for topic in section.get("topics", [])
+            ],
+        }
+        for section in data.get("sections", [])
+    ]
+    return stripped
@@ -0,0 +1,202 @@
+"""Sampled, asynchronous sink for pipeline debug artifacts.
+
+Stages hand intermediate results (planner output, research transcripts,
+the final roadmap) to :func:`emit_artifact`.  The call never blocks on
+I/O: the artifact is serialised to JSON right away, so it is a snapshot
+of the stage output even if the pipeline later mutates the same objects,
+and queued; a background writer gzips and stores it off the event loop,
+under a per-session name so concurrent sessions never overwrite each
+other.
+
+Configuration (``core/config.py``):
+
+* ``ARTIFACT_SINK`` — ``off`` (default), ``local`` or ``redis``
+* ``ARTIFACT_SAMPLE_RATE`` — fraction of sessions to keep (0.0-1.0)
+* ``ARTIFACT_MAX_BYTES`` — compressed artifacts above this are dropped
+* ``ARTIFACT_DIR`` / ``ARTIFACT_TTL_SECONDS`` — backend specifics
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Protocol
+
+import structlog
+
+from ..core.config import settings
+from ..core.redis import get_redis
+from .executor import get_engine_executor
+
+logger = structlog.get_logger()
+
+ARTIFACT_KEY_PREFIX = "roadmap:artifact:"
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+
+class ArtifactBackend(Protocol):
+    async def store(self, session_id: str, name: str, blob: bytes) -> None: ...
+
+
+class LocalDiskBackend:
+    """Write ``{base_dir}/{session_id}/{name}.json.gz`` on the engine executor."""
+
+    def __init__(self, base_dir: str) -> None:
+        self.base_dir = Path(base_dir)
+
+    def _write(self, session_id: str, name: str, blob: bytes) -> None:
+        path = self.base_dir / session_id / f"{name}.json.gz"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(blob)
+
+    async def store(self, session_id: str, name: str, blob: bytes) -> None:
+        await get_engine_executor().run(self._write, session_id, name, blob)
+
+
+class RedisArtifactBackend:
+    """Store artifacts (base64 gzip) under ``roadmap:artifact:{session}:{name}``."""
+
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    async def store(self, session_id: str, name: str, blob: bytes) -> None:
+        await get_redis().set(
+            f"{ARTIFACT_KEY_PREFIX}{session_id}:{name}",
+            base64.b64encode(blob).decode("ascii"),
+            ex=self.ttl_seconds,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Sink
+# ---------------------------------------------------------------------------
+
+
+def _compress(raw: bytes) -> bytes:
+    return gzip.compress(raw, compresslevel=6)
+
+
+class ArtifactSink:
+    """Queue artifacts and persist them from a single background task."""
+
+    def __init__(
+        self,
+        backend: ArtifactBackend,
+        *,
+        sample_rate: float,
+        max_bytes: int,
+        queue_size: int = 256,
+    ) -> None:
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._queue: asyncio.Queue[tuple[str, str, bytes]] = asyncio.Queue(queue_size)
+        self._task: asyncio.Task | None = None
+
+    def sampled(self, session_id: str) -> bool:
+        """Deterministic per-session sampling (all or none of a session)."""
+        if self.sample_rate >= 1:
+            return True
+        digest = hashlib.sha256(session_id.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2**32 < self.sample_rate
+
+    def emit(self, session_id: str, name: str, payload: Any) -> None:
+        if not self.sampled(session_id):
+            return
+        if self._queue.full():
+            logger.warning("artifact_dropped", session_id=session_id, name=name)
+            return
+        try:
+            raw = json.dumps(payload, default=str).encode("utf-8")
+        except (TypeError, ValueError) as exc:
+            logger.warning(
+                "artifact_encode_failed",
+                session_id=session_id,
+                name=name,
+                error=str(exc),
+            )
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._queue.put_nowait((session_id, name, raw))
+
+    async def _run(self) -> None:
+        while True:
+            session_id, name, raw = await self._queue.get()
+            try:
+                blob = await get_engine_executor().run(_compress, raw)
+                if len(blob) > self.max_bytes:
+                    logger.warning(
+                        "artifact_too_large",
+                        session_id=session_id,
+                        name=name,
+                        size=len(blob),
+                    )
+                    continue
+                await self.backend.store(session_id, name, blob)
+            except Exception as exc:
+                logger.warning(
+                    "artifact_write_failed",
+                    session_id=session_id,
+                    name=name,
+                    error=str(exc),
+                )
+            finally:
+                self._queue.task_done()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Flush queued artifacts (bounded by ``timeout``) and stop."""
+        if self._task is None:
+            return
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._queue.join(), timeout)
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+_sink: ArtifactSink | None = None
+
+
+def _get_sink() -> ArtifactSink | None:
+    global _sink
+    if settings.artifact_sink == "off":
+        return None
+    if _sink is None:
+        if settings.artifact_sink == "local":
+            backend: ArtifactBackend = LocalDiskBackend(settings.artifact_dir)
+        elif settings.artifact_sink == "redis":
+            backend = RedisArtifactBackend(settings.artifact_ttl_seconds)
+        else:
+            raise ValueError(f"Unknown artifact sink: {settings.artifact_sink}")
+        _sink = ArtifactSink(
+            backend,
+            sample_rate=settings.artifact_sample_rate,
+            max_bytes=settings.artifact_max_bytes,
+        )
+    return _sink
+
+
+def emit_artifact(session_id: str, name: str, payload: Any) -> None:
+    """Queue ``payload`` as artifact ``name`` for ``session_id`` (non-blocking)."""
+    sink = _get_sink()
+    if sink is not None:
+        sink.emit(session_id, name, payload)
+
+
+async def close_artifact_sink() -> None:
+    """Flush and stop the artifact writer (call on app / worker shutdown)."""
+    global _sink
+    if _sink is not None:
+        await _sink.close()
+        _sink = None
@@ -0,0 +1,106 @@
+"""Stage-level checkpoints for resuming interrupted roadmap generations.
+
+Every completed stage's outputs are stored in Redis under
+``roadmap:checkpoint:{session_id}:{stage}:{fingerprint}``, where the
+fingerprint is a hash of the stage's inputs.  On a resumed run the
+pipeline looks the checkpoint up before executing a stage and skips the
+LLM work when it finds one.  Because the key includes the inputs, a
+stage whose upstream results changed is never served a stale result.
+
+Checkpointing is best-effort: Redis errors are logged and the stage
+simply runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+import redis.asyncio as aioredis
+import structlog
+
+from ..core.config import settings
+from ..core.redis import ROADMAP_CHECKPOINT_PREFIX, get_redis, roadmap_checkpoint_key
+
+logger = structlog.get_logger()
+
+
+def fingerprint(inputs: dict[str, Any]) -> str:
+    """Return a stable hash of a stage's inputs."""
+    raw = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class StageCheckpoints:
+    """Checkpoint store bound to a single session.
+
+    Parameters
+    ----------
+    session_id:
+        The chat / roadmap session identifier.
+    resume:
+        When ``False`` checkpoints are written but never read, so a
+        fresh run always recomputes every stage.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        *,
+        resume: bool = False,
+        redis: aioredis.Redis | None = None,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        self.session_id = session_id
+        self.resume = resume
+        self.redis = redis or get_redis()
+        self.ttl_seconds = ttl_seconds or settings.checkpoint_ttl_seconds
+
+    async def load(self, stage: str, inputs: dict[str, Any]) -> dict[str, Any] | None:
+        """Return the stored outputs for ``stage`` given ``inputs``, if any."""
+        if not self.resume:
+            return None
+        key = roadmap_checkpoint_key(self.session_id, stage, fingerprint(inputs))
+        try:
+            raw = await self.redis.get(key)
+        except Exception as exc:
+            logger.warning(
+                "checkpoint_load_failed",
+                session_id=self.session_id,
+                stage=stage,
+                error=str(exc),
+            )
+            return None
+        return json.loads(raw) if raw else None
+
+    async def save(
+        self, stage: str, inputs: dict[str, Any], outputs: dict[str, Any]
+    ) -> None:
+        """Persist ``outputs`` as the checkpoint for ``stage`` / ``inputs``.
+
+        Outputs marked ``partial`` (the stage ran out of time) are not
+        stored, so a resumed run retries the stage in full.
+        """
+        if any(
+            isinstance(value, dict) and value.get("partial")
+            for value in outputs.values()
+        ):
+            return
+        key = roadmap_checkpoint_key(self.session_id, stage, fingerprint(inputs))
+        try:
+            await self.redis.set(key, json.dumps(outputs), ex=self.ttl_seconds)
+        except Exception as exc:
+            logger.warning(
+                "checkpoint_save_failed",
+                session_id=self.session_id,
+                stage=stage,
+                error=str(exc),
+            )
+
+    async def clear(self) -> None:
+        """Delete every checkpoint stored for this session."""
+        pattern = f"{ROADMAP_CHECKPOINT_PREFIX}{self.session_id}:*"
+        keys = [key async for key in self.redis.scan_iter(match=pattern)]
+        if keys:
+            await self.redis.delete(*keys)
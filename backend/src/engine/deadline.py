@@ -0,0 +1,58 @@
+"""End-to-end deadline for one roadmap generation.
+
+A :class:`DeadlineBudget` starts when ``curate_roadmap`` starts.  Every
+stage gets ``min(its own budget, time left overall)``:
+
+* the planner and the roadmap creator fail the run when they run out;
+* the policy and internet research stages stop waiting, continue with
+  whatever they have and record a note (see :meth:`degrade`) that is
+  shown in the progress stream instead of the stage's usual message.
+
+Budgets come from ``ROADMAP_DEADLINE_SECONDS`` and the
+``*_BUDGET_SECONDS`` settings.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from ..core.config import settings
+
+
+@dataclass
+class DeadlineBudget:
+    total_seconds: float
+    stage_seconds: dict[str, float]
+    started_at: float = field(default_factory=time.monotonic)
+    notes: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_settings(cls) -> DeadlineBudget:
+        return cls(
+            total_seconds=settings.roadmap_deadline_seconds,
+            stage_seconds={
+                "planner": settings.planner_budget_seconds,
+                "policy_research": settings.policy_research_budget_seconds,
+                "internet_research": settings.internet_research_budget_seconds,
+                "roadmap_creator": settings.roadmap_creator_budget_seconds,
+            },
+        )
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        """Seconds left before the overall deadline (never negative)."""
+        return max(0.0, self.total_seconds - self.elapsed())
+
+    def budget(self, stage: str) -> float:
+        """Seconds ``stage`` may take if it starts now."""
+        return min(self.stage_seconds.get(stage, self.total_seconds), self.remaining())
+
+    def degrade(self, stage: str, note: str) -> None:
+        """Record that ``stage`` ran out of time and continued partially."""
+        self.notes[stage] = note
+
+    def degraded(self, stage: str) -> bool:
+        return stage in self.notes
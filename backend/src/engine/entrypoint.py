@@ -1,32 +1,67 @@
 """Roadmap curation engine entrypoint.
 
 This module exposes ``curate_roadmap`` which is designed to be run as a
-background task (via ``asyncio.create_task`` or a task-queue worker).
+background task (via ``asyncio.create_task`` or the Redis Streams worker
+in ``worker.py``).
 
 It publishes progress updates to a Redis channel so that the WebSocket
 layer can stream them to the connected client.  It also keeps a Redis
 key with the latest state so that reconnecting clients can catch up.
 
-The actual AI / LangGraph orchestration is left as a stub so that you
-can wire it up to the planner + researcher agents incrementally.
+The orchestration itself is a small stage graph (see ``pipeline.py``):
+the planner runs first, the policy and internet researchers then run
+concurrently, and the roadmap creator combines both results.  Stages
+hand each other only the structured results (see ``handoff.py``); full
+transcripts go to the logs and the artifact sink.
 """
 
 from __future__ import annotations
 
 import asyncio
+import copy
 import json
+import math
+from functools import partial
 from typing import Any
+from uuid import UUID
 
 import structlog
-
-from ..core.redis import get_redis, roadmap_channel, roadmap_state_key
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..chat.services import ChatService
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.redis import (
+    get_redis,
+    roadmap_channel,
+    roadmap_sections_key,
+    roadmap_state_key,
+)
+from ..core.tracing import SESSION_ATTRIBUTE, span
+from ..core.utils.ai_core.usage import UsageTracker, track_usage
 from .agents import (
-    planner_agent,
-    policy_researcher_agent,
+    CourseRoadmapFormat,
+    get_agent,
     post_process_roadmap,
-    researcher_agent,
-    roadmap_creator_agent,
+    post_process_section,
+    strip_roadmap_ids,
+)
+from .admission import get_admission_controller
+from .artifacts import emit_artifact
+from .checkpoints import StageCheckpoints
+from .deadline import DeadlineBudget
+from .handoff import to_handoff
+from .latency import stage_latency_means
+from .lease import is_handoff
+from .pipeline import Stage, run_stages
+from .roadmap_cache import RoadmapCache, chat_data_fingerprint, normalize_chat_data
+from .speculation import (
+    SpeculationStore,
+    SpeculativeCheckpoints,
+    answered_count,
+    answers_similarity,
 )
+from .utils.json_stream import JsonArrayItemStream
 from .utils.output_parser import get_structured_output_parser
 
 logger = structlog.get_logger()
@@ -34,11 +69,14 @@ logger = structlog.get_logger()
 # Keep strong references to running tasks so they aren't GC'd
 _running_tasks: set[asyncio.Task] = set()
 
+# In-flight speculative runs of this process: session -> (task, chat_data)
+_speculations: dict[str, tuple[asyncio.Task, dict[str, Any]]] = {}
+
 
 def _serialize_agent_result(result: Any) -> Any:
     """Convert a LangGraph agent result into a JSON-serialisable dict.
 
-    Agent ``.invoke()`` returns a dict whose ``"messages"`` value is a
+    Agent ``.ainvoke()`` returns a dict whose ``"messages"`` value is a
     list of LangChain ``BaseMessage`` objects.  This helper converts
     each message to a plain dict so that downstream ``json.dumps``
     calls succeed.
@@ -78,6 +116,7 @@ async def _publish_progress(
     detail: str = "",
     progress_pct: int = 0,
     roadmap: dict[str, Any] | None = None,
+    **extra: Any,
 ) -> None:
     """Publish a progress event to Redis (channel + state key).
 
@@ -96,6 +135,8 @@ async def _publish_progress(
         Percentage (0-100) of overall progress.
     roadmap:
         When ``status == "completed"``, the full roadmap payload.
+    **extra:
+        Additional event fields (e.g. ``queue_position``).
     """
     payload: dict[str, Any] = {
         "session_id": session_id,
@@ -106,17 +147,527 @@ async def _publish_progress(
     }
     if roadmap is not None:
         payload["roadmap"] = roadmap
+    payload.update(extra)
 
     redis = get_redis()
     raw = json.dumps(payload)
 
-    # Persist latest state for reconnection (TTL 1 hour)
-    await redis.set(roadmap_state_key(session_id), raw, ex=3600)
-    # Publish on the channel for real-time listeners
-    await redis.publish(roadmap_channel(session_id), raw)
+    with span("redis.publish_progress", step=step, payload_bytes=len(raw)):
+        # Persist latest state for reconnection (TTL 1 hour)
+        await redis.set(roadmap_state_key(session_id), raw, ex=3600)
+        # Publish on the channel for real-time listeners
+        await redis.publish(roadmap_channel(session_id), raw)
+
+
+async def publish_cancelled(session_id: str) -> None:
+    """Publish the terminal "cancelled" progress event."""
+    await _publish_progress(
+        session_id,
+        status="error",
+        step="cancelled",
+        detail="Roadmap generation was cancelled.",
+        progress_pct=0,
+    )
+
+
+async def clear_streamed_sections(session_id: str) -> None:
+    """Forget sections streamed by an earlier run, so they are not replayed."""
+    await get_redis().delete(roadmap_sections_key(session_id))
+
+
+def estimate_run_seconds() -> float | None:
+    """Expected duration of one generation from recent stage latencies.
+
+    Follows the critical path of the stage graph: the two research
+    stages run concurrently, so only the slower one counts.
+    """
+    means = stage_latency_means()
+    if "planner" not in means or "roadmap_creator" not in means:
+        return None
+    research = max(
+        means.get("policy_research", 0.0), means.get("internet_research", 0.0)
+    )
+    return means["planner"] + research + means["roadmap_creator"]
+
+
+async def _publish_queued(session_id: str, position: int) -> None:
+    run_seconds = estimate_run_seconds()
+    eta_seconds = (
+        round(
+            math.ceil(position / max(1, settings.admission_max_concurrent))
+            * run_seconds
+        )
+        if run_seconds is not None
+        else None
+    )
+    detail = f"You're number {position} in the queue."
+    if eta_seconds is not None:
+        detail += f" Starting in about {max(1, round(eta_seconds / 60))} min…"
+    await _publish_progress(
+        session_id,
+        status="pending",
+        step="queued",
+        detail=detail,
+        progress_pct=0,
+        queue_position=position,
+        eta_seconds=eta_seconds,
+    )
+
+
+def _extract_todo_items(planner_result: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return the planner's to-do items as a list of dicts.
+
+    ``structured_response`` may be a list or a single dict (optionally
+    wrapping the list under ``"items"``) depending on the planner output.
+    """
+    structured = planner_result.get("structured_response", {})
+    if isinstance(structured, list):
+        return [item for item in structured if isinstance(item, dict)]
+    if isinstance(structured, dict):
+        if "items" in structured:
+            return [item for item in structured["items"] if isinstance(item, dict)]
+        if "agent" in structured:
+            return [structured]
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Pipeline stages
+# ---------------------------------------------------------------------------
+
+
+async def _planner_stage(
+    session_id: str, inputs: dict[str, Any], *, deadline: DeadlineBudget
+) -> dict[str, Any]:
+    """Turn the questionnaire answers into a to-do list of research items."""
+    chat_data = inputs["chat_data"]
+
+    async with asyncio.timeout(deadline.budget("planner")):
+        planner_result = await get_agent("planner").ainvoke(
+            {"messages": [{"role": "user", "content": json.dumps(chat_data)}]}
+        )
+    planner_result_serializable = _serialize_agent_result(planner_result)
+    logger.info(
+        "planner_result", session_id=session_id, result=planner_result_serializable
+    )
+    emit_artifact(session_id, "planner_result", planner_result_serializable)
+    return {
+        "planner_result": to_handoff(session_id, "planner", planner_result_serializable)
+    }
+
 
+async def _policy_research_stage(
+    session_id: str, inputs: dict[str, Any], *, deadline: DeadlineBudget
+) -> dict[str, Any]:
+    """Answer company-policy items via RAG.
+
+    Policy research is best-effort: when the planner produced no
+    ``company_policy_search`` item, or the agent fails, the stage yields
+    ``None`` and the roadmap is built from internet research alone.  When
+    its time budget runs out the stage yields an empty result marked
+    ``partial``.
+    """
+    chat_data = inputs["chat_data"]
+
+    policy_result_serializable: dict[str, Any] | None = None
+    try:
+        policy_items = [
+            item
+            for item in _extract_todo_items(inputs["planner_result"])
+            if item.get("agent") == "company_policy_search"
+        ]
+        if policy_items:
+            policy_query = json.dumps(
+                {"chat_data": chat_data, "policy_items": policy_items}
+            )
+            async with asyncio.timeout(deadline.budget("policy_research")):
+                policy_result = await get_agent("policy_researcher").ainvoke(
+                    {"messages": [{"role": "user", "content": policy_query}]}
+                )
+            policy_result_serializable = _serialize_agent_result(policy_result)
+            logger.info(
+                "policy_research_result",
+                session_id=session_id,
+                result=policy_result_serializable,
+            )
+            emit_artifact(session_id, "policy_result", policy_result_serializable)
+            policy_result_serializable = to_handoff(
+                session_id, "policy_research", policy_result_serializable
+            )
+    except TimeoutError:
+        logger.warning("policy_research_timed_out", session_id=session_id)
+        deadline.degrade(
+            "policy_research",
+            "Company policy search ran out of time — continuing without it.",
+        )
+        policy_result_serializable = {"structured_response": None, "partial": True}
+    except Exception as policy_exc:
+        logger.warning(
+            "policy_research_skipped",
+            session_id=session_id,
+            reason=str(policy_exc),
+        )
+
+    return {"policy_result": policy_result_serializable}
+
+
+async def _invoke_researcher(content: str) -> dict[str, Any]:
+    """Run one researcher agent conversation and serialise the result."""
+    researcher_result = await get_agent("researcher").ainvoke(
+        {"messages": [{"role": "user", "content": content}]}
+    )
+    return _serialize_agent_result(researcher_result)
+
+
+def _merge_research_results(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Reduce per-item researcher results into a single researcher result.
+
+    The merged ``structured_response`` is the list of research modules
+    the roadmap creator expects, renumbered in planner order, with each
+    resource link kept only in the first module that cites it.
+    """
+    modules: list[dict[str, Any]] = []
+    messages: list[Any] = []
+    seen_links: set[str] = set()
+
+    for result in results:
+        messages.extend(result.get("messages", []))
+        structured = result.get("structured_response")
+        reports = structured if isinstance(structured, list) else [structured]
+        for report in reports:
+            if not isinstance(report, dict):
+                continue
+            resources = []
+            for resource in report.get("resources", []):
+                link = resource.get("link")
+                if link in seen_links:
+                    continue
+                seen_links.add(link)
+                resources.append(resource)
+            modules.append(
+                {**report, "module": str(len(modules) + 1), "resources": resources}
+            )
+
+    return {"messages": messages, "structured_response": modules}
+
+
+async def _fan_out_research(
+    session_id: str, research_items: list[dict[str, Any]], timeout: float
+) -> tuple[dict[str, Any], int]:
+    """Map each planner item to its own researcher run, then reduce.
+
+    At most ``settings.research_fanout_concurrency`` researcher
+    conversations run at once.  Failed items are logged and dropped; the
+    stage only fails if every item fails.  Items still running after
+    ``timeout`` seconds are cancelled and the completed ones are merged.
+
+    Returns the merged result and the number of items that timed out.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.research_fanout_concurrency))
+
+    async def _research_item(item: dict[str, Any]) -> dict[str, Any]:
+        async with semaphore:
+            return await _invoke_researcher(json.dumps([item]))
+
+    tasks = [asyncio.create_task(_research_item(item)) for item in research_items]
+    try:
+        _done, pending = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    results: list[dict[str, Any]] = []
+    errors: list[BaseException] = []
+    for item, task in zip(research_items, tasks):
+        if task in pending:
+            logger.warning(
+                "research_item_timed_out",
+                session_id=session_id,
+                item=item.get("description"),
+            )
+            continue
+        if task.exception() is not None:
+            errors.append(task.exception())
+            logger.warning(
+                "research_item_failed",
+                session_id=session_id,
+                item=item.get("description"),
+                reason=str(task.exception()),
+            )
+            continue
+        results.append(task.result())
+
+    if not results and not pending:
+        raise errors[0]
+
+    return _merge_research_results(results), len(pending)
+
+
+async def _internet_research_stage(
+    session_id: str, inputs: dict[str, Any], *, deadline: DeadlineBudget
+) -> dict[str, Any]:
+    """Find learning resources for the planner's to-do items.
+
+    With ``settings.research_fanout_enabled`` every non-policy planner
+    item gets its own, shorter researcher conversation; otherwise the
+    whole planner result goes to a single researcher run.  When the time
+    budget runs out the stage continues with the items researched so
+    far and marks the result ``partial``.
+    """
+    planner_result_serializable = inputs["planner_result"]
+    timeout = deadline.budget("internet_research")
+
+    research_items = [
+        item
+        for item in _extract_todo_items(planner_result_serializable)
+        if item.get("agent") != "company_policy_search"
+    ]
+    timed_out = 0
+    if settings.research_fanout_enabled and research_items:
+        researcher_result_serializable, timed_out = await _fan_out_research(
+            session_id, research_items, timeout
+        )
+        if timed_out:
+            deadline.degrade(
+                "internet_research",
+                f"Researched {len(research_items) - timed_out} of "
+                f"{len(research_items)} topics before the time limit — "
+                "continuing with partial results.",
+            )
+    else:
+        try:
+            async with asyncio.timeout(timeout):
+                researcher_result_serializable = await _invoke_researcher(
+                    json.dumps(planner_result_serializable)
+                )
+        except TimeoutError:
+            timed_out = 1
+            researcher_result_serializable = {"messages": [], "structured_response": []}
+            deadline.degrade(
+                "internet_research",
+                "Resource research ran out of time — continuing without it.",
+            )
+
+    logger.info(
+        "researcher_result",
+        session_id=session_id,
+        result=researcher_result_serializable,
+    )
+    emit_artifact(session_id, "researcher_result", researcher_result_serializable)
+
+    handoff = to_handoff(
+        session_id, "internet_research", researcher_result_serializable
+    )
+    if timed_out:
+        handoff = {**handoff, "partial": True}
+    return {"researcher_result": handoff}
+
+
+def _adopt_streamed_ids(
+    roadmap_data: dict[str, Any], streamed: list[dict[str, Any] | None]
+) -> None:
+    """Reuse IDs of sections already sent to the client, where they match."""
+    for section, early in zip(roadmap_data.get("sections", []), streamed):
+        if early is None or early.get("title") != section.get("title"):
+            continue
+        section["id"] = early["id"]
+        for topic, early_topic in zip(
+            section.get("topics", []), early.get("topics", [])
+        ):
+            if early_topic.get("title") == topic.get("title"):
+                topic["id"] = early_topic["id"]
+                topic.setdefault("status", early_topic.get("status"))
+
+
+async def _stream_roadmap_creator(
+    session_id: str, messages: dict[str, Any]
+) -> tuple[dict[str, Any], list[dict[str, Any] | None]]:
+    """Run the roadmap creator in streaming mode.
+
+    The structured output arrives as the arguments of a
+    ``CourseRoadmapFormat`` tool call; they are parsed incrementally and
+    every completed section is post-processed and published as soon as
+    it closes.  If the model restarts the tool call (e.g. after a
+    validation error) sections are re-published by index.
+
+    Returns the final agent state and the sections published, by index.
+    """
+    tool_name = CourseRoadmapFormat.__name__
+    streams: dict[tuple[Any, Any], JsonArrayItemStream] = {}
+    emitted: dict[tuple[Any, Any], int] = {}
+    published: list[dict[str, Any] | None] = []
+    final_state: dict[str, Any] = {}
+
+    async for mode, chunk in get_agent("roadmap_creator").astream(
+        messages, stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        message, _metadata = chunk
+        for call in getattr(message, "tool_call_chunks", None) or []:
+            call_key = (message.id, call.get("index"))
+            if call.get("name") == tool_name:
+                streams[call_key] = JsonArrayItemStream("sections")
+                emitted[call_key] = 0
+            stream = streams.get(call_key)
+            if stream is None or not call.get("args"):
+                continue
+
+            for raw_section in stream.feed(call["args"]):
+                index = emitted[call_key]
+                emitted[call_key] += 1
+                section = post_process_section(raw_section)
+                published.extend([None] * (index + 1 - len(published)))
+                published[index] = section
+                await _publish_section(session_id, index, section)
+
+    return final_state, published
+
+
+async def _roadmap_creator_stage(
+    session_id: str, inputs: dict[str, Any], *, deadline: DeadlineBudget
+) -> dict[str, Any]:
+    """Combine research outputs into a raw ``CourseRoadmap`` dict.
+
+    With ``settings.roadmap_streaming_enabled`` sections are streamed to
+    the client as they are generated and keep their IDs in the result;
+    otherwise the result carries no IDs yet.
+    """
+    policy_result_serializable = inputs["policy_result"]
+
+    roadmap_input = json.dumps(
+        {
+            "chat_data": inputs["chat_data"],
+            "researcher_output": inputs["researcher_result"],
+            **(
+                {"policy_research": policy_result_serializable}
+                if policy_result_serializable
+                and policy_result_serializable.get("structured_response")
+                else {}
+            ),
+        }
+    )
+    messages = {"messages": [{"role": "user", "content": roadmap_input}]}
+
+    streamed: list[dict[str, Any] | None] = []
+    async with asyncio.timeout(deadline.budget("roadmap_creator")):
+        if settings.roadmap_streaming_enabled:
+            roadmap_raw, streamed = await _stream_roadmap_creator(session_id, messages)
+        else:
+            roadmap_raw = await get_agent("roadmap_creator").ainvoke(messages)
+    logger.info("roadmap_raw", session_id=session_id, result=roadmap_raw)
+
+    roadmap_data = get_structured_output_parser(roadmap_raw)
+    if roadmap_data is None:
+        raise ValueError("Roadmap creator returned no structured roadmap")
+    _adopt_streamed_ids(roadmap_data, streamed)
+    return {"roadmap_data": roadmap_data}
+
+
+def build_roadmap_stages(
+    session_id: str, deadline: DeadlineBudget | None = None
+) -> list[Stage]:
+    """Return the roadmap pipeline graph for ``session_id``.
+
+    ``planner → {policy_research, internet_research} → roadmap_creator``
+
+    Every stage runs within its share of ``deadline`` (by default a new
+    budget from settings).
+    """
+    deadline = deadline or DeadlineBudget.from_settings()
+    return [
+        Stage(
+            name="planner",
+            run=partial(_planner_stage, session_id, deadline=deadline),
+            inputs=("chat_data",),
+            outputs=("planner_result",),
+            detail="Planned the topics you need to cover…",
+        ),
+        Stage(
+            name="policy_research",
+            run=partial(_policy_research_stage, session_id, deadline=deadline),
+            inputs=("chat_data", "planner_result"),
+            outputs=("policy_result",),
+            detail="Searched company policy documents…",
+        ),
+        Stage(
+            name="internet_research",
+            run=partial(_internet_research_stage, session_id, deadline=deadline),
+            inputs=("planner_result",),
+            outputs=("researcher_result",),
+            detail="Researched the best resources for you…",
+        ),
+        Stage(
+            name="roadmap_creator",
+            run=partial(_roadmap_creator_stage, session_id, deadline=deadline),
+            inputs=("chat_data", "researcher_result", "policy_result"),
+            outputs=("roadmap_data",),
+            detail="Generated the roadmap structure…",
+        ),
+    ]
+
+
+async def _finish_roadmap(session_id: str, roadmap_data: dict[str, Any]) -> None:
+    """Assign IDs to a roadmap and publish it as completed.
+
+    Sections that were streamed earlier keep their IDs; everything else
+    (including every cache hit, which is stored without IDs) gets fresh
+    ones.
+    """
+    roadmap = post_process_roadmap(copy.deepcopy(roadmap_data))
+
+    logger.info("roadmap_processed", session_id=session_id, roadmap=roadmap)
+    await get_redis().set(f"roadmap:{session_id}", json.dumps(roadmap), ex=3600)
+    emit_artifact(session_id, "roadmap", roadmap)
+
+    await _publish_progress(
+        session_id,
+        status="completed",
+        step="done",
+        detail="Your roadmap is ready!",
+        progress_pct=100,
+        roadmap=roadmap,
+    )
+
+
+async def _publish_section(
+    session_id: str, section_index: int, section: dict[str, Any]
+) -> None:
+    """Publish a ``section_ready`` event for a roadmap section.
+
+    Sections are also appended to a Redis list so a client that
+    reconnects mid-generation can replay them.  The latest-state key is
+    left untouched so the overall progress survives reconnection.
+    """
+    payload = {
+        "session_id": session_id,
+        "status": "in_progress",
+        "step": "section_ready",
+        "detail": f"“{section.get('title', '')}” is ready",
+        "section_index": section_index,
+        "section": section,
+    }
+    raw = json.dumps(payload)
+
+    redis = get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.rpush(roadmap_sections_key(session_id), raw)
+        pipe.expire(roadmap_sections_key(session_id), 3600)
+        pipe.publish(roadmap_channel(session_id), raw)
+        await pipe.execute()
 
-async def curate_roadmap(session_id: str, chat_data: dict[str, Any]) -> None:
+
+async def curate_roadmap(
+    session_id: str,
+    chat_data: dict[str, Any],
+    *,
+    resume: bool = False,
+    use_cache: bool = True,
+    user_id: str | None = None,
+) -> bool:
     """Orchestrate roadmap curation and publish progress via Redis.
 
     This is the main entrypoint that should be called as a background
@@ -129,13 +680,219 @@ async def curate_roadmap(session_id: str, chat_data: dict[str, Any]) -> None:
     chat_data:
         Dictionary with at least ``title``, ``initial_message``, and
         ``question_answers`` from the Chat model.
+    resume:
+        Reuse stage checkpoints from a previous, interrupted run for the
+        same inputs instead of recomputing those stages.
+    use_cache:
+        Serve (and populate) the content-addressed roadmap cache.  Set to
+        ``False`` to force a fresh generation.
+    user_id:
+        Owner of the chat, for the per-user concurrency limit (the
+        session counts as its own user when omitted).
+
+    Returns
+    -------
+    bool
+        ``True`` when the roadmap was published, ``False`` when the run
+        failed or was cancelled (the error is already published).
+
+    Notes
+    -----
+    Token usage of every LLM call in the run is collected per stage and
+    added to the chat's ``token_consumed`` in one write at the end.
+
+    The run first waits for an admission slot (see ``admission.py``);
+    while queued it publishes ``queued`` events with its position.
+    """
+    admission = get_admission_controller()
+    with (
+        span("curate_roadmap", **{SESSION_ATTRIBUTE: session_id}) as root,
+        track_usage(session_id) as usage,
+    ):
+        try:
+            async with admission.admit(
+                session_id,
+                user_id or session_id,
+                on_queued=partial(_publish_queued, session_id),
+            ):
+                return await _curate_roadmap(
+                    session_id, chat_data, resume=resume, use_cache=use_cache
+                )
+        except asyncio.CancelledError as exc:
+            if is_handoff(exc):
+                raise
+            # Cancelled while still queued (running stages publish it)
+            await publish_cancelled(session_id)
+            return False
+        finally:
+            if root:
+                root.set_attribute("llm.total_tokens", usage.total_tokens)
+            await _record_token_usage(usage)
+
+
+async def _record_token_usage(usage: UsageTracker) -> None:
+    if not usage.stages:
+        return
+    logger.info(
+        "roadmap_token_usage",
+        session_id=usage.session_id,
+        total_tokens=usage.total_tokens,
+        cost_usd=round(usage.cost_usd, 6),
+        stages=usage.as_dict(),
+    )
+    try:
+        async with AsyncSessionLocal() as db_session:
+            await ChatService.add_token_usage(
+                db_session,
+                UUID(usage.session_id),
+                usage.total_tokens,
+                usage.as_dict(),
+            )
+    except (SQLAlchemyError, ValueError) as exc:
+        logger.warning(
+            "token_usage_write_failed", session_id=usage.session_id, error=str(exc)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Speculative pre-execution
+# ---------------------------------------------------------------------------
+
+_SPECULATIVE_STAGES = ("planner",)
+_SPECULATIVE_RESEARCH_STAGES = ("policy_research", "internet_research")
+
+
+def schedule_speculation(
+    session_id: str, chat_data: dict[str, Any], user_id: str | None = None
+) -> None:
+    """Start the planner in the background for a questionnaire in progress.
+
+    Does nothing until ``SPECULATIVE_MIN_ANSWERS`` questions are answered.
+    A run already in flight is kept while its answers would still be
+    adopted for ``chat_data``; otherwise it is cancelled and replaced.
+    ``user_id`` counts the run against its owner's admission limit.
+    """
+    if answered_count(chat_data) < settings.speculative_min_answers:
+        return
+
+    in_flight = _speculations.get(session_id)
+    if in_flight is not None and not in_flight[0].done():
+        similarity = answers_similarity(
+            normalize_chat_data(in_flight[1]), normalize_chat_data(chat_data)
+        )
+        if similarity >= settings.speculative_match_threshold:
+            return
+        in_flight[0].cancel()
+
+    snapshot = copy.deepcopy(chat_data)
+    task = asyncio.create_task(_speculate(session_id, snapshot, user_id))
+    _speculations[session_id] = (task, snapshot)
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    task.add_done_callback(partial(_forget_speculation, session_id))
+
+
+def _forget_speculation(session_id: str, task: asyncio.Task) -> None:
+    in_flight = _speculations.get(session_id)
+    if in_flight is not None and in_flight[0] is task:
+        del _speculations[session_id]
+
+
+def cancel_speculation(session_id: str) -> None:
+    """Stop this process's in-flight speculative run for ``session_id``."""
+    in_flight = _speculations.pop(session_id, None)
+    if in_flight is not None:
+        in_flight[0].cancel()
+
+
+async def _speculate(
+    session_id: str, chat_data: dict[str, Any], user_id: str | None = None
+) -> None:
+    """Run the early stages for ``chat_data`` and store their outputs.
+
+    Speculation is optional work: it only runs on an admission slot that is
+    free right now (it never queues) and within a fresh deadline budget.
     """
-    logger.info("roadmap_curation_started", session_id=session_id)
+    store = SpeculationStore(session_id)
+    if await store.covers(chat_data):
+        return
+
+    # A separate admission entry: the real run for this session may queue
+    # while the speculative one still holds its slot
+    admission = get_admission_controller()
+    async with admission.try_admit(
+        f"{session_id}:speculative", user_id or session_id
+    ) as admitted:
+        if not admitted:
+            logger.info("speculation_skipped_no_slot", session_id=session_id)
+            return
+        await _run_speculation(session_id, chat_data, store)
+
+
+async def _run_speculation(
+    session_id: str, chat_data: dict[str, Any], store: SpeculationStore
+) -> None:
+    names = _SPECULATIVE_STAGES
+    if settings.speculative_include_research:
+        names += _SPECULATIVE_RESEARCH_STAGES
+    deadline = DeadlineBudget.from_settings()
+    stages = [s for s in build_roadmap_stages(session_id, deadline) if s.name in names]
+
+    logger.info("speculation_started", session_id=session_id, stages=list(names))
+    with (
+        span("speculate_roadmap", **{SESSION_ATTRIBUTE: session_id}),
+        track_usage(session_id) as usage,
+    ):
+        try:
+            state = await run_stages(stages, {"chat_data": chat_data})
+        except asyncio.CancelledError:
+            logger.info("speculation_cancelled", session_id=session_id)
+            raise
+        except Exception as exc:
+            logger.warning("speculation_failed", session_id=session_id, error=str(exc))
+            return
+        finally:
+            # Atomic: the chat request and the real run may write at once
+            await _record_token_usage(usage)
+
+    # Results cut short by a stage budget are not worth reusing
+    if deadline.notes:
+        logger.info(
+            "speculation_discarded_partial",
+            session_id=session_id,
+            stages=sorted(deadline.notes),
+        )
+        return
+    outputs = {
+        stage.name: {key: state[key] for key in stage.outputs} for stage in stages
+    }
+    await store.save(chat_data, outputs)
+    logger.info("speculation_stored", session_id=session_id)
+
 
-    loop = asyncio.get_running_loop()
+async def _curate_roadmap(
+    session_id: str,
+    chat_data: dict[str, Any],
+    *,
+    resume: bool,
+    use_cache: bool,
+) -> bool:
+    logger.info("roadmap_curation_started", session_id=session_id, resume=resume)
+    deadline = DeadlineBudget.from_settings()
+
+    async def _on_stage_complete(stage: Stage, completed: int, total: int) -> None:
+        degraded = deadline.degraded(stage.name)
+        await _publish_progress(
+            session_id,
+            status="in_progress",
+            step=f"{stage.name}_partial" if degraded else stage.name,
+            detail=deadline.notes[stage.name] if degraded else stage.detail,
+            progress_pct=10 + (85 * completed) // total,
+        )
 
     try:
         # Step 1 — Acknowledge start
+        await clear_streamed_sections(session_id)
         await _publish_progress(
             session_id,
             status="in_progress",
@@ -146,182 +903,72 @@ async def curate_roadmap(session_id: str, chat_data: dict[str, Any]) -> None:
         redis = get_redis()
         await redis.set(f"chat_data:{session_id}", json.dumps(chat_data), ex=3600)
 
-        # Step 2 — Research phase
-        await _publish_progress(
-            session_id,
-            status="in_progress",
-            step="researching",
-            detail="Researching the best resources for you…",
-            progress_pct=30,
-        )
-        # Run blocking agent calls in a thread so the event loop stays free
-        planner_result = await loop.run_in_executor(
-            None,
-            lambda: planner_agent.invoke(
-                {"messages": [{"role": "user", "content": json.dumps(chat_data)}]}
-            ),
-        )
-        planner_result_serializable = _serialize_agent_result(planner_result)
-        logger.info(
-            "planner_result", session_id=session_id, result=planner_result_serializable
-        )
-        await redis.set(
-            f"planner_result:{session_id}",
-            json.dumps(planner_result_serializable),
-            ex=3600,
-        )
-
-        # Step 2b — Policy research (RAG) for company-policy items
-        # Extract policy-related items from the planner output and run
-        # the policy researcher agent in parallel with the internet researcher.
-        policy_result_serializable: dict[str, Any] | None = None
-        try:
-            structured = planner_result_serializable.get("structured_response", {})
-            # structured_response may be a list or a single dict depending
-            # on the planner output format
-            todo_items: list[dict[str, Any]] = []
-            if isinstance(structured, list):
-                todo_items = structured
-            elif isinstance(structured, dict) and "items" in structured:
-                todo_items = structured["items"]
-
-            # Check if any planner item targets company_policy_search
-            policy_items = [
-                item
-                for item in todo_items
-                if isinstance(item, dict)
-                and item.get("agent") == "company_policy_search"
-            ]
-
-            if policy_items:
-                await _publish_progress(
-                    session_id,
-                    status="in_progress",
-                    step="policy_research",
-                    detail="Searching company policy documents…",
-                    progress_pct=40,
-                )
-                policy_query = json.dumps(
-                    {"chat_data": chat_data, "policy_items": policy_items}
-                )
-                policy_result = await loop.run_in_executor(
-                    None,
-                    lambda: policy_researcher_agent.invoke(
-                        {"messages": [{"role": "user", "content": policy_query}]}
-                    ),
-                )
-                policy_result_serializable = _serialize_agent_result(policy_result)
+        # Step 2 — Serve an equivalent questionnaire's roadmap if cached
+        cache = RoadmapCache() if use_cache and settings.roadmap_cache_enabled else None
+        cache_fingerprint = chat_data_fingerprint(chat_data)
+        if cache is not None:
+            cached = await cache.get(cache_fingerprint)
+            if cached is not None:
                 logger.info(
-                    "policy_research_result",
+                    "roadmap_cache_hit",
                     session_id=session_id,
-                    result=policy_result_serializable,
-                )
-                await redis.set(
-                    f"policy_result:{session_id}",
-                    json.dumps(policy_result_serializable),
-                    ex=3600,
+                    fingerprint=cache_fingerprint,
                 )
-        except Exception as policy_exc:
-            logger.warning(
-                "policy_research_skipped",
+                await _finish_roadmap(session_id, cached)
+                return True
+            logger.info(
+                "roadmap_cache_miss",
                 session_id=session_id,
-                reason=str(policy_exc),
+                fingerprint=cache_fingerprint,
             )
 
-        # Step 3 — Planning
-        await _publish_progress(
-            session_id,
-            status="in_progress",
-            step="planning",
-            detail="Building your personalised learning roadmap…",
-            progress_pct=60,
-        )
-        researcher_result = await loop.run_in_executor(
-            None,
-            lambda: researcher_agent.invoke(
-                {
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": json.dumps(planner_result_serializable),
-                        }
-                    ]
-                }
-            ),
-        )
-        researcher_result_serializable = _serialize_agent_result(researcher_result)
-        logger.info(
-            "researcher_result",
-            session_id=session_id,
-            result=researcher_result_serializable,
-        )
-        await redis.set(
-            f"researcher_result:{session_id}",
-            json.dumps(researcher_result_serializable),
-            ex=3600,
-        )
-
-        with open("temp/debug_researcher.json", "w") as f:
-            json.dump(researcher_result_serializable, f, indent=2)
-
-        # Step 4 — Generating roadmap structure
-        await _publish_progress(
-            session_id,
-            status="in_progress",
-            step="generating_roadmap",
-            detail="Generating the roadmap structure…",
-            progress_pct=85,
+        # Step 3 — Run the stage graph (research branches run concurrently),
+        # skipping stages a matching speculative run already completed
+        checkpoints = StageCheckpoints(session_id, resume=resume)
+        if settings.speculative_planning_enabled:
+            cancel_speculation(session_id)
+            speculative = await SpeculationStore(session_id).take(chat_data)
+            if speculative:
+                checkpoints = SpeculativeCheckpoints(checkpoints, speculative)
+        state = await run_stages(
+            build_roadmap_stages(session_id, deadline),
+            {"chat_data": chat_data},
+            on_stage_complete=_on_stage_complete,
+            checkpoints=checkpoints,
         )
+        roadmap_data = state["roadmap_data"]
+        # Roadmaps built from partial research are served but not cached
+        if cache is not None and not deadline.notes:
+            await cache.set(cache_fingerprint, strip_roadmap_ids(roadmap_data))
 
-        roadmap_input = json.dumps(
-            {
-                "chat_data": chat_data,
-                "researcher_output": researcher_result_serializable,
-                **(
-                    {"policy_research": policy_result_serializable}
-                    if policy_result_serializable
-                    else {}
-                ),
-            }
-        )
-        roadmap_raw = await loop.run_in_executor(
-            None,
-            lambda: roadmap_creator_agent.invoke(
-                {"messages": [{"role": "user", "content": roadmap_input}]}
-            ),
-        )
-        logger.info("roadmap_raw", session_id=session_id, result=roadmap_raw)
-
-        roadmap_data = get_structured_output_parser(roadmap_raw)
-        roadmap = post_process_roadmap(roadmap_data)
-
-        logger.info("roadmap_processed", session_id=session_id, roadmap=roadmap)
-        await redis.set(f"roadmap:{session_id}", json.dumps(roadmap), ex=3600)
-
-        with open("temp/debug_roadmap.json", "w") as f:
-            json.dump(roadmap, f, indent=2)
-
-        # Step 5 — Done
-        await _publish_progress(
-            session_id,
-            status="completed",
-            step="done",
-            detail="Your roadmap is ready!",
-            progress_pct=100,
-            roadmap=roadmap,
-        )
+        # Step 4 — Done
+        await _finish_roadmap(session_id, roadmap_data)
 
         logger.info("roadmap_curation_completed", session_id=session_id)
+        return True
 
-    except asyncio.CancelledError:
+    except asyncio.CancelledError as exc:
+        if is_handoff(exc):
+            # Not cancelled for the user: the job runs again elsewhere
+            logger.warning("roadmap_curation_handed_off", session_id=session_id)
+            raise
         logger.warning("roadmap_curation_cancelled", session_id=session_id)
+        await publish_cancelled(session_id)
+        return False
+    except TimeoutError:
+        logger.error(
+            "roadmap_curation_timed_out",
+            session_id=session_id,
+            elapsed_seconds=round(deadline.elapsed(), 1),
+        )
         await _publish_progress(
             session_id,
             status="error",
-            step="cancelled",
-            detail="Roadmap generation was cancelled.",
+            step="timed_out",
+            detail="Creating your roadmap took too long. Please try again.",
             progress_pct=0,
         )
+        return False
     except Exception as exc:
         logger.error("roadmap_curation_failed", session_id=session_id, error=str(exc))
         await _publish_progress(
@@ -331,3 +978,4 @@ async def curate_roadmap(session_id: str, chat_data: dict[str, Any]) -> None:
             detail=f"Something went wrong while creating your roadmap: {exc}",
             progress_pct=0,
         )
+        return False
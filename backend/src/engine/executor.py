@@ -0,0 +1,118 @@
+"""Dedicated, bounded thread pool for blocking engine work.
+
+Agents run natively on the event loop via ``ainvoke``; only genuinely
+blocking calls (DuckDuckGo search, the synchronous Chroma client, …) are
+offloaded here.  Keeping them off the loop's *default* executor means a
+burst of roadmap generations cannot starve unrelated request handlers,
+and the pool can be sized and observed independently.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import structlog
+
+from ..core.config import settings
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class EngineExecutor:
+    """A named ``ThreadPoolExecutor`` that tracks queue depth and activity."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _call(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                if not ok:
+                    self._failed += 1
+
+    def _on_done(self, future: Future) -> None:
+        # A job cancelled while still queued never reaches ``_call``
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        Context variables (e.g. structlog bindings) are propagated to the
+        worker thread.
+        """
+        with self._lock:
+            self._queued += 1
+            queued = self._queued
+        if queued > 1 and self._active >= self.max_workers:
+            logger.warning("engine_executor_saturated", **self.stats())
+
+        ctx = contextvars.copy_context()
+        future = self._pool.submit(ctx.run, self._call, fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of pool utilisation."""
+        with self._lock:
+            return {
+                "executor": self.name,
+                "max_workers": self.max_workers,
+                "active_workers": self._active,
+                "queue_depth": self._queued,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: EngineExecutor | None = None
+
+
+def get_engine_executor() -> EngineExecutor:
+    """Return the process-wide engine executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = EngineExecutor(
+            name="engine",
+            max_workers=settings.engine_executor_max_workers,
+        )
+    return _executor
+
+
+def shutdown_engine_executor() -> None:
+    """Stop the engine executor (call on app / worker shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+        logger.info("engine_executor_closed")
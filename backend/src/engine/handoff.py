@@ -0,0 +1,68 @@
+"""Stage-handoff contract: what one agent stage passes to the next.
+
+A serialised agent result carries the whole LangChain transcript — tool
+calls, raw search dumps, intermediate reasoning.  Downstream agents only
+need the ``structured_response``, so :func:`to_handoff` strips the
+transcript (optionally keeping short tool-result snippets for citation)
+and logs how many input tokens that saves.  The full transcript stays
+available to the log / artifact path.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import structlog
+
+from ..core.config import settings
+from .utils.tokens import count_tokens
+
+logger = structlog.get_logger()
+
+
+def _tool_snippets(messages: list[Any], max_chars: int) -> list[dict[str, str]]:
+    """Return truncated tool results from a serialised transcript."""
+    snippets: list[dict[str, str]] = []
+    for message in messages:
+        if not isinstance(message, dict) or message.get("type") != "tool":
+            continue
+        content = message.get("content")
+        if not isinstance(content, str) or not content.strip():
+            continue
+        snippets.append(
+            {"tool": message.get("name") or "tool", "snippet": content[:max_chars]}
+        )
+    return snippets
+
+
+def to_handoff(session_id: str, stage: str, result: dict[str, Any]) -> dict[str, Any]:
+    """Reduce a serialised agent result to what the next stage needs.
+
+    With ``STAGE_HANDOFF_MODE=full`` the result is forwarded unchanged.
+    Otherwise only ``structured_response`` is kept, plus tool-result
+    snippets of up to ``HANDOFF_SNIPPET_CHARS`` characters when that
+    setting is positive.
+    """
+    if settings.stage_handoff_mode == "full":
+        return result
+
+    handoff: dict[str, Any] = {"structured_response": result.get("structured_response")}
+    if settings.handoff_snippet_chars > 0:
+        snippets = _tool_snippets(
+            result.get("messages", []), settings.handoff_snippet_chars
+        )
+        if snippets:
+            handoff["snippets"] = snippets
+
+    full_tokens = count_tokens(json.dumps(result, default=str))
+    handoff_tokens = count_tokens(json.dumps(handoff, default=str))
+    logger.info(
+        "stage_handoff",
+        session_id=session_id,
+        stage=stage,
+        full_tokens=full_tokens,
+        handoff_tokens=handoff_tokens,
+        saved_tokens=full_tokens - handoff_tokens,
+    )
+    return handoff
@@ -0,0 +1,328 @@
+"""Durable roadmap job queue backed by Redis Streams.
+
+Jobs are appended to a stream and consumed through a consumer group, so
+any number of workers (``python -m src.engine.worker``) on any number of
+nodes share the load and a job survives API or worker restarts.
+
+Delivery semantics
+------------------
+* A job stays in the group's pending list until it is acknowledged.
+* Workers heartbeat long-running jobs; a job whose worker stops
+  heartbeating for ``visibility_timeout`` is reclaimed by another worker
+  via ``XAUTOCLAIM``.  A heartbeat only refreshes an entry its consumer
+  still owns, so a stalled worker cannot take a reclaimed job back; it
+  learns it lost the job and stops running it.
+* A failed job is re-enqueued with ``attempt + 1`` and ``resume`` set,
+  so stages that already completed are served from their checkpoints.
+  Once it has used up ``max_attempts`` (failures *or* lost deliveries)
+  it is moved to the dead-letter stream.
+
+The queue takes any ``redis.asyncio``-compatible client, so a local Redis
+or ``fakeredis.aioredis.FakeRedis`` can stand in for tests.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import redis.asyncio as aioredis
+import structlog
+from redis.exceptions import ResponseError
+
+from ..core.config import settings
+from ..core.redis import (
+    ROADMAP_JOBS_DEAD_LETTER_STREAM,
+    ROADMAP_JOBS_GROUP,
+    ROADMAP_JOBS_STREAM,
+    get_redis,
+)
+from .lease import SessionLease
+
+logger = structlog.get_logger()
+
+# Reset the entry's idle time only if ``consumer`` still owns it.
+_HEARTBEAT_SCRIPT = """
+local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[2], ARGV[2], 1)
+if #pending == 0 or pending[1][2] ~= ARGV[3] then
+    return 0
+end
+redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[3], 0, ARGV[2], 'JUSTID')
+return 1
+"""
+
+
+@dataclass
+class RoadmapJob:
+    """A roadmap generation job as read from the stream."""
+
+    message_id: str
+    session_id: str
+    chat_data: dict[str, Any]
+    attempt: int
+    enqueued_at: float
+    resume: bool = False
+    use_cache: bool = True
+    lease_token: str = ""
+    user_id: str = ""
+
+    @classmethod
+    def from_fields(cls, message_id: str, fields: dict[str, str]) -> RoadmapJob:
+        return cls(
+            message_id=message_id,
+            session_id=fields["session_id"],
+            chat_data=json.loads(fields["chat_data"]),
+            attempt=int(fields.get("attempt", 1)),
+            enqueued_at=float(fields.get("enqueued_at", 0)),
+            resume=fields.get("resume") == "1",
+            use_cache=fields.get("use_cache", "1") == "1",
+            lease_token=fields.get("lease_token", ""),
+            user_id=fields.get("user_id", ""),
+        )
+
+    def to_fields(self) -> dict[str, str]:
+        return {
+            "session_id": self.session_id,
+            "chat_data": json.dumps(self.chat_data),
+            "attempt": str(self.attempt),
+            "enqueued_at": str(self.enqueued_at),
+            "resume": "1" if self.resume else "0",
+            "use_cache": "1" if self.use_cache else "0",
+            "lease_token": self.lease_token,
+            "user_id": self.user_id,
+        }
+
+
+class RoadmapJobQueue:
+    """Producer / consumer operations on the roadmap jobs stream."""
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None = None,
+        *,
+        stream: str = ROADMAP_JOBS_STREAM,
+        group: str = ROADMAP_JOBS_GROUP,
+        dead_letter_stream: str = ROADMAP_JOBS_DEAD_LETTER_STREAM,
+        visibility_timeout_ms: int | None = None,
+        max_attempts: int | None = None,
+        maxlen: int = 10_000,
+    ) -> None:
+        self.redis = redis or get_redis()
+        self.stream = stream
+        self.group = group
+        self.dead_letter_stream = dead_letter_stream
+        self.visibility_timeout_ms = visibility_timeout_ms or (
+            settings.job_visibility_timeout_seconds * 1000
+        )
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.maxlen = maxlen
+        # XAUTOCLAIM scans the pending list in pages; resume where it stopped
+        self._claim_cursor = "0-0"
+
+    # -- Producer ----------------------------------------------------------
+
+    async def enqueue(
+        self,
+        session_id: str,
+        chat_data: dict[str, Any],
+        *,
+        attempt: int = 1,
+        resume: bool = False,
+        use_cache: bool = True,
+        lease_token: str = "",
+        user_id: str = "",
+    ) -> str:
+        """Append a job to the stream and return its message id.
+
+        ``lease_token`` is the session lease taken by the caller; the
+        worker adopts it when it starts the job.
+        """
+        job = RoadmapJob(
+            message_id="",
+            session_id=session_id,
+            chat_data=chat_data,
+            attempt=attempt,
+            enqueued_at=time.time(),
+            resume=resume,
+            use_cache=use_cache,
+            lease_token=lease_token,
+            user_id=user_id,
+        )
+        message_id = await self.redis.xadd(
+            self.stream, job.to_fields(), maxlen=self.maxlen, approximate=True
+        )
+        logger.info(
+            "roadmap_job_enqueued",
+            session_id=session_id,
+            message_id=message_id,
+            attempt=attempt,
+        )
+        return message_id
+
+    # -- Consumer ----------------------------------------------------------
+
+    async def ensure_group(self) -> None:
+        """Create the stream and consumer group if they don't exist yet."""
+        try:
+            await self.redis.xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def read(
+        self, consumer: str, count: int, block_ms: int = 5000
+    ) -> list[RoadmapJob]:
+        """Read up to ``count`` new jobs for ``consumer`` (blocking)."""
+        response = await self.redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.stream: ">"},
+            count=count,
+            block=block_ms,
+        )
+        jobs: list[RoadmapJob] = []
+        for _stream, messages in response or []:
+            for message_id, fields in messages:
+                jobs.append(RoadmapJob.from_fields(message_id, fields))
+        return jobs
+
+    async def claim_stale(self, consumer: str, count: int) -> list[RoadmapJob]:
+        """Take over jobs whose worker stopped heartbeating.
+
+        Jobs that have already used up their attempts are dead-lettered
+        instead of being returned.
+        """
+        response = await self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=self.visibility_timeout_ms,
+            start_id=self._claim_cursor,
+            count=count,
+        )
+        # "0-0" once the scan has reached the end of the pending list
+        self._claim_cursor = response[0] or "0-0"
+        messages = response[1] if len(response) > 1 else []
+
+        jobs: list[RoadmapJob] = []
+        for message_id, fields in messages:
+            if not fields:
+                # Entry was trimmed from the stream; nothing to run
+                await self.redis.xack(self.stream, self.group, message_id)
+                continue
+            job = RoadmapJob.from_fields(message_id, fields)
+            pending = await self.redis.xpending_range(
+                self.stream, self.group, min=message_id, max=message_id, count=1
+            )
+            deliveries = pending[0]["times_delivered"] if pending else 1
+            job.attempt += deliveries - 1
+            logger.warning(
+                "roadmap_job_reclaimed",
+                session_id=job.session_id,
+                message_id=message_id,
+                attempt=job.attempt,
+            )
+            if job.attempt > self.max_attempts:
+                await self.dead_letter(job, reason="visibility timeout exceeded")
+                continue
+            jobs.append(job)
+        return jobs
+
+    async def heartbeat(self, consumer: str, job: RoadmapJob) -> bool:
+        """Reset the job's idle time so it is not reclaimed while running.
+
+        Returns ``False`` when ``consumer`` no longer owns the job (another
+        worker reclaimed it, or it was settled); nothing is changed then.
+        """
+        owned = await self.redis.eval(
+            _HEARTBEAT_SCRIPT,
+            1,
+            self.stream,
+            self.group,
+            job.message_id,
+            consumer,
+        )
+        return bool(owned)
+
+    async def ack(self, job: RoadmapJob) -> None:
+        """Mark a job as done and drop it from the stream."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, job.message_id)
+            pipe.xdel(self.stream, job.message_id)
+            await pipe.execute()
+
+    async def retry(self, job: RoadmapJob, reason: str) -> bool:
+        """Re-enqueue a failed job, or dead-letter it when out of attempts.
+
+        Returns ``True`` if the job was re-enqueued.
+        """
+        if job.attempt >= self.max_attempts:
+            await self.dead_letter(job, reason=reason)
+            return False
+
+        retry_job = RoadmapJob(
+            message_id="",
+            session_id=job.session_id,
+            chat_data=job.chat_data,
+            attempt=job.attempt + 1,
+            enqueued_at=time.time(),
+            resume=True,
+            use_cache=job.use_cache,
+            lease_token=job.lease_token,
+            user_id=job.user_id,
+        )
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                self.stream,
+                retry_job.to_fields(),
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+            pipe.xack(self.stream, self.group, job.message_id)
+            pipe.xdel(self.stream, job.message_id)
+            await pipe.execute()
+        logger.warning(
+            "roadmap_job_retried",
+            session_id=job.session_id,
+            attempt=retry_job.attempt,
+            reason=reason,
+        )
+        return True
+
+    async def dead_letter(self, job: RoadmapJob, reason: str) -> None:
+        """Move a job to the dead-letter stream and acknowledge it.
+
+        The job's session lease is released, so the session can be
+        triggered again right away.
+        """
+        fields = {**job.to_fields(), "reason": reason, "failed_at": str(time.time())}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_stream, fields, maxlen=self.maxlen)
+            pipe.xack(self.stream, self.group, job.message_id)
+            pipe.xdel(self.stream, job.message_id)
+            await pipe.execute()
+        if job.lease_token:
+            await SessionLease(
+                job.session_id, job.lease_token, redis=self.redis
+            ).release()
+        logger.error(
+            "roadmap_job_dead_lettered",
+            session_id=job.session_id,
+            attempt=job.attempt,
+            reason=reason,
+        )
+
+    async def stats(self) -> dict[str, Any]:
+        """Return stream length, pending count and dead-letter length."""
+        length = await self.redis.xlen(self.stream)
+        dead = await self.redis.xlen(self.dead_letter_stream)
+        try:
+            pending = await self.redis.xpending(self.stream, self.group)
+            pending_count = pending["pending"]
+        except ResponseError:
+            pending_count = 0
+        return {"length": length, "pending": pending_count, "dead_letter": dead}
@@ -0,0 +1,31 @@
+"""Rolling window of recent pipeline stage latencies (per process).
+
+The pipeline records how long every executed stage took; admission
+control uses the recent means to estimate how long a queued session
+will wait.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict, deque
+
+_WINDOW = 50
+
+_latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=_WINDOW))
+_lock = threading.Lock()
+
+
+def record_stage_latency(stage: str, seconds: float) -> None:
+    with _lock:
+        _latencies[stage].append(seconds)
+
+
+def stage_latency_means() -> dict[str, float]:
+    """Return the mean of the recent durations of each stage, in seconds."""
+    with _lock:
+        return {
+            stage: sum(window) / len(window)
+            for stage, window in _latencies.items()
+            if window
+        }
@@ -0,0 +1,251 @@
+"""Per-session generation lease and cooperative cancellation.
+
+Only one roadmap generation may run per session.  The trigger acquires
+a lease (``SET NX PX``) holding a random token; while it is held, further
+triggers attach to the running generation instead of starting another.
+Whoever runs the job — the API process or a queue worker — adopts the
+lease by token, renews it while running and releases it when done, so a
+crashed runner frees the session after ``ROADMAP_LEASE_TTL_SECONDS``.
+
+Nothing renews the lease of a job waiting in the Redis queue, so it is
+taken for :func:`queued_lease_ttl_seconds` instead, and a job going back
+to the queue (worker shutdown, lost delivery, retry) has its lease
+extended the same way rather than released.  A worker cancels such runs
+with :data:`HANDOFF_CANCEL_MSG`: the job is not reported as cancelled
+and the lease stays with the token for the next runner to adopt.  A run
+that loses its lease (it expired and another trigger took the session)
+is stopped the same way: the new owner is still generating the roadmap.
+
+Cancelling sets a flag next to the lease.  :func:`run_with_lease` polls
+it while the job runs (cancellation may come from any API process) and
+cancels the job, which makes ``curate_roadmap`` publish its "cancelled"
+event.  The flag lives as long as the lease, so it also reaches a job
+that is still queued.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import secrets
+import time
+from collections.abc import Awaitable, Callable
+from typing import Literal
+
+import redis.asyncio as aioredis
+import structlog
+
+from ..core.config import settings
+from ..core.redis import get_redis, roadmap_cancel_key, roadmap_lease_key
+
+logger = structlog.get_logger()
+
+Outcome = Literal["completed", "failed", "cancelled", "duplicate", "lost"]
+
+# Cancellation message meaning "this job continues on another runner"
+HANDOFF_CANCEL_MSG = "roadmap_job_handed_off"
+
+
+def is_handoff(exc: asyncio.CancelledError) -> bool:
+    """Whether ``exc`` cancels a run that is handed back to the queue."""
+    return HANDOFF_CANCEL_MSG in exc.args
+
+
+def queued_lease_ttl_seconds() -> float:
+    """Lease TTL covering a wait in the job queue plus a lost delivery."""
+    return settings.roadmap_queue_wait_seconds + settings.job_visibility_timeout_seconds
+
+
+# Set the lease if it is free or already ours; extend it either way.
+_CLAIM_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder == false or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SessionLease:
+    """Redis lease guarding one session's roadmap generation.
+
+    Parameters
+    ----------
+    session_id:
+        The chat / roadmap session identifier.
+    token:
+        Token of an existing lease to adopt (e.g. from a queued job);
+        a new one is generated when omitted.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        token: str | None = None,
+        *,
+        redis: aioredis.Redis | None = None,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        self.session_id = session_id
+        self.token = token or secrets.token_hex(16)
+        self.redis = redis or get_redis()
+        self.ttl_ms = int((ttl_seconds or settings.roadmap_lease_ttl_seconds) * 1000)
+        self.key = roadmap_lease_key(session_id)
+
+    async def acquire(self) -> bool:
+        """Take the lease if no generation holds it."""
+        acquired = await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms)
+        if acquired:
+            # A stale flag from an earlier run must not cancel this one
+            await self.redis.delete(roadmap_cancel_key(self.session_id))
+        return bool(acquired)
+
+    async def claim(self) -> bool:
+        """Take the lease if it is free or already ours (adopting it)."""
+        return bool(
+            await self.redis.eval(_CLAIM_SCRIPT, 1, self.key, self.token, self.ttl_ms)
+        )
+
+    async def renew(self) -> bool:
+        """Extend the lease; ``False`` means it was lost to another run."""
+        return bool(
+            await self.redis.eval(_RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms)
+        )
+
+    async def hold_for_queue(self) -> bool:
+        """Extend the lease to cover the job waiting in the queue again."""
+        ttl_ms = int(queued_lease_ttl_seconds() * 1000)
+        return bool(
+            await self.redis.eval(_RENEW_SCRIPT, 1, self.key, self.token, ttl_ms)
+        )
+
+    async def release(self) -> None:
+        await self.redis.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+
+
+async def request_cancel(session_id: str, redis: aioredis.Redis | None = None) -> bool:
+    """Ask the generation running for ``session_id`` to stop.
+
+    Returns ``False`` when no generation holds the session's lease,
+    running or queued.
+    """
+    redis = redis or get_redis()
+    lease_ttl_ms = await redis.pttl(roadmap_lease_key(session_id))
+    if lease_ttl_ms == -2:
+        return False
+    # A queued job may only start once its lease is nearly used up
+    await redis.set(
+        roadmap_cancel_key(session_id),
+        "1",
+        px=max(lease_ttl_ms, int(settings.roadmap_lease_ttl_seconds * 1000)) * 2,
+    )
+    logger.info("roadmap_cancel_requested", session_id=session_id)
+    return True
+
+
+async def run_with_lease(
+    lease: SessionLease,
+    run: Callable[[], Awaitable[bool]],
+    on_cancelled: Callable[[], Awaitable[None]],
+    *,
+    hold_on_failure: bool = False,
+) -> Outcome:
+    """Run ``run()`` while holding ``lease``, honouring cancel requests.
+
+    ``run`` is a ``curate_roadmap`` call returning ``True`` on success.
+    The lease is renewed every third of its TTL and the cancel flag is
+    checked every ``ROADMAP_CANCEL_POLL_SECONDS``.  Returns
+    ``"duplicate"`` without running anything when another run holds the
+    lease.  ``on_cancelled`` publishes the cancellation when it arrives
+    before ``run`` started (afterwards ``run`` reports it itself).
+
+    With ``hold_on_failure`` a failed run keeps the lease for the retry
+    the caller enqueues.  Cancelling the caller with
+    :data:`HANDOFF_CANCEL_MSG` cancels ``run`` the same way and keeps the
+    lease and any cancel flag for the runner that picks the job up next.
+
+    Returns ``"lost"`` when another run took over the lease meanwhile:
+    ``run`` is stopped with :data:`HANDOFF_CANCEL_MSG` (nothing is reported
+    to the user) and the lease and cancel flag are left to the new owner.
+    """
+    redis = lease.redis
+    cancel_key = roadmap_cancel_key(lease.session_id)
+    log = logger.bind(session_id=lease.session_id)
+
+    if not await lease.claim():
+        log.info("roadmap_lease_held_elsewhere")
+        return "duplicate"
+    if await redis.exists(cancel_key):
+        log.info("roadmap_cancelled_before_start")
+        await lease.release()
+        await redis.delete(cancel_key)
+        await on_cancelled()
+        return "cancelled"
+
+    job = asyncio.create_task(run())
+    renew_every = lease.ttl_ms / 1000 / 3
+    renewed_at = time.monotonic()
+    hold = False
+    handoff = False
+    lost = False
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {job}, timeout=settings.roadmap_cancel_poll_seconds
+            )
+            if done:
+                if job.result():
+                    return "completed"
+                hold = hold_on_failure
+                return "failed"
+
+            cancelled = bool(await redis.exists(cancel_key))
+            if cancelled or time.monotonic() - renewed_at >= renew_every:
+                # A cancel flag may be meant for whoever owns the lease now
+                if not await lease.renew():
+                    log.warning("roadmap_lease_lost")
+                    lost = True
+                    job.cancel(HANDOFF_CANCEL_MSG)
+                    await asyncio.gather(job, return_exceptions=True)
+                    return "lost"
+                renewed_at = time.monotonic()
+            if cancelled:
+                log.info("roadmap_cancelling")
+                # curate_roadmap publishes the "cancelled" event itself
+                job.cancel()
+                await asyncio.gather(job, return_exceptions=True)
+                return "cancelled"
+    except asyncio.CancelledError as exc:
+        handoff = is_handoff(exc)
+        if handoff:
+            log.info("roadmap_run_handed_off")
+        raise
+    finally:
+        if not job.done():
+            job.cancel(HANDOFF_CANCEL_MSG if handoff else None)
+            with contextlib.suppress(asyncio.CancelledError):
+                await job
+        if handoff:
+            # The cancel flag, if any, must reach the next runner too
+            await lease.hold_for_queue()
+        elif hold:
+            await lease.hold_for_queue()
+            await redis.delete(cancel_key)
+        elif not lost:
+            await lease.release()
+            await redis.delete(cancel_key)
@@ -0,0 +1,75 @@
+"""Periodic log of runtime stats, for the API process and workers.
+
+Every ``STATS_LOG_INTERVAL_SECONDS`` (``0`` disables it) a single
+``runtime_stats`` event reports:
+
+* ``engine_executor`` — busy workers, queue depth, completed / failed jobs
+* ``admission`` — running and queued roadmap generations
+* ``job_queue`` — stream length, pending and dead-letter jobs (only with
+  ``ROADMAP_QUEUE_BACKEND=redis``)
+* ``roadmap_cache`` — hits, misses, evictions, hit rate and entries
+* ``llm_cache`` — exact / semantic hits, misses and hit rate per call site
+
+Sources read from Redis are cluster-wide; the others cover this process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import structlog
+
+from ..core.config import settings
+from ..core.utils.ai_core.cache import llm_cache_stats
+from .admission import get_admission_controller
+from .executor import get_engine_executor
+from .job_queue import RoadmapJobQueue
+from .roadmap_cache import RoadmapCache
+
+logger = structlog.get_logger()
+
+
+def _sources() -> dict[str, Callable[[], Awaitable[dict[str, Any]]]]:
+    sources = {"admission": get_admission_controller().stats}
+    if settings.roadmap_queue_backend == "redis":
+        sources["job_queue"] = RoadmapJobQueue().stats
+    if settings.roadmap_cache_enabled:
+        sources["roadmap_cache"] = RoadmapCache().stats
+    return sources
+
+
+async def collect_stats() -> dict[str, Any]:
+    """Return the current stats of every source, skipping failing ones."""
+    stats: dict[str, Any] = {"engine_executor": get_engine_executor().stats()}
+    if llm_cache := llm_cache_stats():
+        stats["llm_cache"] = llm_cache
+    for name, read in _sources().items():
+        try:
+            stats[name] = await read()
+        except Exception as exc:
+            logger.warning("runtime_stats_failed", source=name, error=str(exc))
+    return stats
+
+
+async def _log_stats(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("runtime_stats", **await collect_stats())
+
+
+def start_stats_logging() -> asyncio.Task | None:
+    """Start logging stats every ``STATS_LOG_INTERVAL_SECONDS``."""
+    if settings.stats_log_interval_seconds <= 0:
+        return None
+    return asyncio.create_task(_log_stats(settings.stats_log_interval_seconds))
+
+
+async def stop_stats_logging(task: asyncio.Task | None) -> None:
+    if task is None:
+        return
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
@@ -1,13 +1,15 @@
-import os
-
 from dotenv import load_dotenv
 from langchain_openai.chat_models import ChatOpenAI
 
+from ...core.utils.ai_core.models import create_chat_model
+
 load_dotenv()
 
 
-llm = ChatOpenAI(
-    model_name=os.getenv("OPENAI_MODEL_NAME", "gpt-4"),
-    openai_api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=0,
-)
+def get_llm(call_site: str) -> ChatOpenAI:
+    """Return the chat model configured for an engine agent's call site.
+
+    Call sites: ``planner``, ``policy_researcher``, ``researcher`` and
+    ``roadmap_creator`` (see ``core/utils/ai_core/models.py``).
+    """
+    return create_chat_model(call_site)
@@ -0,0 +1,206 @@
+"""Small stage-graph executor for the roadmap curation pipeline.
+
+Each :class:`Stage` declares the state keys it reads (``inputs``) and the
+keys it produces (``outputs``).  :func:`run_stages` starts every stage as
+soon as all of its inputs are available, so independent stages (e.g. the
+policy researcher and the internet researcher) run concurrently instead
+of one after the other.
+
+The executor knows nothing about agents or Redis — callers pass an
+``on_stage_complete`` hook to publish progress as stages finish.  LLM
+token usage and trace spans inside a stage are attributed to the stage's
+name.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+import structlog
+
+from ..core.tracing import span
+from ..core.utils.ai_core.usage import usage_stage
+from .latency import record_stage_latency
+
+logger = structlog.get_logger()
+
+StageFn = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+StageHook = Callable[["Stage", int, int], Awaitable[None]]
+
+
+class Checkpointer(Protocol):
+    """Storage for stage outputs keyed by stage name and inputs."""
+
+    async def load(
+        self, stage: str, inputs: dict[str, Any]
+    ) -> dict[str, Any] | None: ...
+
+    async def save(
+        self, stage: str, inputs: dict[str, Any], outputs: dict[str, Any]
+    ) -> None: ...
+
+
+class PipelineError(Exception):
+    """Raised when a stage graph is invalid or a stage breaks its contract."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A single node of the pipeline graph.
+
+    Attributes
+    ----------
+    name:
+        Unique, machine-readable stage name (used in logs and progress).
+    run:
+        Coroutine function receiving a dict with exactly the declared
+        ``inputs`` and returning a dict with every declared ``output``.
+    inputs:
+        State keys that must be available before the stage can start.
+    outputs:
+        State keys the stage publishes for downstream stages.
+    detail:
+        Human-readable message published when the stage finishes.
+    """
+
+    name: str
+    run: StageFn
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    detail: str = ""
+
+
+def _validate(stages: list[Stage], initial_keys: Iterable[str]) -> None:
+    """Check names are unique, outputs are unique and the graph is acyclic."""
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise PipelineError(f"Duplicate stage names in pipeline: {names}")
+
+    available = set(initial_keys)
+    producers: dict[str, str] = {}
+    for stage in stages:
+        for key in stage.outputs:
+            if key in available or key in producers:
+                raise PipelineError(
+                    f"State key '{key}' is produced more than once "
+                    f"(stage '{stage.name}')"
+                )
+            producers[key] = stage.name
+
+    # Kahn-style walk: every stage must become runnable eventually
+    pending = list(stages)
+    while pending:
+        ready = [s for s in pending if all(k in available for k in s.inputs)]
+        if not ready:
+            missing = {
+                s.name: [k for k in s.inputs if k not in available] for s in pending
+            }
+            raise PipelineError(f"Unsatisfiable stage inputs: {missing}")
+        for stage in ready:
+            available.update(stage.outputs)
+            pending.remove(stage)
+
+
+async def _execute_stage(
+    stage: Stage, inputs: dict[str, Any], checkpoints: Checkpointer | None
+) -> dict[str, Any]:
+    """Run one stage, serving it from ``checkpoints`` when possible."""
+    if checkpoints is not None:
+        cached = await checkpoints.load(stage.name, inputs)
+        if cached is not None and all(key in cached for key in stage.outputs):
+            logger.info("pipeline_stage_resumed", stage=stage.name)
+            return cached
+
+    started = time.monotonic()
+    with span(f"stage.{stage.name}"), usage_stage(stage.name):
+        outputs = await stage.run(inputs)
+    record_stage_latency(stage.name, time.monotonic() - started)
+    missing = [key for key in stage.outputs if key not in outputs]
+    if missing:
+        raise PipelineError(f"Stage '{stage.name}' did not produce outputs: {missing}")
+
+    if checkpoints is not None:
+        await checkpoints.save(
+            stage.name, inputs, {key: outputs[key] for key in stage.outputs}
+        )
+    return outputs
+
+
+async def run_stages(
+    stages: list[Stage],
+    state: dict[str, Any],
+    *,
+    on_stage_complete: StageHook | None = None,
+    checkpoints: Checkpointer | None = None,
+) -> dict[str, Any]:
+    """Execute ``stages`` as a DAG, running independent stages concurrently.
+
+    Parameters
+    ----------
+    stages:
+        The stages to run.  Order does not matter; dependencies are
+        derived from each stage's ``inputs`` / ``outputs``.
+    state:
+        Initial state (e.g. ``{"chat_data": ...}``).  It is updated in
+        place with every stage's outputs and returned.
+    on_stage_complete:
+        Optional ``await hook(stage, completed_count, total)`` called each
+        time a stage finishes successfully.
+    checkpoints:
+        Optional store consulted before each stage runs and updated after
+        it succeeds, so an interrupted run can skip completed stages.
+
+    Raises
+    ------
+    PipelineError
+        If the graph is invalid or a stage omits a declared output.
+    Exception
+        The first exception raised by a stage; still-running stages are
+        cancelled before it propagates.
+    """
+    _validate(stages, state.keys())
+
+    pending = list(stages)
+    running: dict[asyncio.Task, Stage] = {}
+    completed = 0
+    total = len(stages)
+
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(k in state for k in s.inputs)]
+            for stage in ready:
+                pending.remove(stage)
+                inputs = {key: state[key] for key in stage.inputs}
+                logger.info("pipeline_stage_started", stage=stage.name)
+                task = asyncio.create_task(_execute_stage(stage, inputs, checkpoints))
+                running[task] = stage
+
+            done, _ = await asyncio.wait(
+                running.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                stage = running.pop(task)
+                outputs = task.result()
+                for key in stage.outputs:
+                    state[key] = outputs[key]
+
+                completed += 1
+                logger.info(
+                    "pipeline_stage_completed",
+                    stage=stage.name,
+                    completed=completed,
+                    total=total,
+                )
+                if on_stage_complete is not None:
+                    await on_stage_complete(stage, completed, total)
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return state
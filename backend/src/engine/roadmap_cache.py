@@ -0,0 +1,168 @@
+"""Content-addressed cache of generated roadmaps.
+
+New hires in the same role tend to answer the questionnaire almost
+identically, so the roadmap for one ``chat_data`` is usually right for
+the next.  ``chat_data`` is normalised (case, whitespace, punctuation,
+question order) and hashed; the *raw* roadmap (before
+``post_process_roadmap``) is stored under that fingerprint so every hit
+can be given fresh IDs.
+
+Entries expire after ``ROADMAP_CACHE_TTL_SECONDS`` and the cache is
+capped at ``ROADMAP_CACHE_MAX_ENTRIES``.  When full, the entry to evict
+is chosen by ``ROADMAP_CACHE_EVICTION``:
+
+* ``lru``  — least recently *read* entry
+* ``fifo`` — oldest *written* entry
+
+The eviction index is scored by read time under ``lru``, so write times
+are kept in a second sorted set; entries are dropped from both once
+their TTL has passed.
+
+Hit / miss counters live in Redis so they aggregate across processes;
+they are logged with the other runtime stats (see ``metrics.py``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from typing import Any
+
+import redis.asyncio as aioredis
+import structlog
+
+from ..core.config import settings
+from ..core.redis import (
+    ROADMAP_CACHE_INDEX_KEY,
+    ROADMAP_CACHE_STATS_KEY,
+    ROADMAP_CACHE_WRITTEN_KEY,
+    get_redis,
+    roadmap_cache_key,
+)
+
+logger = structlog.get_logger()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def _normalize_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        value = value.get("question", "")
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def normalize_chat_data(chat_data: dict[str, Any]) -> dict[str, Any]:
+    """Reduce ``chat_data`` to the parts that decide the roadmap.
+
+    Question metadata (type, options) is dropped and turns are ordered
+    by their ``order`` field so equivalent sessions compare equal.
+    """
+    turns = sorted(
+        chat_data.get("question_answers") or [],
+        key=lambda item: item.get("order", 0),
+    )
+    return {
+        "title": _normalize_text(chat_data.get("title")),
+        "initial_message": _normalize_text(chat_data.get("initial_message")),
+        "question_answers": [
+            [_normalize_text(item.get("question")), _normalize_text(item.get("answer"))]
+            for item in turns
+            if item.get("question")
+        ],
+    }
+
+
+def chat_data_fingerprint(chat_data: dict[str, Any]) -> str:
+    """Return the cache key fingerprint for ``chat_data``."""
+    raw = json.dumps(normalize_chat_data(chat_data), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RoadmapCache:
+    """Redis-backed roadmap cache with TTL and bounded size."""
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None = None,
+        *,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+        eviction: str | None = None,
+    ) -> None:
+        self.redis = redis or get_redis()
+        self.ttl_seconds = ttl_seconds or settings.roadmap_cache_ttl_seconds
+        self.max_entries = max_entries or settings.roadmap_cache_max_entries
+        self.eviction = eviction or settings.roadmap_cache_eviction
+        if self.eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown roadmap cache eviction policy: {self.eviction}")
+
+    async def get(self, fingerprint: str) -> dict[str, Any] | None:
+        """Return the cached raw roadmap for ``fingerprint`` (or ``None``)."""
+        raw = await self.redis.get(roadmap_cache_key(fingerprint))
+        if raw is None:
+            await self.redis.hincrby(ROADMAP_CACHE_STATS_KEY, "misses", 1)
+            return None
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(ROADMAP_CACHE_STATS_KEY, "hits", 1)
+            if self.eviction == "lru":
+                pipe.zadd(ROADMAP_CACHE_INDEX_KEY, {fingerprint: time.time()})
+            await pipe.execute()
+        return json.loads(raw)
+
+    async def set(self, fingerprint: str, roadmap_data: dict[str, Any]) -> None:
+        """Store a raw roadmap and evict entries beyond ``max_entries``."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(
+                roadmap_cache_key(fingerprint),
+                json.dumps(roadmap_data),
+                ex=self.ttl_seconds,
+            )
+            now = time.time()
+            pipe.zadd(ROADMAP_CACHE_INDEX_KEY, {fingerprint: now})
+            pipe.zadd(ROADMAP_CACHE_WRITTEN_KEY, {fingerprint: now})
+            await pipe.execute()
+        await self._evict()
+
+    async def _evict(self) -> None:
+        # Entries that expired by TTL only need removing from the indexes;
+        # under "lru" their index score is the last read, not the write
+        expired = await self.redis.zrangebyscore(
+            ROADMAP_CACHE_WRITTEN_KEY, "-inf", time.time() - self.ttl_seconds
+        )
+        if expired:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(ROADMAP_CACHE_INDEX_KEY, *expired)
+                pipe.zrem(ROADMAP_CACHE_WRITTEN_KEY, *expired)
+                await pipe.execute()
+        overflow = await self.redis.zcard(ROADMAP_CACHE_INDEX_KEY) - self.max_entries
+        if overflow <= 0:
+            return
+        victims = await self.redis.zpopmin(ROADMAP_CACHE_INDEX_KEY, overflow)
+        if victims:
+            fingerprints = [fp for fp, _ in victims]
+            await self.redis.zrem(ROADMAP_CACHE_WRITTEN_KEY, *fingerprints)
+            await self.redis.delete(*(roadmap_cache_key(fp) for fp in fingerprints))
+            await self.redis.hincrby(ROADMAP_CACHE_STATS_KEY, "evictions", len(victims))
+
+    async def stats(self) -> dict[str, Any]:
+        """Return hit / miss / eviction counters and the hit rate."""
+        raw = await self.redis.hgetall(ROADMAP_CACHE_STATS_KEY)
+        hits = int(raw.get("hits", 0))
+        misses = int(raw.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": int(raw.get("evictions", 0)),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": await self.redis.zcard(ROADMAP_CACHE_INDEX_KEY),
+        }
@@ -0,0 +1,178 @@
+"""Speculative planner results computed while the questionnaire runs.
+
+With ``SPECULATIVE_PLANNING_ENABLED`` the chat endpoint starts the
+planner (and, with ``SPECULATIVE_INCLUDE_RESEARCH``, both research
+stages) in the background once ``SPECULATIVE_MIN_ANSWERS`` questions are
+answered.  The outputs are stored in Redis together with the answers
+they were computed from.
+
+When the roadmap is generated, the stored answers are compared with the
+final ones (see :func:`answers_similarity`).  If at least
+``SPECULATIVE_MATCH_THRESHOLD`` of the final answers were already known
+and unchanged, the stored outputs are served to the pipeline through
+:class:`SpeculativeCheckpoints` and those stages are skipped; otherwise
+the speculation is discarded.  Either way it is used at most once.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import redis.asyncio as aioredis
+import structlog
+
+from ..core.config import settings
+from ..core.redis import get_redis, roadmap_speculation_key
+from .pipeline import Checkpointer
+from .roadmap_cache import chat_data_fingerprint, normalize_chat_data
+
+logger = structlog.get_logger()
+
+
+def answered_count(chat_data: dict[str, Any]) -> int:
+    """Number of questionnaire turns that already have an answer."""
+    return sum(
+        1
+        for item in chat_data.get("question_answers") or []
+        if item.get("question") and item.get("answer")
+    )
+
+
+def _answered_pairs(normalized: dict[str, Any]) -> set[tuple[str, str]]:
+    return {
+        (question, answer)
+        for question, answer in normalized["question_answers"]
+        if answer
+    }
+
+
+def answers_similarity(speculative: dict[str, Any], final: dict[str, Any]) -> float:
+    """Share of the final answers that the speculation already knew.
+
+    Both arguments are :func:`normalize_chat_data` results.  A different
+    title or opening message scores ``0.0``; otherwise the score is the
+    fraction of answered turns in ``final`` that appear, with the same
+    answer, in ``speculative``.  An answer the user changed afterwards
+    counts as unknown.
+    """
+    if (
+        speculative["title"] != final["title"]
+        or speculative["initial_message"] != final["initial_message"]
+    ):
+        return 0.0
+    final_pairs = _answered_pairs(final)
+    if not final_pairs:
+        return 1.0 if not _answered_pairs(speculative) else 0.0
+    return len(final_pairs & _answered_pairs(speculative)) / len(final_pairs)
+
+
+class SpeculationStore:
+    """Speculative stage outputs of one session, stored in Redis.
+
+    Parameters
+    ----------
+    session_id:
+        The chat / roadmap session identifier.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        *,
+        redis: aioredis.Redis | None = None,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        self.session_id = session_id
+        self.redis = redis or get_redis()
+        self.ttl_seconds = ttl_seconds or settings.speculative_ttl_seconds
+        self.key = roadmap_speculation_key(session_id)
+
+    async def _load(self) -> dict[str, Any] | None:
+        try:
+            raw = await self.redis.get(self.key)
+        except Exception as exc:
+            logger.warning(
+                "speculation_load_failed", session_id=self.session_id, error=str(exc)
+            )
+            return None
+        return json.loads(raw) if raw else None
+
+    async def covers(self, chat_data: dict[str, Any]) -> bool:
+        """Whether a stored speculation would still be adopted for ``chat_data``."""
+        entry = await self._load()
+        return entry is not None and (
+            answers_similarity(entry["answers"], normalize_chat_data(chat_data))
+            >= settings.speculative_match_threshold
+        )
+
+    async def save(
+        self, chat_data: dict[str, Any], outputs: dict[str, dict[str, Any]]
+    ) -> None:
+        """Store per-stage ``outputs`` computed from ``chat_data``."""
+        entry = {
+            "fingerprint": chat_data_fingerprint(chat_data),
+            "answers": normalize_chat_data(chat_data),
+            "outputs": outputs,
+        }
+        try:
+            await self.redis.set(self.key, json.dumps(entry), ex=self.ttl_seconds)
+        except Exception as exc:
+            logger.warning(
+                "speculation_save_failed", session_id=self.session_id, error=str(exc)
+            )
+
+    async def take(self, chat_data: dict[str, Any]) -> dict[str, dict[str, Any]] | None:
+        """Remove the speculation and return its outputs if it matches.
+
+        Returns ``None`` (having discarded the entry) when there is no
+        speculation or its answers differ too much from ``chat_data``.
+        """
+        entry = await self._load()
+        if entry is None:
+            return None
+        try:
+            await self.redis.delete(self.key)
+        except Exception as exc:
+            logger.warning(
+                "speculation_delete_failed", session_id=self.session_id, error=str(exc)
+            )
+
+        if entry["fingerprint"] == chat_data_fingerprint(chat_data):
+            similarity = 1.0
+        else:
+            similarity = answers_similarity(
+                entry["answers"], normalize_chat_data(chat_data)
+            )
+        log = logger.bind(
+            session_id=self.session_id,
+            similarity=round(similarity, 3),
+            stages=sorted(entry["outputs"]),
+        )
+        if similarity < settings.speculative_match_threshold:
+            log.info("speculation_discarded")
+            return None
+        log.info("speculation_adopted")
+        return entry["outputs"]
+
+
+class SpeculativeCheckpoints:
+    """Checkpointer serving adopted speculative outputs before ``inner``.
+
+    Stages found in ``outputs`` are skipped by the pipeline; every other
+    lookup and every save goes to ``inner``.
+    """
+
+    def __init__(self, inner: Checkpointer, outputs: dict[str, dict[str, Any]]) -> None:
+        self.inner = inner
+        self.outputs = outputs
+
+    async def load(self, stage: str, inputs: dict[str, Any]) -> dict[str, Any] | None:
+        if stage in self.outputs:
+            return self.outputs[stage]
+        return await self.inner.load(stage, inputs)
+
+    async def save(
+        self, stage: str, inputs: dict[str, Any], outputs: dict[str, Any]
+    ) -> None:
+        await self.inner.save(stage, inputs, outputs)
@@ -1,4 +1,4 @@
 from .ddgs import search
-from .rag_search import search_company_policies
+from .rag_search import search_company_policies, search_company_policies_batch
 
-__all__ = ["search", "search_company_policies"]
+__all__ = ["search", "search_company_policies", "search_company_policies_batch"]
@@ -1,3 +1,43 @@
+import asyncio
+from functools import partial
+
 from langchain_community.tools import DuckDuckGoSearchRun
 
-search = DuckDuckGoSearchRun()
+from ...core.config import settings
+from ...core.tracing import span
+from ...core.utils.ai_core.cassette import call_tool
+from ..executor import get_engine_executor
+
+
+class _EngineDuckDuckGoSearchRun(DuckDuckGoSearchRun):
+    """DuckDuckGo search whose async path runs on the engine executor.
+
+    The underlying ``ddgs`` client is blocking; the stock ``_arun`` would
+    offload it to the event loop's default executor instead.  A search
+    that exceeds ``TOOL_CALL_TIMEOUT_SECONDS`` is abandoned and the agent
+    is told so, instead of waiting on it indefinitely.
+    """
+
+    def _run(self, query: str, run_manager=None) -> str:
+        with span("tool.search", query_chars=len(query)) as s:
+            result = call_tool(
+                "search", query, partial(super()._run, run_manager=run_manager)
+            )
+            if s:
+                s.set_attribute("result_chars", len(result))
+            return result
+
+    async def _arun(self, query: str, run_manager=None) -> str:
+        try:
+            return await asyncio.wait_for(
+                get_engine_executor().run(self._run, query),
+                settings.tool_call_timeout_seconds,
+            )
+        except TimeoutError:
+            return (
+                "The search timed out. Try a more specific query or continue "
+                "with the results you already have."
+            )
+
+
+search = _EngineDuckDuckGoSearchRun()
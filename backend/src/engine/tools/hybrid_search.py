@@ -0,0 +1,172 @@
+"""Hybrid (BM25 + vector) retrieval for the company policy tools.
+
+With ``HYBRID_SEARCH_ENABLED`` a policy search ranks chunks twice, by
+BM25 over the lexical index (``core/utils/lexical_index.py``) and by
+embedding similarity, taking ``HYBRID_CANDIDATES`` from each, and merges
+both rankings with weighted reciprocal rank fusion
+(``HYBRID_VECTOR_WEIGHT`` / ``HYBRID_LEXICAL_WEIGHT``, constant
+``HYBRID_RRF_K``).
+
+Lexical-only queries skip the vector side, and therefore the embedding
+call, entirely.  A query is lexical-only when it is wrapped in quotes,
+or when it has at most ``HYBRID_LEXICAL_MAX_TERMS`` terms and every one
+of them occurs in the corpus (``"PTO carry-over"``, ``SOC2``).
+
+The index file is written by ``ingest``; a process that finds none
+builds it from the Chroma collection.  A newer file (by mtime) is picked
+up on the next search.
+
+Reported relevance is the fused score scaled to ``(0, 1]`` (1 = first in
+both rankings), or BM25 relative to the best hit for lexical-only
+queries.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import structlog
+from langchain_core.documents import Document
+
+from ...core.config import settings
+from ...core.utils.lexical_index import (
+    BM25Index,
+    bm25_relevance,
+    build_from_collection,
+    index_path,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+logger = structlog.get_logger()
+
+VectorSearch = Callable[[str, int], list[tuple[Document, float]]]
+AsyncVectorSearch = Callable[[str, int], Awaitable[list[tuple[Document, float]]]]
+
+
+class _LexicalIndexFile:
+    """The lexical index on disk, reloaded when the file changes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._index: BM25Index | None = None
+        self._mtime: float | None = None
+
+    def get(self, path: Path, collection: Callable[[], Any]) -> BM25Index:
+        with self._lock:
+            if not path.exists():
+                logger.info("lexical_index_building", path=str(path))
+                build_from_collection(collection()).save(path)
+            mtime = path.stat().st_mtime
+            if self._index is None or mtime != self._mtime:
+                self._index = BM25Index.load(path)
+                self._mtime = mtime
+                logger.info(
+                    "lexical_index_loaded", path=str(path), chunks=len(self._index)
+                )
+            return self._index
+
+
+_lexical_file = _LexicalIndexFile()
+
+
+def get_lexical_index(collection_name: str, collection: Callable[[], Any]) -> BM25Index:
+    """Return the lexical index of ``collection_name``.
+
+    ``collection`` returns the Chroma collection, and is only called when
+    the index file is missing.
+    """
+    path = index_path(settings.lexical_index_dir, collection_name)
+    return _lexical_file.get(path, collection)
+
+
+def is_lexical_only(query: str, index: BM25Index) -> bool:
+    """Whether ``query`` can be answered from BM25 alone (see module docs)."""
+    stripped = query.strip()
+    if len(stripped) > 2 and stripped[0] == stripped[-1] and stripped[0] in "\"'":
+        return bool(tokenize(stripped))
+    known, unknown = index.known_terms(query)
+    if not known or unknown:
+        return False
+    return len(known) <= settings.hybrid_lexical_max_terms
+
+
+def _key(document: Document) -> tuple[str, str]:
+    # Chunk ids differ between the vector and lexical paths; content does not
+    return document.metadata.get("source", ""), document.page_content
+
+
+def _lexical_hits(
+    query: str, candidates: int, index: BM25Index
+) -> list[tuple[Document, float]]:
+    return [
+        (
+            Document(
+                id=index.ids[number],
+                page_content=index.documents[number],
+                metadata=index.metadatas[number],
+            ),
+            score,
+        )
+        for number, score in index.search(query, candidates)
+    ]
+
+
+def _lexical_only_results(
+    lexical: list[tuple[Document, float]], k: int
+) -> list[tuple[Document, float]]:
+    logger.debug("policy_search", mode="lexical", hits=len(lexical))
+    relevance = bm25_relevance([score for _, score in lexical[:k]])
+    return [(doc, rel) for (doc, _), rel in zip(lexical[:k], relevance)]
+
+
+def _fuse(
+    lexical: list[tuple[Document, float]],
+    vector: list[tuple[Document, float]],
+    k: int,
+) -> list[tuple[Document, float]]:
+    documents = {_key(doc): doc for doc, _ in lexical}
+    documents.update({_key(doc): doc for doc, _ in vector})
+    fused = reciprocal_rank_fusion(
+        [[_key(doc) for doc, _ in vector], [_key(doc) for doc, _ in lexical]],
+        [settings.hybrid_vector_weight, settings.hybrid_lexical_weight],
+        k=settings.hybrid_rrf_k,
+    )
+    logger.debug(
+        "policy_search",
+        mode="hybrid",
+        lexical_hits=len(lexical),
+        vector_hits=len(vector),
+    )
+    return [(documents[key], score) for key, score in fused[:k]]
+
+
+def hybrid_search(
+    query: str,
+    k: int,
+    index: BM25Index,
+    vector_search: VectorSearch,
+) -> list[tuple[Document, float]]:
+    """Top-``k`` chunks for ``query`` by fused BM25 + vector ranking."""
+    candidates = max(k, settings.hybrid_candidates)
+    lexical = _lexical_hits(query, candidates, index)
+    if lexical and is_lexical_only(query, index):
+        return _lexical_only_results(lexical, k)
+    return _fuse(lexical, vector_search(query, candidates), k)
+
+
+async def ahybrid_search(
+    query: str,
+    k: int,
+    index: BM25Index,
+    vector_search: AsyncVectorSearch,
+) -> list[tuple[Document, float]]:
+    """Async :func:`hybrid_search`, awaiting the vector side."""
+    candidates = max(k, settings.hybrid_candidates)
+    lexical = _lexical_hits(query, candidates, index)
+    if lexical and is_lexical_only(query, index):
+        return _lexical_only_results(lexical, k)
+    return _fuse(lexical, await vector_search(query, candidates), k)
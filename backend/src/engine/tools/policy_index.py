@@ -0,0 +1,287 @@
+"""In-process mirror of the company-policies Chroma collection.
+
+The collection is small (a few thousand chunks), so with
+``LOCAL_VECTOR_INDEX_ENABLED`` policy searches skip the HTTP round trip to
+Chroma and run against a local copy instead:
+
+* embeddings as one contiguous, L2-normalised float32 matrix, so a search
+  is a single matrix-vector product plus ``argpartition`` for the top-k
+* ids, documents and metadata in parallel arrays
+
+Each copy is written to a snapshot under ``LOCAL_VECTOR_INDEX_DIR``
+(``<collection>-<version>.npy`` plus a ``.json`` sidecar) and opened with
+``mmap_mode="r"``, so every worker on a host shares one copy of the
+matrix through the page cache and a restart does not re-read Chroma.
+
+Chroma stays the source of truth.  ``ingest`` bumps the collection's
+version in Redis; at most every ``LOCAL_VECTOR_INDEX_REFRESH_SECONDS`` a
+search compares that version with the loaded one and reloads on change.
+Without a version in Redis the collection's chunk count stands in for it.
+
+Scores are converted to what ``similarity_search_with_relevance_scores``
+would report for the collection's distance function, so results look the
+same whichever path served them.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import redis
+import structlog
+
+from ...core.config import settings
+from ...core.redis import rag_ingest_version_key
+
+logger = structlog.get_logger()
+
+_PAGE_SIZE = 1000
+
+
+def relevance_from_distance(distance: np.ndarray, space: str) -> np.ndarray:
+    """Map Chroma distances to LangChain relevance scores."""
+    if space == "cosine":
+        return 1.0 - distance
+    if space == "ip":
+        # LangChain keeps 1 - distance when positive
+        return np.where(distance > 0, 1.0 - distance, -distance)
+    # Chroma's default "l2" is the squared distance
+    return 1.0 - distance / math.sqrt(2)
+
+
+def _relevance(similarity: np.ndarray, space: str) -> np.ndarray:
+    """Map cosine similarities of unit vectors to LangChain relevance scores."""
+    if space == "l2":
+        # |a - b|^2 = 2 - 2 cos
+        return relevance_from_distance(2.0 - 2.0 * similarity, space)
+    # cosine and ip distances of unit vectors are both 1 - cos
+    return relevance_from_distance(1.0 - similarity, space)
+
+
+class PolicyIndex:
+    """A loaded, read-only snapshot of the collection."""
+
+    def __init__(
+        self,
+        version: str,
+        matrix: np.ndarray,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        space: str = "l2",
+    ) -> None:
+        self.version = version
+        self.matrix = matrix
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.space = space
+        self._rows: dict[str, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, vector: list[float], k: int
+    ) -> list[tuple[str, str, dict[str, Any], float]]:
+        """Return ``(id, document, metadata, relevance)`` of the ``k`` best chunks."""
+        if not len(self):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        similarity = self.matrix @ query
+        k = min(k, len(self))
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top])]
+        scores = _relevance(similarity[top], self.space)
+        return [
+            (self.ids[i], self.documents[i], self.metadatas[i], float(score))
+            for i, score in zip(top.tolist(), scores)
+        ]
+
+    def vectors(self, ids: list[str]) -> np.ndarray:
+        """Return the (normalised) embeddings of the chunks ``ids``."""
+        if self._rows is None:
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        return self.matrix[[self._rows[chunk_id] for chunk_id in ids]]
+
+    # -- Snapshots ------------------------------------------------------------
+
+    @staticmethod
+    def _paths(directory: Path, collection: str, version: str) -> tuple[Path, Path]:
+        stem = f"{collection}-{version}".replace("/", "_")
+        return directory / f"{stem}.npy", directory / f"{stem}.json"
+
+    @classmethod
+    def load_snapshot(
+        cls, directory: Path, collection: str, version: str
+    ) -> PolicyIndex | None:
+        matrix_path, meta_path = cls._paths(directory, collection, version)
+        if not (matrix_path.exists() and meta_path.exists()):
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        matrix = np.load(matrix_path, mmap_mode="r")
+        return cls(
+            version,
+            matrix,
+            meta["ids"],
+            meta["documents"],
+            meta["metadatas"],
+            meta.get("space", "l2"),
+        )
+
+    def save_snapshot(self, directory: Path, collection: str) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        matrix_path, meta_path = self._paths(directory, collection, self.version)
+        meta = {
+            "version": self.version,
+            "space": self.space,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }
+        # Write then rename, so a worker never maps a half-written file
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+        tmp_matrix = matrix_path.with_suffix(".tmp.npy")
+        np.save(tmp_matrix, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        tmp_meta.replace(meta_path)
+        tmp_matrix.replace(matrix_path)
+
+        # Older versions are no longer needed; mapped copies stay readable
+        for path in directory.glob(f"{collection}-*"):
+            if path in (matrix_path, meta_path) or ".tmp" in path.suffixes:
+                continue
+            if path.suffix in (".npy", ".json"):
+                path.unlink(missing_ok=True)
+
+    @classmethod
+    def from_collection(cls, collection: Any, version: str) -> PolicyIndex:
+        """Read every chunk of a Chroma collection into a new index."""
+        ids: list[str] = []
+        documents: list[str] = []
+        metadatas: list[dict[str, Any]] = []
+        rows: list[np.ndarray] = []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=_PAGE_SIZE,
+                offset=offset,
+            )
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(m or {} for m in page["metadatas"])
+            rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+
+        matrix = np.concatenate(rows) if rows else np.zeros((0, 0), np.float32)
+        if len(matrix):
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1.0, norms)
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        return cls(version, matrix, ids, documents, metadatas, space)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide index
+# ---------------------------------------------------------------------------
+
+
+class _IndexHolder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._index: PolicyIndex | None = None
+        self._checked_at = 0.0
+        self._redis: redis.Redis | None = None
+
+    def _collection(self) -> Any:
+        import chromadb
+
+        client = chromadb.HttpClient(
+            host=settings.chroma_host, port=settings.chroma_port
+        )
+        return client.get_collection(settings.chroma_collection_name)
+
+    def _current_version(self, collection: Any) -> str:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                settings.redis_url, decode_responses=True
+            )
+        try:
+            version = self._redis.get(
+                rag_ingest_version_key(settings.chroma_collection_name)
+            )
+        except redis.RedisError as exc:
+            logger.warning("policy_index_version_unavailable", error=str(exc))
+            version = None
+        return version or f"count-{collection.count()}"
+
+    def _load(self) -> PolicyIndex:
+        collection = self._collection()
+        version = self._current_version(collection)
+        if self._index is not None and self._index.version == version:
+            return self._index
+
+        directory = Path(settings.local_vector_index_dir)
+        name = settings.chroma_collection_name
+        started = time.perf_counter()
+        index = PolicyIndex.load_snapshot(directory, name, version)
+        source = "snapshot"
+        if index is None:
+            index = PolicyIndex.from_collection(collection, version)
+            index.save_snapshot(directory, name)
+            # Serve from the mapped file so workers share the pages
+            index = PolicyIndex.load_snapshot(directory, name, version) or index
+            source = "chroma"
+        logger.info(
+            "policy_index_loaded",
+            version=version,
+            chunks=len(index),
+            source=source,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        return index
+
+    def get(self) -> PolicyIndex:
+        with self._lock:
+            refresh = settings.local_vector_index_refresh_seconds
+            if self._index is None or time.monotonic() - self._checked_at >= refresh:
+                try:
+                    self._index = self._load()
+                except Exception:
+                    if self._index is None:
+                        raise
+                    # Keep serving the previous copy; Chroma may be restarting
+                    logger.exception("policy_index_refresh_failed")
+                self._checked_at = time.monotonic()
+            return self._index
+
+
+_holder = _IndexHolder()
+
+
+def get_policy_index() -> PolicyIndex:
+    """Return the local index, loading or refreshing it when due."""
+    return _holder.get()
+
+
+def warm_policy_index() -> None:
+    """Load the local index up front (worker start) when it is enabled."""
+    if not settings.local_vector_index_enabled:
+        return
+    try:
+        get_policy_index()
+    except Exception:
+        # Searches fall back to Chroma and retry the load later
+        logger.exception("policy_index_warm_failed")
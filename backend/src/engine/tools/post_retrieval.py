@@ -0,0 +1,181 @@
+"""Post-retrieval stage for company policy search results.
+
+Ingest splits sections into chunks that overlap by ``RAG_CHUNK_OVERLAP``
+characters, so a plain top-k often returns neighbouring chunks of one
+section that repeat each other, and the policy agent pays for that text
+twice.  With ``RAG_POST_RETRIEVAL_ENABLED`` a search instead:
+
+1. over-fetches ``k * RAG_OVERFETCH_FACTOR`` candidates;
+2. picks ``k`` of them with maximal marginal relevance
+   (``RAG_MMR_LAMBDA`` trades relevance against novelty), dropping any
+   candidate whose cosine similarity to a picked one reaches
+   ``RAG_DUPLICATE_THRESHOLD``;
+3. merges picked chunks that are consecutive (``chunk_index``) in the
+   same ``source`` / ``section`` into one excerpt, removing the overlap;
+4. trims the formatted output to ``RAG_TOOL_OUTPUT_MAX_TOKENS``.
+
+MMR works on the candidates' stored embeddings and their retrieval
+scores, so it needs no query embedding and also applies to BM25-only
+results.  When the embeddings cannot be fetched, selection falls back to
+the top ``k`` with exact duplicates removed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..utils.tokens import count_tokens, truncate_to_tokens
+
+# Shorter common runs are more likely coincidence than splitter overlap
+_MIN_OVERLAP_CHARS = 16
+# Below this, a truncated result is not worth including
+_MIN_PARTIAL_TOKENS = 40
+
+Results = list[tuple[Document, float]]
+
+
+def mmr_select(
+    relevance: Sequence[float],
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float,
+    duplicate_threshold: float,
+) -> list[int]:
+    """Return the indices of ``k`` candidates chosen by MMR.
+
+    ``relevance`` is min-max scaled first, so any retrieval score
+    (vector relevance, fused rank score, BM25) can be used.
+    """
+    count = len(relevance)
+    if count == 0:
+        return []
+    rel = np.asarray(relevance, dtype=np.float64)
+    spread = rel.max() - rel.min()
+    rel = (rel - rel.min()) / spread if spread else np.ones(count)
+
+    unit = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(unit, axis=1, keepdims=True)
+    unit = unit / np.where(norms == 0, 1.0, norms)
+    similarity = unit @ unit.T
+
+    selected: list[int] = []
+    available = np.ones(count, dtype=bool)
+    redundancy = np.zeros(count)
+    while len(selected) < k and available.any():
+        scores = lambda_mult * rel - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        available &= similarity[best] < duplicate_threshold
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int) -> str:
+    limit = min(len(first), len(second), max_overlap)
+    for size in range(limit, _MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+def merge_adjacent(results: Results, max_overlap: int) -> tuple[Results, int]:
+    """Merge consecutive chunks of the same section.
+
+    Returns the merged results, best first, and how many chunks were
+    folded into another one.
+    """
+    groups: dict[tuple[str, str], list[tuple[Document, float]]] = {}
+    loose: Results = []
+    for doc, score in results:
+        if not isinstance(doc.metadata.get("chunk_index"), int):
+            loose.append((doc, score))
+            continue
+        key = (doc.metadata.get("source", ""), doc.metadata.get("section", ""))
+        groups.setdefault(key, []).append((doc, score))
+
+    merged: Results = []
+    folded = 0
+    for chunks in groups.values():
+        chunks.sort(key=lambda item: item[0].metadata["chunk_index"])
+        run_doc, run_score = chunks[0]
+        last_index = run_doc.metadata["chunk_index"]
+        for doc, score in chunks[1:]:
+            index = doc.metadata["chunk_index"]
+            if index == last_index + 1:
+                text = _join_overlapping(
+                    run_doc.page_content, doc.page_content, max_overlap
+                )
+                run_doc = Document(page_content=text, metadata=run_doc.metadata)
+                run_score = max(run_score, score)
+                folded += 1
+            elif index != last_index:
+                merged.append((run_doc, run_score))
+                run_doc, run_score = doc, score
+            last_index = index
+        merged.append((run_doc, run_score))
+
+    merged.extend(loose)
+    merged.sort(key=lambda item: item[1], reverse=True)
+    return merged, folded
+
+
+def refine(
+    candidates: Results,
+    k: int,
+    vectors: Callable[[list[Document]], np.ndarray | None],
+    *,
+    lambda_mult: float,
+    duplicate_threshold: float,
+    max_overlap: int,
+) -> tuple[Results, int]:
+    """Diversify ``candidates`` down to ``k`` and merge neighbours.
+
+    ``vectors`` returns the stored embeddings of the given documents, or
+    ``None`` when they are unavailable.
+    """
+    matrix = vectors([doc for doc, _ in candidates]) if len(candidates) > k else None
+    if matrix is not None:
+        picked = mmr_select(
+            [score for _, score in candidates],
+            matrix,
+            k,
+            lambda_mult,
+            duplicate_threshold,
+        )
+        selected = [candidates[i] for i in picked]
+    else:
+        seen: set[str] = set()
+        selected = []
+        for doc, score in candidates:
+            if doc.page_content not in seen and len(selected) < k:
+                seen.add(doc.page_content)
+                selected.append((doc, score))
+    return merge_adjacent(selected, max_overlap)
+
+
+def fit_token_budget(blocks: list[str], max_tokens: int, model_name: str) -> list[str]:
+    """Keep whole ``blocks`` in order while they fit in ``max_tokens``.
+
+    The first block that does not fit is truncated into the remaining
+    budget if enough is left; the first block is always kept.
+    """
+    kept: list[str] = []
+    used = 0
+    for block in blocks:
+        tokens = count_tokens(block, model_name)
+        if used + tokens <= max_tokens:
+            kept.append(block)
+            used += tokens
+            continue
+        remaining = max_tokens - used
+        if not kept or remaining >= _MIN_PARTIAL_TOKENS:
+            kept.append(
+                truncate_to_tokens(block, max(remaining - 1, 1), model_name) + "…"
+            )
+        break
+    return kept
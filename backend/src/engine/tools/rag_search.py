@@ -1,20 +1,66 @@
-"""RAG search tool – queries the ChromaDB company-policies collection.
+"""RAG search tools – query the ChromaDB company-policies collection.
 
-This LangChain tool is designed to be used by agents that need to answer
-questions about internal company policies (onboarding, leaves, code of
-conduct, etc.).  Each result includes the source document filename so
-the agent can cite it.
+These LangChain tools are designed to be used by agents that need to
+answer questions about internal company policies (onboarding, leaves,
+code of conduct, etc.).  Each result includes the source document
+filename so the agent can cite it.
+
+Query embeddings go through the two-tier embedding cache (see
+``core/utils/ai_core/embeddings.py``), so a repeated query skips the
+OpenAI round trip.  ``search_company_policies_batch`` embeds all of its
+queries in one request and runs the similarity searches concurrently.
+
+Retrieval itself can be served from an in-process copy of the collection
+(``policy_index.py``) and fused with BM25 (``hybrid_search.py``); results
+are then diversified, merged and trimmed to a token budget
+(``post_retrieval.py``).
+
+With ``CHROMA_ASYNC_ENABLED`` the async tool variants query Chroma
+through its async HTTP client and embed with ``aembed_query``, so an
+agent awaits the search instead of holding an engine executor thread.
+Embedding requests share the process-wide HTTP pool (``core/http.py``).
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
+import time
+import weakref
+from collections.abc import Callable
 from functools import lru_cache
+from typing import Any
 
 import chromadb
+import numpy as np
+import redis
+import structlog
+from chromadb.errors import NotFoundError
 from langchain_chroma import Chroma
-from langchain_core.tools import tool
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.tools import StructuredTool
+
+from ...core.config import settings
+from ...core.http import chroma_client_settings
+from ...core.redis import get_redis, rag_ingest_version_key
+from ...core.tracing import current_span, span
+from ...core.utils.ai_core.cassette import acall_tool, call_tool, get_cassette
+from ...core.utils.ai_core.embeddings import CachedEmbeddings, create_query_embeddings
+from ...core.utils.ai_core.models import model_config
+from ...core.utils.lexical_index import BM25Index
+from ..executor import get_engine_executor
+from ..utils.tokens import count_tokens
+from .hybrid_search import (
+    ahybrid_search,
+    get_lexical_index,
+    hybrid_search,
+    is_lexical_only,
+)
+from .policy_index import get_policy_index, relevance_from_distance
+from .post_retrieval import fit_token_budget, refine
+
+logger = structlog.get_logger()
 
 # ---------------------------------------------------------------------------
 # Vectorstore singleton
@@ -25,19 +71,223 @@ _CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8100"))
 _COLLECTION = os.getenv("CHROMA_COLLECTION_NAME", "company_policies")
 
 
+@lru_cache(maxsize=1)
+def _get_query_embeddings() -> Embeddings:
+    return create_query_embeddings("text-embedding-3-small")
+
+
 @lru_cache(maxsize=1)
 def _get_vectorstore() -> Chroma:
     """Return a cached Chroma vectorstore client."""
-    client = chromadb.HttpClient(host=_CHROMA_HOST, port=_CHROMA_PORT)
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        api_key=os.getenv("OPENAI_API_KEY"),
+    client = chromadb.HttpClient(
+        host=_CHROMA_HOST, port=_CHROMA_PORT, settings=chroma_client_settings()
     )
     return Chroma(
         client=client,
         collection_name=_COLLECTION,
-        embedding_function=embeddings,
+        embedding_function=_get_query_embeddings(),
+    )
+
+
+class _AsyncCollection:
+    """The collection through a cached async Chroma client.
+
+    ``ingest --reset`` recreates the collection under a new id, so the
+    handle is fetched again when the ingest version in Redis changes
+    (checked at most every ``LOCAL_VECTOR_INDEX_REFRESH_SECONDS``) or a
+    call finds the collection gone.  The client and the lock belong to the
+    event loop that created them, so there is one handle per loop (see
+    :func:`_async_collection`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._client: Any = None
+        self._collection: Any = None
+        self._version: str | None = None
+        self._checked_at = 0.0
+
+    async def _current_version(self) -> str | None:
+        try:
+            return await get_redis().get(rag_ingest_version_key(_COLLECTION))
+        except redis.RedisError as exc:
+            logger.warning("policy_collection_version_unavailable", error=str(exc))
+            return self._version
+
+    async def get(self) -> Any:
+        async with self._lock:
+            refresh = settings.local_vector_index_refresh_seconds
+            if (
+                self._collection is not None
+                and time.monotonic() - self._checked_at < refresh
+            ):
+                return self._collection
+            version = await self._current_version()
+            self._checked_at = time.monotonic()
+            if self._collection is None or version != self._version:
+                if self._client is None:
+                    self._client = await chromadb.AsyncHttpClient(
+                        host=_CHROMA_HOST,
+                        port=_CHROMA_PORT,
+                        settings=chroma_client_settings(),
+                    )
+                # Queries pass their own vectors; no server-side embedding
+                self._collection = await self._client.get_collection(
+                    _COLLECTION, embedding_function=None
+                )
+                self._version = version
+                logger.info("policy_collection_loaded", version=version)
+            return self._collection
+
+    async def call(self, method: str, **kwargs: Any) -> tuple[Any, Any]:
+        """Return the collection and the result of ``method(**kwargs)`` on it."""
+        collection = await self.get()
+        try:
+            return collection, await getattr(collection, method)(**kwargs)
+        except NotFoundError:
+            logger.info("policy_collection_gone", collection=_COLLECTION)
+            async with self._lock:
+                if self._collection is collection:
+                    self._collection = None
+            collection = await self.get()
+            return collection, await getattr(collection, method)(**kwargs)
+
+
+# Keyed by loop: a worker restarted in-process (or a test) runs a new loop
+_async_collections: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, _AsyncCollection
+] = weakref.WeakKeyDictionary()
+
+
+def _async_collection() -> _AsyncCollection:
+    """Return the collection handle of the running event loop."""
+    loop = asyncio.get_running_loop()
+    handle = _async_collections.get(loop)
+    if handle is None:
+        handle = _async_collections[loop] = _AsyncCollection()
+    return handle
+
+
+def _similarity_search(query: str, k: int) -> list[tuple[Document, float]]:
+    """Top-``k`` chunks for ``query``, from the local index when enabled."""
+    if settings.local_vector_index_enabled:
+        try:
+            index = get_policy_index()
+            vector = _get_query_embeddings().embed_query(query)
+            return [
+                (Document(id=chunk_id, page_content=text, metadata=metadata), score)
+                for chunk_id, text, metadata, score in index.search(vector, k)
+            ]
+        except Exception as exc:
+            logger.warning("policy_index_search_failed", error=str(exc))
+    return _get_vectorstore().similarity_search_with_relevance_scores(query, k=k)
+
+
+async def _asimilarity_search(query: str, k: int) -> list[tuple[Document, float]]:
+    """Async :func:`_similarity_search` over the async Chroma client."""
+    embeddings = _get_query_embeddings()
+    if settings.local_vector_index_enabled:
+        try:
+            # Loading / refreshing the index may read Chroma and Redis
+            index = await get_engine_executor().run(get_policy_index)
+            vector = await embeddings.aembed_query(query)
+            return [
+                (Document(id=chunk_id, page_content=text, metadata=metadata), score)
+                for chunk_id, text, metadata, score in index.search(vector, k)
+            ]
+        except Exception as exc:
+            logger.warning("policy_index_search_failed", error=str(exc))
+
+    vector = await embeddings.aembed_query(query)
+    collection, found = await _async_collection().call(
+        "query",
+        query_embeddings=[vector],
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
     )
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    scores = relevance_from_distance(np.asarray(found["distances"][0]), space)
+    return [
+        (Document(id=chunk_id, page_content=text, metadata=metadata or {}), score)
+        for chunk_id, text, metadata, score in zip(
+            found["ids"][0],
+            found["documents"][0],
+            found["metadatas"][0],
+            scores.tolist(),
+        )
+    ]
+
+
+def _lexical_index() -> BM25Index | None:
+    if not settings.hybrid_search_enabled:
+        return None
+    try:
+        return get_lexical_index(_COLLECTION, lambda: _get_vectorstore()._collection)
+    except Exception as exc:
+        logger.warning("lexical_index_unavailable", error=str(exc))
+        return None
+
+
+def _retrieve(query: str, k: int) -> list[tuple[Document, float]]:
+    """Top-``k`` chunks for ``query``: hybrid when enabled, else by vector."""
+    index = _lexical_index()
+    if index is not None:
+        return hybrid_search(query, k, index, _similarity_search)
+    return _similarity_search(query, k)
+
+
+async def _aretrieve(query: str, k: int) -> list[tuple[Document, float]]:
+    """Async :func:`_retrieve`."""
+    # The first call may load (or build) the index file
+    index = await get_engine_executor().run(_lexical_index)
+    if index is not None:
+        return await ahybrid_search(query, k, index, _asimilarity_search)
+    return await _asimilarity_search(query, k)
+
+
+def _stored_vectors(ids: list[str], stored: dict[str, Any]) -> np.ndarray | None:
+    by_id = dict(zip(stored["ids"], stored["embeddings"]))
+    if len(by_id) != len(set(ids)):
+        return None
+    return np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+
+
+def _chunk_vectors(documents: list[Document]) -> np.ndarray | None:
+    """Stored embeddings of retrieved chunks (for MMR), or ``None``."""
+    ids = [doc.id for doc in documents]
+    if not all(ids):
+        return None
+    try:
+        if settings.local_vector_index_enabled:
+            return get_policy_index().vectors(ids)
+        stored = _get_vectorstore()._collection.get(ids=ids, include=["embeddings"])
+    except Exception as exc:
+        logger.warning("policy_chunk_vectors_unavailable", error=str(exc))
+        return None
+    return _stored_vectors(ids, stored)
+
+
+async def _achunk_vectors(documents: list[Document]) -> np.ndarray | None:
+    """Async :func:`_chunk_vectors`."""
+    ids = [doc.id for doc in documents]
+    if not all(ids):
+        return None
+    try:
+        if settings.local_vector_index_enabled:
+            index = await get_engine_executor().run(get_policy_index)
+            return index.vectors(ids)
+        _, stored = await _async_collection().call(
+            "get", ids=ids, include=["embeddings"]
+        )
+    except Exception as exc:
+        logger.warning("policy_chunk_vectors_unavailable", error=str(exc))
+        return None
+    return _stored_vectors(ids, stored)
+
+
+def _needs_embedding(query: str) -> bool:
+    index = _lexical_index()
+    return index is None or not is_lexical_only(query, index)
 
 
 # ---------------------------------------------------------------------------
@@ -45,8 +295,7 @@ def _get_vectorstore() -> Chroma:
 # ---------------------------------------------------------------------------
 
 
-@tool
-def search_company_policies(query: str) -> str:
+def _search_company_policies(query: str) -> str:
     """Search internal company policy documents for information.
 
     Use this tool when the user's question is about company policies,
@@ -59,16 +308,14 @@ def search_company_policies(query: str) -> str:
     Returns:
         Relevant policy excerpts with source citations.
     """
-    vectorstore = _get_vectorstore()
+    with span("tool.search_company_policies", query_chars=len(query)) as s:
+        result = call_tool("search_company_policies", query, _format_policy_results)
+        if s:
+            s.set_attribute("result_chars", len(result))
+        return result
 
-    results = vectorstore.similarity_search_with_relevance_scores(
-        query,
-        k=5,
-    )
-
-    if not results:
-        return "No relevant company policy documents found " "for the given query."
 
+def _format_blocks(results: list[tuple[Document, float]]) -> list[str]:
     formatted_results: list[str] = []
     for i, (doc, score) in enumerate(results, 1):
         source = doc.metadata.get("source", "unknown")
@@ -81,5 +328,169 @@ def search_company_policies(query: str) -> str:
             f"--- Result {i} (relevance: {score:.2f}) {citation} ---\n"
             f"{doc.page_content}"
         )
+    return formatted_results
+
+
+_NO_RESULTS = "No relevant company policy documents found for the given query."
+
+
+def _render_results(
+    candidates: list[tuple[Document, float]],
+    k: int,
+    vectors: Callable[[list[Document]], np.ndarray | None],
+) -> str:
+    """Post-process retrieved ``candidates`` into the tool output."""
+    if not candidates:
+        return _NO_RESULTS
+    if not settings.rag_post_retrieval_enabled:
+        return "\n\n".join(_format_blocks(candidates))
+
+    results, merged = refine(
+        candidates,
+        k,
+        vectors,
+        lambda_mult=settings.rag_mmr_lambda,
+        duplicate_threshold=settings.rag_duplicate_threshold,
+        max_overlap=settings.rag_chunk_overlap,
+    )
+    model_name = model_config("policy_researcher").model
+    blocks = fit_token_budget(
+        _format_blocks(results), settings.rag_tool_output_max_tokens, model_name
+    )
+    output = "\n\n".join(blocks)
+
+    # What the plain top-k would have cost
+    baseline_tokens = count_tokens(
+        "\n\n".join(_format_blocks(candidates[:k])), model_name
+    )
+    output_tokens = count_tokens(output, model_name)
+    logger.info(
+        "policy_search_post_retrieval",
+        candidates=len(candidates),
+        results=len(blocks),
+        merged_chunks=merged,
+        baseline_tokens=baseline_tokens,
+        output_tokens=output_tokens,
+        saved_tokens=baseline_tokens - output_tokens,
+    )
+    search_span = current_span()
+    if search_span:
+        search_span.set_attribute("saved_tokens", baseline_tokens - output_tokens)
+    return output
+
+
+def _candidate_count(k: int) -> int:
+    if settings.rag_post_retrieval_enabled:
+        return k * settings.rag_overfetch_factor
+    return k
+
+
+def _format_policy_results(query: str, k: int = 5) -> str:
+    candidates = _retrieve(query, k=_candidate_count(k))
+    return _render_results(candidates, k, _chunk_vectors)
+
+
+async def _aformat_policy_results(query: str, k: int = 5) -> str:
+    """Async :func:`_format_policy_results` over the async Chroma client."""
+    candidates = await _aretrieve(query, k=_candidate_count(k))
+    vectors = None
+    if settings.rag_post_retrieval_enabled and len(candidates) > k:
+        vectors = await _achunk_vectors([doc for doc, _ in candidates])
+    return _render_results(candidates, k, lambda _documents: vectors)
+
+
+async def _asearch(query: str) -> str:
+    with span("tool.search_company_policies", query_chars=len(query)) as s:
+        result = await acall_tool(
+            "search_company_policies", query, _aformat_policy_results
+        )
+        if s:
+            s.set_attribute("result_chars", len(result))
+        return result
+
+
+async def _asearch_company_policies(query: str) -> str:
+    """Async variant: async Chroma client if enabled, else the engine executor."""
+    if settings.chroma_async_enabled:
+        search = _asearch(query)
+    else:
+        search = get_engine_executor().run(_search_company_policies, query)
+    try:
+        return await asyncio.wait_for(search, settings.tool_call_timeout_seconds)
+    except TimeoutError:
+        return "The company policy search timed out for this query."
+
+
+def _format_batch_results(queries: list[str], results: list[str]) -> str:
+    return "\n\n".join(
+        f"=== Query: {query} ===\n{result}" for query, result in zip(queries, results)
+    )
+
+
+def _cached_embeddings() -> CachedEmbeddings | None:
+    """Return the policy search embeddings if batching can pre-embed queries."""
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        # Replayed searches never embed anything
+        return None
+    embeddings = _get_query_embeddings()
+    return embeddings if isinstance(embeddings, CachedEmbeddings) else None
+
+
+def _search_company_policies_batch(queries: list[str]) -> str:
+    """Search internal company policy documents for several queries at once.
+
+    Prefer this over repeated ``search_company_policies`` calls when you
+    need to look up more than one policy topic (for example leave
+    policy, security training and equipment setup for a new hire).
+
+    Args:
+        queries: Natural-language search queries about company policies.
+
+    Returns:
+        Relevant policy excerpts with source citations, grouped by query.
+    """
+    queries = list(dict.fromkeys(q for q in queries if q.strip()))
+    if not queries:
+        return "No queries given."
+    with span("tool.search_company_policies_batch", queries=len(queries)):
+        embeddings = _cached_embeddings()
+        to_embed = [q for q in queries if _needs_embedding(q)]
+        if embeddings is not None and to_embed:
+            # One embeddings request; the searches below hit the cache
+            embeddings.embed_queries(to_embed)
+        results = [_search_company_policies(query) for query in queries]
+    return _format_batch_results(queries, results)
+
+
+async def _asearch_company_policies_batch(queries: list[str]) -> str:
+    """Async variant: embed once, then search all queries concurrently."""
+    queries = list(dict.fromkeys(q for q in queries if q.strip()))
+    if not queries:
+        return "No queries given."
+    with span("tool.search_company_policies_batch", queries=len(queries)):
+        embeddings = _cached_embeddings()
+        to_embed = await get_engine_executor().run(
+            lambda: [q for q in queries if _needs_embedding(q)]
+        )
+        if embeddings is not None and to_embed:
+            await embeddings.aembed_queries(to_embed)
+        results = await asyncio.gather(
+            *(_asearch_company_policies(query) for query in queries)
+        )
+    return _format_batch_results(queries, results)
+
+
+search_company_policies = StructuredTool.from_function(
+    func=_search_company_policies,
+    coroutine=_asearch_company_policies,
+    name="search_company_policies",
+    description=_search_company_policies.__doc__,
+)
 
-    return "\n\n".join(formatted_results)
+search_company_policies_batch = StructuredTool.from_function(
+    func=_search_company_policies_batch,
+    coroutine=_asearch_company_policies_batch,
+    name="search_company_policies_batch",
+    description=_search_company_policies_batch.__doc__,
+)
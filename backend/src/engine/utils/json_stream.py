@@ -0,0 +1,90 @@
+import json
+from typing import Any
+
+
+class JsonArrayItemStream:
+    """Incrementally extract items of a top-level JSON array as they complete.
+
+    Feed the raw text of a JSON object chunk by chunk (e.g. streamed
+    tool-call arguments); every time an element of the array stored under
+    ``key`` closes, it is parsed and returned.
+
+    >>> stream = JsonArrayItemStream("sections")
+    >>> stream.feed('{"title": "x", "sections": [{"a": 1}, {"a"')
+    [{'a': 1}]
+    >>> stream.feed(': 2}]}')
+    [{'a': 2}]
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: str | None = None
+        self._key_matched = False
+        self._array_depth: int | None = None
+        self._item_start: int | None = None
+        self._done = False
+
+    def feed(self, chunk: str) -> list[Any]:
+        """Append ``chunk`` and return any array items completed by it."""
+        self._buffer += chunk
+        items: list[Any] = []
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            if self._done:
+                break
+            c = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buffer[self._string_start + 1 : i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._key_matched and self._depth == 2:
+                    self._array_depth = self._depth
+                    self._key_matched = False
+                elif (
+                    c == "{"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item_start = i
+            elif c in "}]":
+                if (
+                    c == "}"
+                    and self._item_start is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    try:
+                        items.append(json.loads(buffer[self._item_start : i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+                elif c == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self._done = True
+                self._depth -= 1
+            elif c == ":" and self._depth == 1:
+                self._key_matched = self._last_key == self.key
+            elif c == "," and self._depth == 1:
+                self._key_matched = False
+
+        self._pos = len(buffer)
+        return items
@@ -0,0 +1,25 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=8)
+def _encoding(model_name: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model_name: str = "gpt-4") -> int:
+    """Return the number of tokens ``text`` encodes to for ``model_name``."""
+    return len(_encoding(model_name).encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str = "gpt-4") -> str:
+    """Return the longest prefix of ``text`` that fits in ``max_tokens``."""
+    encoding = _encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,248 @@
+"""Standalone roadmap generation worker.
+
+Consumes jobs from the Redis Streams queue (see ``job_queue.py``) and runs
+``curate_roadmap`` for each one, so LLM work scales independently of the
+API pods.
+
+Usage (from the backend directory):
+    python -m src.engine.worker
+    python -m src.engine.worker --concurrency 8 --consumer worker-a
+
+On SIGINT / SIGTERM the worker stops reading, gives in-flight jobs a
+grace period and then cancels them.  Cancelled jobs are *not*
+acknowledged, so another worker reclaims them after the visibility
+timeout; they keep their session lease and are not reported to the
+client as cancelled.  A worker that finds its job reclaimed by another
+one (heartbeat lost ownership) stops running it the same way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import signal
+import socket
+from functools import partial
+
+import structlog
+
+from .. import models  # noqa: F401  (registers ORM mappers for usage writes)
+from ..core.config import settings
+from ..core.logging_config import configure_logging
+from ..core.http import close_http_clients
+from ..core.redis import close_redis
+from ..core.tracing import shutdown_tracing
+from ..core.utils.ai_core.cassette import close_cassette
+from ..core.utils.ai_core.models import log_call_site_stats
+from .agents import warm_agents
+from .artifacts import close_artifact_sink
+from .entrypoint import _publish_progress, curate_roadmap, publish_cancelled
+from .executor import shutdown_engine_executor
+from .job_queue import RoadmapJob, RoadmapJobQueue
+from .lease import HANDOFF_CANCEL_MSG, SessionLease, is_handoff, run_with_lease
+from .metrics import start_stats_logging, stop_stats_logging
+from .tools.policy_index import warm_policy_index
+
+logger = structlog.get_logger()
+
+
+class RoadmapWorker:
+    """Run up to ``concurrency`` roadmap jobs at a time from the queue."""
+
+    def __init__(
+        self,
+        queue: RoadmapJobQueue,
+        consumer: str,
+        concurrency: int,
+        shutdown_grace_seconds: float = 30.0,
+    ) -> None:
+        self.queue = queue
+        self.consumer = consumer
+        self.concurrency = concurrency
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self._stopping = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """Ask the worker to stop after in-flight jobs (graceful)."""
+        if not self._stopping.is_set():
+            logger.info("roadmap_worker_stopping", consumer=self.consumer)
+            self._stopping.set()
+
+    async def run(self) -> None:
+        await self.queue.ensure_group()
+        logger.info(
+            "roadmap_worker_started",
+            consumer=self.consumer,
+            concurrency=self.concurrency,
+        )
+
+        while not self._stopping.is_set():
+            free = self.concurrency - len(self._tasks)
+            if free <= 0:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            try:
+                jobs = await self.queue.claim_stale(self.consumer, free)
+                if not jobs:
+                    jobs = await self.queue.read(self.consumer, free, block_ms=2000)
+            except Exception as exc:
+                logger.error("roadmap_worker_read_failed", error=str(exc))
+                await asyncio.sleep(1)
+                continue
+
+            for job in jobs:
+                task = asyncio.create_task(self._handle(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+        await self._drain()
+
+    async def _drain(self) -> None:
+        if not self._tasks:
+            return
+        _, still_running = await asyncio.wait(
+            self._tasks, timeout=self.shutdown_grace_seconds
+        )
+        for task in still_running:
+            task.cancel(HANDOFF_CANCEL_MSG)
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+    async def _heartbeat(self, job: RoadmapJob, handler: asyncio.Task) -> None:
+        interval = self.queue.visibility_timeout_ms / 1000 / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                owned = await self.queue.heartbeat(self.consumer, job)
+            except Exception as exc:
+                logger.warning(
+                    "roadmap_job_heartbeat_failed",
+                    session_id=job.session_id,
+                    error=str(exc),
+                )
+                continue
+            if not owned:
+                # Reclaimed by another worker, which now runs it
+                logger.warning(
+                    "roadmap_job_ownership_lost",
+                    session_id=job.session_id,
+                    message_id=job.message_id,
+                )
+                handler.cancel(HANDOFF_CANCEL_MSG)
+                return
+
+    async def _handle(self, job: RoadmapJob) -> None:
+        log = logger.bind(
+            session_id=job.session_id, message_id=job.message_id, attempt=job.attempt
+        )
+        log.info("roadmap_job_started")
+
+        heartbeat = asyncio.create_task(self._heartbeat(job, asyncio.current_task()))
+        lease = SessionLease(job.session_id, job.lease_token or None)
+        try:
+            # A reclaimed or retried job resumes from its checkpoints
+            outcome = await run_with_lease(
+                lease,
+                partial(
+                    curate_roadmap,
+                    job.session_id,
+                    job.chat_data,
+                    resume=job.resume or job.attempt > 1,
+                    use_cache=job.use_cache,
+                    user_id=job.user_id or None,
+                ),
+                on_cancelled=partial(publish_cancelled, job.session_id),
+                # A failed job is retried or left pending; dead-lettering
+                # releases the lease
+                hold_on_failure=True,
+            )
+        except asyncio.CancelledError as exc:
+            if not is_handoff(exc):
+                raise
+            # Leave it pending; another worker reclaims (or already runs) it
+            log.warning("roadmap_job_handed_off")
+            return
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+
+        try:
+            if outcome != "failed":
+                # Cancelled by the user, or the session was taken over by
+                # another trigger's job: this message is done too
+                await self.queue.ack(job)
+                log.info("roadmap_job_settled", outcome=outcome)
+            elif self._stopping.is_set():
+                log.warning("roadmap_job_abandoned_on_shutdown")
+            elif await self.queue.retry(job, reason="curate_roadmap failed"):
+                await _publish_progress(
+                    job.session_id,
+                    status="pending",
+                    step="retrying",
+                    detail=(
+                        "Retrying roadmap generation "
+                        f"(attempt {job.attempt + 1}/{self.queue.max_attempts})…"
+                    ),
+                    progress_pct=0,
+                )
+        except Exception as exc:
+            log.error("roadmap_job_settle_failed", error=str(exc))
+
+
+async def _main(consumer: str, concurrency: int) -> None:
+    # Workers exist to run agents: build them up front, not on the first job
+    warm_agents()
+    warm_policy_index()
+    worker = RoadmapWorker(RoadmapJobQueue(), consumer, concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, worker.stop)
+
+    stats_logger = start_stats_logging()
+    try:
+        await worker.run()
+    finally:
+        await stop_stats_logging(stats_logger)
+        await close_artifact_sink()
+        await close_http_clients()
+        await close_redis()
+        shutdown_engine_executor()
+        log_call_site_stats()
+        close_cassette()
+        shutdown_tracing()
+
+
+# ---------------------------------------------------------------------------
+# CLI entry-point
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consume roadmap generation jobs from Redis Streams",
+    )
+    parser.add_argument(
+        "--consumer",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Consumer name within the group (default: <hostname>-<pid>)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.worker_concurrency,
+        help="Maximum jobs processed at once (default: WORKER_CONCURRENCY)",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    asyncio.run(_main(args.consumer, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
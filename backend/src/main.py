@@ -4,54 +4,52 @@ import asyncio
 from contextlib import asynccontextmanager
 
 import src.models  # noqa: F401
-import structlog
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.chat import routers as chat_router
 from src.chat import websocket as chat_ws
 from src.core.config import settings
 from src.core.exceptions import setup_exception_handlers
+from src.core.http import close_http_clients
+from src.core.logging_config import configure_logging
 from src.core.redis import close_redis
+from src.core.tracing import TracingMiddleware, shutdown_tracing
+from src.core.utils.ai_core.cassette import close_cassette
+from src.core.utils.ai_core.models import log_call_site_stats
 from src.users import routers as user_router
 
+from .engine.artifacts import close_artifact_sink
 from .engine.entrypoint import _running_tasks
+from .engine.executor import shutdown_engine_executor
+from .engine.metrics import start_stats_logging, stop_stats_logging
 
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        (
-            structlog.processors.JSONRenderer()
-            if settings.log_format == "json"
-            else structlog.dev.ConsoleRenderer()
-        ),
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
-)
+configure_logging()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan: startup / shutdown hooks."""
+    stats_logger = start_stats_logging()
     yield
-    # Shutdown: close Redis pool
-    await close_redis()
 
     # --- Shutdown logic goes here ---
+    await stop_stats_logging(stats_logger)
     if _running_tasks:
         for task in _running_tasks:
             task.cancel()
         await asyncio.gather(*_running_tasks, return_exceptions=True)
         _running_tasks.clear()
 
+    await close_artifact_sink()
+    shutdown_engine_executor()
+    log_call_site_stats()
+    close_cassette()
+    await close_http_clients()
+
+    # Close Redis last: cancelled tasks and the artifact sink still use it
+    await close_redis()
+    shutdown_tracing()
+
 
 app = FastAPI(
     title="Proactive Onboarding Engine API",
@@ -75,6 +73,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Root span per HTTP request (no-op unless TRACING_EXPORTER is set)
+app.add_middleware(TracingMiddleware)
+
 # Include API routers
 app.include_router(user_router.router)
 app.include_router(chat_router.router)
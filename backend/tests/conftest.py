@@ -0,0 +1,4 @@
+import os
+
+# Settings are read at import time: keep the app's engine off Postgres
+os.environ.setdefault("DATABASE_URL_OVERRIDE", "sqlite+aiosqlite://")
@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import src.models  # noqa: F401
+from src.chat.models import Chat
+from src.chat.services.chat import ChatService
+from src.core.database import Base
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def test_concurrent_add_token_usage_keeps_every_write(session_factory):
+    async with session_factory() as db_session:
+        chat = await ChatService.create_chat(
+            db_session, "Onboarding", "Hi", user_id=None, model_used="gpt-4.1"
+        )
+
+    async with session_factory() as first, session_factory() as second:
+        # Both sessions already hold the chat, like a request's session does
+        await first.get(Chat, chat.id)
+        await second.get(Chat, chat.id)
+        await asyncio.gather(
+            ChatService.add_token_usage(
+                first, chat.id, 10, {"planner": {"calls": 1, "total_tokens": 10}}
+            ),
+            ChatService.add_token_usage(
+                second,
+                chat.id,
+                5,
+                {
+                    "planner": {"calls": 1, "total_tokens": 3},
+                    "chat": {"calls": 1, "total_tokens": 2},
+                },
+            ),
+        )
+
+    async with session_factory() as db_session:
+        stored = await db_session.get(Chat, chat.id)
+    assert stored.token_consumed == 15
+    assert stored.chat_metadata["token_usage"] == {
+        "planner": {"calls": 2, "total_tokens": 13},
+        "chat": {"calls": 1, "total_tokens": 2},
+    }
+
+
+async def test_add_token_usage_unknown_chat(session_factory):
+    async with session_factory() as db_session:
+        chat = await ChatService.add_token_usage(db_session, uuid.uuid4(), 10, {})
+    assert chat is None
+
+
+async def test_token_usage_by_user_orders_heaviest_first(session_factory):
+    async with session_factory() as db_session:
+        light, heavy = uuid.uuid4(), uuid.uuid4()
+        for user_id, tokens in ((light, 5), (heavy, 40), (heavy, 2), (None, 99)):
+            chat = await ChatService.create_chat(
+                db_session, "Onboarding", "Hi", user_id=user_id, model_used="gpt"
+            )
+            await ChatService.add_token_usage(db_session, chat.id, tokens, {})
+
+        usage = await ChatService.get_token_usage_by_user(db_session, limit=5)
+    assert usage == [(heavy, 42), (light, 5)]
@@ -0,0 +1,80 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.core.config import settings
+from src.core.redis import roadmap_cancel_key
+from src.engine.lease import SessionLease, is_handoff, run_with_lease
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    monkeypatch.setattr(settings, "roadmap_cancel_poll_seconds", 0.01)
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+class _Run:
+    """A ``curate_roadmap`` stand-in that runs until cancelled."""
+
+    def __init__(self) -> None:
+        self.started = asyncio.Event()
+        self.cancelled_with: asyncio.CancelledError | None = None
+
+    async def __call__(self) -> bool:
+        self.started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError as exc:
+            self.cancelled_with = exc
+            raise
+        return True
+
+
+async def _not_called() -> None:
+    raise AssertionError("on_cancelled must not run")
+
+
+async def test_lost_lease_found_on_renewal(redis):
+    # Renewed every 20 ms
+    lease = SessionLease("session", redis=redis, ttl_seconds=0.06)
+    run = _Run()
+    outcome = asyncio.create_task(run_with_lease(lease, run, _not_called))
+    await run.started.wait()
+
+    await redis.set(lease.key, "other-token")
+
+    assert await asyncio.wait_for(outcome, 1) == "lost"
+    assert is_handoff(run.cancelled_with)
+    assert await redis.get(lease.key) == "other-token"
+
+
+async def test_cancel_flag_for_new_owner_is_left_alone(redis):
+    lease = SessionLease("session", redis=redis, ttl_seconds=30)
+    run = _Run()
+    outcome = asyncio.create_task(run_with_lease(lease, run, _not_called))
+    await run.started.wait()
+
+    # The lease expired and a new trigger took the session, then the user
+    # cancelled that new generation
+    await redis.set(lease.key, "other-token")
+    await redis.set(roadmap_cancel_key("session"), "1")
+
+    assert await asyncio.wait_for(outcome, 1) == "lost"
+    assert is_handoff(run.cancelled_with)
+    assert await redis.get(lease.key) == "other-token"
+    assert await redis.exists(roadmap_cancel_key("session"))
+
+
+async def test_cancel_request_cancels_the_run(redis):
+    lease = SessionLease("session", redis=redis, ttl_seconds=30)
+    run = _Run()
+    outcome = asyncio.create_task(run_with_lease(lease, run, _not_called))
+    await run.started.wait()
+
+    await redis.set(roadmap_cancel_key("session"), "1")
+
+    assert await asyncio.wait_for(outcome, 1) == "cancelled"
+    assert not is_handoff(run.cancelled_with)
+    assert not await redis.exists(lease.key)
+    assert not await redis.exists(roadmap_cancel_key("session"))
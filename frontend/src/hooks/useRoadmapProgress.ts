@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from "react";
 import { getRoadmapWsUrl } from "../services/api";
-import type { CourseRoadmap } from "../types/chat";
+import type { CourseRoadmap, RoadmapSection } from "../types/chat";
 
 // ---------------------------------------------------------------------------
 // Types
@@ -24,6 +24,8 @@ export interface RoadmapProgress {
   progressPct: number;
   /** The completed roadmap (only set when status === "completed"). */
   roadmap: CourseRoadmap | null;
+  /** Sections streamed ahead of the full roadmap, by index. */
+  sections: RoadmapSection[];
   /** Error message if status === "error". */
   error: string | null;
 }
@@ -34,6 +36,7 @@ const INITIAL_STATE: RoadmapProgress = {
   detail: "",
   progressPct: 0,
   roadmap: null,
+  sections: [],
   error: null,
 };
 
@@ -84,14 +87,27 @@ export function useRoadmapProgress(sessionId: string | null): RoadmapProgress {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          setState({
+          if (data.step === "section_ready" && data.section) {
+            // Partial result: keep overall progress, slot the section in
+            setState((s) => {
+              const sections = [...s.sections];
+              sections[data.section_index ?? sections.length] = data.section;
+              return { ...s, detail: data.detail ?? s.detail, sections };
+            });
+            return;
+          }
+          // A queued, retried or newly started run begins with no sections
+          const restarted =
+            data.status === "pending" || data.step === "analysing_answers";
+          setState((s) => ({
             status: data.status ?? "in_progress",
             step: data.step ?? "",
             detail: data.detail ?? "",
             progressPct: data.progress_pct ?? 0,
             roadmap: data.roadmap ?? null,
+            sections: restarted ? [] : s.sections,
             error: data.status === "error" ? data.detail : null,
-          });
+          }));
         } catch {
           // Ignore malformed messages
         }
@@ -192,12 +192,21 @@ function buildGraph(course: CourseRoadmap) {
 // Progress step emojis
 // ---------------------------------------------------------------------------
 const STEP_EMOJIS: Record<string, string> = {
+  queued: "\u{23F1}\uFE0F",
   analysing_answers: "\u{1F50D}",
   researching: "\u{1F4DA}",
   planning: "\u{1F5FA}\uFE0F",
   generating_roadmap: "\u{2728}",
+  planner: "\u{1F5FA}\uFE0F",
+  policy_research: "\u{1F4C4}",
+  internet_research: "\u{1F4DA}",
+  policy_research_partial: "\u{23F3}",
+  internet_research_partial: "\u{23F3}",
+  roadmap_creator: "\u{2728}",
+  section_ready: "\u{1F9E9}",
   done: "\u{2705}",
   failed: "\u{274C}",
+  timed_out: "\u{231B}",
 };
 
 // ---------------------------------------------------------------------------
@@ -295,6 +304,15 @@ export function RoadmapPage() {
                 {emoji} {progress.detail || "Preparing\u2026"}
               </p>
 
+              {/* Sections streamed ahead of the full roadmap */}
+              {progress.sections.length > 0 && (
+                <ul className="roadmap-progress-sections">
+                  {progress.sections.filter(Boolean).map((section) => (
+                    <li key={section.id}>{section.title}</li>
+                  ))}
+                </ul>
+              )}
+
               {/* Animated dots to show activity */}
               <div className="roadmap-progress-dots">
                 <span className="roadmap-dot" />